@@ -0,0 +1,86 @@
+# 对比：每个 URL 启动一次 Chromium（旧实现） vs 每线程常驻浏览器池
+# 用法：python benchmarks/bench_browser_pool.py --pages 40 --threads 4
+# cache/ 与应用目录放在临时目录，并放开 facebook 限速（旧实现不限速，否则比的是令牌桶而不是浏览器池）
+import os, sys, json, time, argparse, tempfile, threading, queue
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from bench_pipeline import FAST_LIMITS
+_TMP = tempfile.mkdtemp(prefix="fbh_bench_")
+os.environ["FBHUNTER_ROOT"] = os.path.join(_TMP, "root"); os.environ["FBHUNTER_APP_DIR"] = os.path.join(_TMP, "app")
+os.makedirs(os.environ["FBHUNTER_APP_DIR"])
+with open(os.path.join(os.environ["FBHUNTER_APP_DIR"], "settings.json"), "w", encoding="utf-8") as f:
+    json.dump({"rate_limits": FAST_LIMITS}, f)
+from fb_hunter.config import ProxyConfig
+from fb_hunter.scraper import Scraper
+
+PAGE = ("<html><head><meta property='og:title' content='Bench Page | Facebook'></head><body>"
+        + "<p>bench contact@example.com +1 555 123 4567</p>" * 400 + "</body></html>").encode("utf-8")
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200); self.send_header("Content-Type","text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE))); self.end_headers()
+        self.wfile.write(PAGE)
+    def log_message(self, *a): pass
+
+class _NoCache:
+    def get(self, key): return None
+    def get_entry(self, key): return None
+    def set(self, key, data, negative=False, reason="ok"): pass
+
+def legacy_fetch(url: str, wait_ms: int):
+    from playwright.sync_api import sync_playwright
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        context = browser.new_context()
+        page = context.new_page()
+        try:
+            page.goto(url, timeout=60000)
+            page.wait_for_timeout(wait_ms)
+            return page.content()
+        finally:
+            context.close(); browser.close()
+
+def run(label: str, urls, threads: int, fetch, release=lambda: None) -> float:
+    q: "queue.Queue[str]" = queue.Queue()
+    for u in urls: q.put(u)
+    def loop():
+        try:
+            while True:
+                try: u = q.get_nowait()
+                except queue.Empty: return
+                fetch(u)
+        finally:
+            release()
+    t0 = time.perf_counter()
+    ts = [threading.Thread(target=loop) for _ in range(threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+    dt = time.perf_counter() - t0
+    ppm = len(urls) / dt * 60
+    print(f"{label:<10} {len(urls)} 页 / {dt:6.1f}s  => {ppm:7.1f} 页/分钟")
+    return ppm
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--threads", type=int, default=4)
+    ap.add_argument("--wait", type=float, default=0.0, help="每页渲染等待(秒)")
+    args = ap.parse_args()
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}/p"
+    urls = [f"{base}{i}" for i in range(args.pages)]
+
+    legacy = run("legacy", urls, args.threads, lambda u: legacy_fetch(u, int(args.wait * 1000)))
+
+    scraper = Scraper(ProxyConfig("none","",0), wait_time=args.wait)
+    scraper.html_cache = _NoCache()
+    pooled = run("pool", urls, args.threads, lambda u: scraper.fetch_html(u, []), scraper.release_browser)
+    print(f"加速比：x{pooled / legacy:.2f}")
+    srv.shutdown()
+
+if __name__ == "__main__":
+    main()
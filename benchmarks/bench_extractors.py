@@ -0,0 +1,80 @@
+# extract_from_html 快速路径 vs BeautifulSoup 参考实现：一致性校验 + 耗时对比
+# 语料优先取 cache/_runtime_html 中已保存的页面，也可用 --dir 指定 .html 目录；都没有时生成合成页面
+# 用法：python benchmarks/bench_extractors.py [--dir saved_pages] [--limit 200]
+import os, sys, time, random, argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from fb_hunter.extractors import extract_from_html, extract_from_html_soup
+from fb_hunter.cache_store import FileCache
+
+PARITY_CASES = [
+    "<html><head><meta property='og:title' content='Acme &amp; Co | Facebook'><meta property=og:description content=\"Best lights\"></head>"
+    "<body><p>Call +1 (555) 123-4567 or mail a@b.com</p></body></html>",
+    "<html><head><title>My <b>Shop</b> | Facebook</title><script>var x='<meta property=\"og:title\" content=\"bad\">'; a@evil.com</script></head>"
+    "<body><h2>Head <i>two</i></h2><style>.x{}</style><!-- c@d.com --><div title='a>b'>123 Main Street, Springfield</div> www.acme.com/about</body></html>",
+    "<body><h1> Hello &lt;world&gt; </h1><template>t@t.com</template><p>x&nbsp;y z@z.io</p></body>",
+    "<html><head></head><body><meta property='og:title' content=''><p>no title 2 &lt;b&gt; 45 Queen Rd London</p></body></html>",
+    "<p>a < b and c > d, e@f.gh</p>",
+]
+
+def synthetic(i: int, kb: int = 1500) -> str:
+    rnd = random.Random(i)
+    words = "lighting wholesale christmas decor contact shop import factory led string".split()
+    blocks = []
+    while sum(map(len, blocks)) < kb * 1024:
+        blocks.append(f"<script>require('m{rnd.randint(0, 999)}').init({{\"a\":\"<div>{'x' * 400}</div>\"}});</script>")
+        blocks.append(f"<div class='x{rnd.randint(0, 99)}'><span>{' '.join(rnd.choice(words) for _ in range(40))}</span></div>")
+    intro = "<div data-pagelet='ProfileTilesFeed_0'>Intro · shop@example.com · +1 555 010 0199 · www.example.com · 12 High Street Leeds</div>"
+    return (f"<!DOCTYPE html><html><head><meta property='og:title' content='Page {i} | Facebook'>"
+            f"<meta property='og:description' content='Synthetic {i}'><title>Page {i}</title></head>"
+            f"<body>{''.join(blocks[:len(blocks) // 2])}{intro}{''.join(blocks[len(blocks) // 2:])}</body></html>")
+
+def load_corpus(src_dir: str, limit: int):
+    docs = []
+    if src_dir:
+        for name in sorted(os.listdir(src_dir)):
+            if name.endswith((".html", ".htm")) and len(docs) < limit:
+                with open(os.path.join(src_dir, name), "r", encoding="utf-8", errors="ignore") as f:
+                    docs.append((name, f.read()))
+        return docs
+    cache = FileCache("html")
+    for _, _, path in cache._entries():
+        if len(docs) >= limit: break
+        with open(path, "rb") as f:
+            e = cache._decode(f.read(), 0)
+        if e is not None and not e.negative and e.data:
+            docs.append((os.path.basename(path), e.data.decode("utf-8", errors="ignore")))
+    return docs
+
+def timed(fn, docs):
+    t0 = time.perf_counter()
+    out = [fn(html, "https://www.facebook.com/bench/") for _, html in docs]
+    return out, time.perf_counter() - t0
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dir", default="")
+    ap.add_argument("--limit", type=int, default=200)
+    args = ap.parse_args()
+
+    docs = load_corpus(args.dir, args.limit)
+    source = args.dir or "cache/_runtime_html"
+    if not docs:
+        docs = [(f"synthetic_{i}", synthetic(i)) for i in range(20)]
+        source = "合成页面"
+    docs = [(f"case_{i}", c) for i, c in enumerate(PARITY_CASES)] + docs
+    mb = sum(len(h) for _, h in docs) / 1048576
+    print(f"语料：{source}，{len(docs)} 篇，{mb:.1f}MB")
+
+    fast, t_fast = timed(extract_from_html, docs)
+    ref, t_ref = timed(extract_from_html_soup, docs)
+    diffs = [(name, {k: (a[k], b[k]) for k in a if a[k] != b[k]}) for (name, _), a, b in zip(docs, fast, ref) if a != b]
+    for name, d in diffs[:10]:
+        print(f"  [不一致] {name}: {d}")
+    print(f"一致性：{len(docs) - len(diffs)}/{len(docs)}")
+    print(f"soup  {t_ref:7.2f}s  {mb / t_ref:6.1f}MB/s")
+    print(f"fast  {t_fast:7.2f}s  {mb / t_fast:6.1f}MB/s  加速 x{t_ref / t_fast:.1f}")
+    sys.exit(1 if diffs else 0)
+
+if __name__ == "__main__":
+    main()
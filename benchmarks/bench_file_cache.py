@@ -0,0 +1,76 @@
+# FileCache 离线基准：旧版（平铺、未压缩） vs 分片 + 压缩 + LRU 上限
+# 用法：python benchmarks/bench_file_cache.py --keys 2000 --size 1500
+import os, sys, time, random, shutil, hashlib, argparse, tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from fb_hunter.cache_store import FileCache
+
+class LegacyFileCache:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".cache")
+    def get(self, key: str):
+        p = self._path(key)
+        if os.path.exists(p):
+            with open(p, "rb") as f:
+                return f.read()
+        return None
+    def set(self, key: str, data: bytes):
+        with open(self._path(key), "wb") as f:
+            f.write(data)
+
+def fake_html(i: int, kb: int) -> bytes:
+    rnd = random.Random(i)
+    words = ["lighting","wholesale","christmas","decor","contact","shop","import","factory","led","string"]
+    body = " ".join(rnd.choice(words) for _ in range(kb * 110))
+    return (f"<html><head><meta property='og:title' content='Page {i} | Facebook'></head>"
+            f"<body><script>{'x' * 200}</script><div>{body}</div></body></html>").encode("utf-8")
+
+def disk_usage(root: str) -> int:
+    total = 0
+    for d, _, files in os.walk(root):
+        for f in files:
+            try: total += os.path.getsize(os.path.join(d, f))
+            except OSError: pass
+    return total
+
+def bench(label: str, cache, keys, payloads, hot_keys):
+    t0 = time.perf_counter()
+    for k, v in zip(keys, payloads): cache.set(k, v)
+    t_set = time.perf_counter() - t0
+    if hasattr(cache, "_mem"): cache._mem.clear(); cache._mem_size = 0
+    t0 = time.perf_counter()
+    for k in keys: cache.get(k)
+    t_get = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for k in hot_keys: cache.get(k)
+    t_hot = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for i in range(len(keys)): cache.get(f"miss::{i}")
+    t_miss = time.perf_counter() - t0
+    n = len(keys)
+    print(f"{label:<8} set {n / t_set:8.0f}/s  get {n / t_get:8.0f}/s  hot {len(hot_keys) / t_hot:9.0f}/s  "
+          f"miss {n / t_miss:9.0f}/s  disk {disk_usage(cache.root) / 1048576:8.1f}MB")
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--keys", type=int, default=2000)
+    ap.add_argument("--size", type=int, default=1500, help="单页大小(KB)")
+    ap.add_argument("--cap-mb", type=int, default=0, help="新版容量上限，0 为不限")
+    args = ap.parse_args()
+
+    keys = [f"html::https://www.facebook.com/page{i}" for i in range(args.keys)]
+    payloads = [fake_html(i, args.size) for i in range(args.keys)]
+    hot = [random.choice(keys[:32]) for _ in range(args.keys * 5)]
+    tmp = tempfile.mkdtemp(prefix="fbh_cache_bench_")
+    try:
+        bench("legacy", LegacyFileCache(os.path.join(tmp, "legacy")), keys, payloads, hot)
+        cap = (args.cap_mb << 20) if args.cap_mb else 1 << 50
+        bench("sharded", FileCache("bench", max_bytes=cap, root=os.path.join(tmp, "sharded")), keys, payloads, hot)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
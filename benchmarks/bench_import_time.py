@@ -0,0 +1,54 @@
+# 冷启动导入耗时：每个模块在全新解释器里导入 N 次取中位数，并检查重依赖是否被提前加载
+# 超出预算或提前加载了重依赖时退出码为 1，可直接放进 CI
+# 用法：python benchmarks/bench_import_time.py [--repeat 5] [--scale 1.0]
+import os, sys, json, argparse, statistics, subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# 模块 -> 预算(毫秒)；GUI 的大头是 PySide6 本身
+BUDGETS_MS = {
+    "fb_hunter.config": 60,
+    "fb_hunter.scraper": 150,
+    "fb_hunter.pipeline": 180,
+    "fb_hunter.cli": 120,
+    "fb_hunter.ui.main_window": 600,
+}
+# 这些依赖只允许在首次使用时加载
+HEAVY = ("playwright", "ddgs", "requests", "bs4", "pandas", "pyarrow")
+
+PROBE = """
+import sys, time, json
+t0 = time.perf_counter()
+import {mod}
+dt = time.perf_counter() - t0
+print(json.dumps({{"ms": dt * 1000, "heavy": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def probe(mod: str) -> dict:
+    env = {**os.environ, "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen")}
+    out = subprocess.run([sys.executable, "-c", PROBE.format(mod=mod, heavy=HEAVY)], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--scale", type=float, default=1.0, help="预算倍数，慢机器上可放宽")
+    ap.add_argument("--module", action="append", help="只测指定模块，可重复")
+    args = ap.parse_args()
+
+    failed = False
+    probe("fb_hunter.config")  # 预热 .pyc
+    for mod in args.module or list(BUDGETS_MS):
+        runs = [probe(mod) for _ in range(max(1, args.repeat))]
+        ms = statistics.median(r["ms"] for r in runs)
+        heavy = sorted({m for r in runs for m in r["heavy"]})
+        budget = BUDGETS_MS.get(mod, 200) * args.scale
+        ok = ms <= budget and not heavy
+        failed |= not ok
+        note = f"  提前加载: {', '.join(heavy)}" if heavy else ""
+        print(f"{'OK  ' if ok else 'FAIL'} {mod:<28} {ms:7.1f}ms / 预算 {budget:5.0f}ms{note}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
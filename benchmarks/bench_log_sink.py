@@ -0,0 +1,115 @@
+# 界面日志通路：旧做法（每条日志/进度一次跨线程信号 + QTextEdit.append + 同步写文件）vs 批量缓冲 + QPlainTextEdit
+# 多个线程同时狂写日志，测界面事件循环最长卡顿、全部显示完的耗时和日志框行数
+# 用法：python benchmarks/bench_log_sink.py [--threads 16] [--lines 1000] [--rate 200] [--legacy]
+# 默认只跑批量通路；旧通路的每秒上万次跨线程信号在部分 PySide6 版本上会让解释器直接崩溃，需要对比时加 --legacy，并排在最后跑
+import os, sys, time, queue, logging, logging.handlers, argparse, tempfile, threading
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.environ.setdefault("FBHUNTER_APP_DIR", tempfile.mkdtemp(prefix="fbh_bench_"))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from PySide6.QtCore import QObject, QThread, QTimer, QEventLoop, Signal
+from PySide6.QtGui import QTextCursor
+from PySide6.QtWidgets import QApplication, QTextEdit, QPlainTextEdit
+from fb_hunter import worker_qt, logging_config
+from fb_hunter.logging_config import setup_logging
+from fb_hunter.ui.main_window import MainWindow, LOG_MAX_LINES
+
+def produce(threads: int, lines: int, log, progress, rate: float = 0):
+    total = threads * lines; done = [0]; lock = threading.Lock()
+    def one(t):
+        for i in range(lines):
+            log(f"[T{t}] 打开: https://www.facebook.com/page{t}_{i} 标题 Page {i} 邮箱 shop{i}@example.com")
+            with lock: done[0] += 1; d = done[0]
+            progress(d, total)
+            if rate: time.sleep(1 / rate)
+    ts = [threading.Thread(target=one, args=(t,)) for t in range(threads)]
+    for t in ts: t.start()
+    for t in ts: t.join()
+
+# 旧通路：信号逐条排队，界面线程逐条 append + 同步 RotatingFileHandler
+class LegacyWorker(QThread):
+    log = Signal(str)
+    progress = Signal(int, int)
+    def __init__(self, bench):
+        super().__init__(); self.bench = bench
+    # PySide6 在非 QThread 的 Python 线程里 emit 会崩溃（refcount 错误），旧通路由本线程逐条转发，仍是每条一次信号
+    def run(self):
+        q = queue.SimpleQueue(); END = object()
+        def go():
+            produce(*self.bench[:2], lambda s: q.put((s,)), lambda d, t: q.put((d, t)), self.bench[2]); q.put(END)
+        threading.Thread(target=go).start()
+        while (m := q.get()) is not END:
+            if len(m) == 1: self.log.emit(m[0])
+            else: self.progress.emit(*m)
+
+class LegacyView(QObject):
+    def __init__(self, path):
+        super().__init__()
+        self.log = QTextEdit(); self.log.setReadOnly(True)
+        self.logger = logging.getLogger("bench.legacy"); self.logger.propagate = False; self.logger.setLevel(logging.INFO)
+        fh = logging.handlers.RotatingFileHandler(path, maxBytes=2*1024*1024, backupCount=5, encoding="utf-8")
+        fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s")); self.logger.addHandler(fh)
+        self.shown = 0
+    def append_log(self, msg):
+        self.log.append(msg); self.log.moveCursor(QTextCursor.End); self.logger.info(msg); self.shown += 1
+    def on_progress(self, done, total):
+        self.append_log(f"[进度] {done}/{total}")
+
+# 新通路：真实的 ScrapeWorker（Pipeline 换成只产生日志的假任务）+ MainWindow.show_logs
+class FakePipeline:
+    def __init__(self, *a, log=None, progress=None, bench=(16, 1000, 0), **kw):
+        self.log = log; self.progress_cb = progress; self.bench = bench
+    def run(self):
+        produce(*self.bench[:2], self.log, self.progress_cb, self.bench[2]); return [], 0
+    def stop(self): pass
+
+class BatchedView(QObject):
+    def __init__(self):
+        super().__init__()
+        self.log = QPlainTextEdit(); self.log.setReadOnly(True); self.log.setMaximumBlockCount(LOG_MAX_LINES)
+        self.logger = setup_logging("bench.batched")
+        logging_config._listener.handlers = tuple(h for h in logging_config._listener.handlers if isinstance(h, logging.FileHandler))  # 与旧通路一样只写文件
+        self.shown = 0
+    def show_logs(self, lines):
+        MainWindow.show_logs(self, lines); self.shown += len(lines)
+    def on_progress(self, done, total): pass
+
+def measure(start, finished, view) -> dict:
+    gaps = [0.0]; last = [time.perf_counter()]
+    def beat():
+        now = time.perf_counter(); gaps[0] = max(gaps[0], now - last[0]); last[0] = now
+    hb = QTimer(); hb.setInterval(10); hb.timeout.connect(beat); hb.start()
+    loop = QEventLoop(); finished.connect(loop.quit)
+    t0 = time.perf_counter(); start(); loop.exec()
+    dt = time.perf_counter() - t0
+    QTimer.singleShot(300, loop.quit); loop.exec()  # 收尾：让排队中的信号处理完
+    hb.stop()
+    return {"s": dt, "stall_ms": gaps[0] * 1000, "shown": view.shown, "widget_lines": view.log.document().blockCount()}
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--lines", type=int, default=1000, help="每线程日志条数（每条同时报一次进度）")
+    ap.add_argument("--rate", type=float, default=200, help="每线程每秒日志条数，0 表示不限速")
+    ap.add_argument("--legacy", action="store_true", help="批量通路之后再跑旧通路做对比（可能使解释器崩溃）")
+    args = ap.parse_args()
+    app = QApplication.instance() or QApplication(sys.argv)
+    tmp = tempfile.mkdtemp(prefix="fbh_log_")
+
+    bench = (args.threads, args.lines, args.rate)
+    n = args.threads * args.lines
+    print(f"{args.threads} 线程 × {args.lines} 条 = {n} 条日志 + {n} 次进度")
+    def report(name, r):
+        print(f"  {name:<24} 耗时 {r['s']:6.2f}s  最长卡顿 {r['stall_ms']:7.1f}ms  已显示 {r['shown']:6d}  日志框行数 {r['widget_lines']}", flush=True)
+
+    worker_qt.Pipeline = lambda *a, **kw: FakePipeline(*a, bench=bench, **kw)
+    new = BatchedView(); sw = worker_qt.ScrapeWorker([], "", 0, 0, None, 0, [], logger=new.logger)
+    sw.log.connect(new.show_logs); sw.progress.connect(new.on_progress)
+    report("批量缓冲 + QPlainTextEdit", measure(sw.start, sw.finished_all, new))
+    if args.legacy:
+        old = LegacyView(os.path.join(tmp, "legacy.log")); w = LegacyWorker(bench)
+        w.log.connect(old.append_log); w.progress.connect(old.on_progress)
+        report("逐条信号 + QTextEdit", measure(w.start, w.finished, old))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# 离线端到端基准：本地页面服务器 + 假搜索后端，跑完整 Pipeline（搜索 -> 渲染 -> 解析入库 -> 网站分析 -> 导出）
+# 按 引擎 × 线程数 × 渲染等待上限 × 冷/热缓存 组合，报告 成功页/分钟、CPU、峰值内存与各阶段 p50/p95
+# 每个场景在独立子进程里运行（cache/ 与应用目录都在临时目录），需已安装 Chromium；装了 psutil 时峰值内存含浏览器进程
+# 用法：python benchmarks/bench_pipeline.py --threads 2,4,8 --wait 3,8 --cache cold,warm [--engine threads,async] [--json out.json]
+import os, sys, json, time, shutil, argparse, itertools, subprocess, tempfile
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+STAGES = ("search", "fetch", "navigate", "render_wait", "extract", "enrich", "db_commit")
+KEEP_WARM = ("_runtime_html", "_runtime_ddgs", "_sites")  # 热缓存：保留页面/搜索/网站缓存，关键词库、全局索引与任务库清空
+FAST_LIMITS = {"ddg": [100, 100, 100], "facebook": [1000, 1000, 1000], "web": [1000, 1000, 1000]}
+
+def child(spec: dict):
+    from offline_env import FakeSearch, LocalRoutes, patch_site_session
+    from fb_hunter.pipeline import Pipeline
+    from fb_hunter.render import RoutePolicy
+    from fb_hunter.config import ProxyConfig
+    patch_site_session(spec["base"])
+    keywords = [f"bench keyword {i}" for i in range(spec["keywords"])]
+    pipe = Pipeline(keywords, "", spec["per_keyword"], spec["threads"], ProxyConfig("none", "", 0), spec["wait"], [],
+                    engine=spec["engine"], route_policy=LocalRoutes(spec["base"], None if spec["no_block"] else RoutePolicy()),
+                    parse_workers=spec["parse_workers"], enrich_workers=spec["enrich_workers"], search_workers=spec["search_workers"],
+                    data_dir=os.path.join(spec["root"], "out"), metrics_path=spec["metrics"],
+                    search_backend=FakeSearch(spec["per_keyword"], spec["search_ms"], spec["ratelimit_rate"]),
+                    log=print if spec["verbose"] else (lambda s: None))
+    t0 = time.perf_counter()
+    _, count = pipe.run()
+    print(json.dumps({"wall_s": time.perf_counter() - t0, "exported": count, "error": None if pipe.error is None else str(pipe.error)}))
+
+def _tree_rss(proc) -> int:
+    try:
+        return sum(p.memory_info().rss for p in [proc] + proc.children(recursive=True))
+    except Exception:
+        return 0
+
+# 运行一个场景子进程；CPU 取 RUSAGE_CHILDREN 的增量（浏览器进程退出后也计入），峰值内存优先用 psutil 采样整棵进程树
+def run_scenario(spec: dict, env: dict) -> dict:
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    before = resource.getrusage(resource.RUSAGE_CHILDREN) if resource else None
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, __file__, "--child", json.dumps(spec)], env=env, stdout=subprocess.PIPE, text=True)
+    peak = 0
+    ps = psutil.Process(proc.pid) if psutil else None
+    while proc.poll() is None:
+        if ps is not None: peak = max(peak, _tree_rss(ps))
+        time.sleep(0.25)
+    out = proc.stdout.read()
+    wall = time.perf_counter() - t0
+    if spec["verbose"]: print(out, end="")
+    lines = [l for l in out.strip().splitlines() if l.startswith("{")]
+    res = json.loads(lines[-1]) if lines else {"wall_s": wall, "exported": 0, "error": f"子进程退出码 {proc.returncode}"}
+    if before is not None:
+        after = resource.getrusage(resource.RUSAGE_CHILDREN)
+        res["cpu_s"] = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+        # ru_maxrss：Linux 为 KB，macOS 为字节；只代表最大的单个子进程
+        single = after.ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+        if not peak: peak = single
+    res["peak_rss_mb"] = peak / 1048576 if peak else None
+    try:
+        with open(spec["metrics"] + ".json", "r", encoding="utf-8") as f: res["metrics"] = json.load(f)
+    except Exception:
+        res["metrics"] = {"stages": {}}
+    return res
+
+def prune_warm(root: str):
+    cache = os.path.join(root, "cache")
+    for name in os.listdir(cache) if os.path.isdir(cache) else []:
+        if name not in KEEP_WARM: shutil.rmtree(os.path.join(cache, name), ignore_errors=True)
+    shutil.rmtree(os.path.join(root, "out"), ignore_errors=True)
+
+def fmt_row(r: dict) -> str:
+    st = r["metrics"].get("stages", {})
+    page = st.get("page") or {}
+    outcomes = page.get("outcomes", {})
+    pages = page.get("count", 0); ok = sum(v for k, v in outcomes.items() if k in ("ok", "cached")); errors = outcomes.get("error", 0)
+    ppm = ok / r["wall_s"] * 60 if r["wall_s"] else 0  # 只算成功页：抓取异常/空白页很快就结束，算进来会虚高
+    cpu = r.get("cpu_s")
+    lat = "  ".join(f"{k} {st[k]['p50_s'] or 0:.2f}/{st[k]['p95_s'] or 0:.2f}" for k in STAGES if st.get(k) and st[k]["p50_s"] is not None)
+    rss = f"{r['peak_rss_mb']:6.0f}MB" if r.get("peak_rss_mb") else "     -  "
+    failed = "  [失败：没有成功的页面]" if not ok else ""
+    return (f"{r['name']:<24} {pages:5d} 页(成功 {ok:5d}，异常 {errors:4d}) {r['wall_s']:7.1f}s {ppm:8.1f} 成功页/分  CPU {cpu if cpu is not None else 0:6.1f}s"
+            f" ({(cpu or 0) / r['wall_s'] * 100 if r['wall_s'] else 0:4.0f}%)  内存 {rss}" + failed + (f"  错误: {r['error']}" if r.get("error") else "")
+            + (f"\n{'':<30}p50/p95(s): {lat}" if lat else ""))
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    ap.add_argument("--engine", default="threads", help="逗号分隔：threads,async")
+    ap.add_argument("--threads", default="4", help="逗号分隔的线程数/并发页数，如 2,4,8")
+    ap.add_argument("--wait", default="8", help="逗号分隔的渲染等待上限(秒)")
+    ap.add_argument("--cache", default="cold", help="cold / warm / cold,warm（warm 先跑一次 cold 预热）")
+    ap.add_argument("--keywords", type=int, default=4)
+    ap.add_argument("--per-keyword", type=int, default=25)
+    ap.add_argument("--size-kb", type=int, default=300, help="页面大小")
+    ap.add_argument("--latency-ms", type=float, default=200, help="页面平均响应延迟")
+    ap.add_argument("--error-rate", type=float, default=0.05, help="429/404/登录跳转的比例")
+    ap.add_argument("--late-ms", type=int, default=0, help="og:title 由脚本延迟插入的毫秒数（模拟客户端渲染）")
+    ap.add_argument("--search-ms", type=float, default=300, help="假搜索后端平均延迟")
+    ap.add_argument("--ratelimit-rate", type=float, default=0.0, help="假搜索后端抛出限流异常的比例")
+    ap.add_argument("--parse-workers", type=int, default=0)
+    ap.add_argument("--enrich-workers", type=int, default=4)
+    ap.add_argument("--search-workers", type=int, default=3)
+    ap.add_argument("--no-block", action="store_true", help="不拦截图片等资源")
+    ap.add_argument("--real-limits", action="store_true", help="使用默认限速（默认放开，测的是本机吞吐上限）")
+    ap.add_argument("--json", help="把全部结果写到 JSON 文件")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+    if args.child:
+        return child(json.loads(args.child))
+
+    from offline_env import PageServer
+    server = PageServer(args.size_kb, args.latency_ms, args.error_rate, args.late_ms).start()
+    tmp = tempfile.mkdtemp(prefix="fbh_bench_")
+    print(f"页面服务器 {server.base}  临时目录 {tmp}")
+    print(f"{args.keywords} 个关键词 × {args.per_keyword} 页，页面 {args.size_kb}KB，延迟 {args.latency_ms:.0f}ms，错误率 {args.error_rate:.0%}")
+    caches = [c for c in args.cache.split(",") if c in ("cold", "warm")] or ["cold"]
+    results = []
+    try:
+        for engine, threads, wait in itertools.product(args.engine.split(","), [int(x) for x in args.threads.split(",")],
+                                                       [float(x) for x in args.wait.split(",")]):
+            key = f"{engine}-t{threads}-w{wait:g}"
+            root = os.path.join(tmp, key); app = os.path.join(root, "app")
+            os.makedirs(app, exist_ok=True)
+            with open(os.path.join(app, "settings.json"), "w", encoding="utf-8") as f:
+                json.dump({} if args.real_limits else {"rate_limits": FAST_LIMITS}, f)
+            env = {**os.environ, "FBHUNTER_ROOT": root, "FBHUNTER_APP_DIR": app}
+            for cache in (["cold", "warm"] if "warm" in caches else ["cold"]):
+                if cache == "warm": prune_warm(root)
+                spec = {"base": server.base, "root": root, "engine": engine, "threads": threads, "wait": wait,
+                        "keywords": args.keywords, "per_keyword": args.per_keyword, "search_ms": args.search_ms,
+                        "ratelimit_rate": args.ratelimit_rate, "parse_workers": args.parse_workers,
+                        "enrich_workers": args.enrich_workers, "search_workers": args.search_workers, "no_block": args.no_block,
+                        "metrics": os.path.join(tmp, "metrics", f"{key}-{cache}"), "verbose": args.verbose}
+                r = run_scenario(spec, env); r["name"] = f"{key} {cache}"
+                if cache in caches:
+                    results.append(r); print(fmt_row(r), flush=True)
+    finally:
+        server.stop()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(results, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(tmp, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# 离线基准环境：本地页面服务器（仿 Facebook 主页，可调大小/延迟/错误率）+ 代替 DDGS 的搜索后端
+# + 把浏览器里 facebook.com 的请求改写到本地服务器的路由 + 网站分析请求改写到本地服务器
+import os, sys, time, random, hashlib, threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+FILLER = "".join(f"<div class='x{i % 37}'><span>lighting wholesale decor contact shop import factory led string {i}</span>"
+                 f"<script>require('m{i}').init({{\"a\":\"{'x' * 120}\"}});</script></div>" for i in range(40))
+
+# 页面：/fb/<slug> 主页，/fb/login 登录墙，/site/<域名> 网站首页，/img/* 图片（默认被路由拦截）
+class PageServer:
+    def __init__(self, size_kb: int = 300, latency_ms: float = 200, error_rate: float = 0.0, late_ms: int = 0,
+                 site_latency_ms: float = 100, seed: int = 0):
+        self.size_kb = size_kb
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.late_ms = late_ms
+        self.site_latency = site_latency_ms / 1000.0
+        self.rng = random.Random(seed)
+        self.hits = 0
+        self._lock = threading.Lock()
+        server = self
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            def do_GET(self): server.handle(self)
+            def log_message(self, *a): pass
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> "PageServer":
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown(); self.httpd.server_close()
+
+    def _sleep(self, mean: float):
+        if mean > 0: time.sleep(mean * self.rng.uniform(0.5, 1.5))
+
+    @staticmethod
+    def _send(h, status: int, body: bytes, ctype: str = "text/html; charset=utf-8", headers=()):
+        h.send_response(status); h.send_header("Content-Type", ctype); h.send_header("Content-Length", str(len(body)))
+        for k, v in headers: h.send_header(k, v)
+        h.end_headers(); h.wfile.write(body)
+
+    def handle(self, h):
+        path = urlparse(h.path).path
+        with self._lock: self.hits += 1; roll = self.rng.random()
+        if path.startswith("/img/"):
+            return self._send(h, 200, b"\x89PNG\r\n\x1a\n" + b"\0" * 2048, "image/png")
+        if path.startswith("/site/"):
+            self._sleep(self.site_latency)
+            host = path[6:].split("/")[0]
+            return self._send(h, 200, f"<html><head><title>{host} lighting store</title><meta name='description' content='Christmas lighting "
+                                      f"and decor wholesale'></head><body><h1>{host}</h1><p>{'led string lights ' * 50}</p></body></html>".encode())
+        if path == "/fb/login":
+            return self._send(h, 200, ("<html><body><form id=\"login_form\"></form>" + "x" * 12000 + "</body></html>").encode())
+        if not path.startswith("/fb/"):
+            return self._send(h, 404, b"not found")
+        self._sleep(self.latency)
+        if roll < self.error_rate:
+            kind = ("blocked", "gone", "login")[int(roll / self.error_rate * 3) % 3]
+            if kind == "blocked": return self._send(h, 429, b"<html><body>Too many requests</body></html>")
+            if kind == "gone": return self._send(h, 404, b"<html><body>This content isn't available right now</body></html>")
+            return self._send(h, 302, b"", headers=[("Location", "/login")])
+        return self._send(h, 200, self.page(path[4:]))
+
+    def page(self, slug: str) -> bytes:
+        n = int(hashlib.md5(slug.encode()).hexdigest()[:6], 16)
+        name = f"Bench Shop {n % 100000}"
+        meta = (f'<meta property="og:title" content="{name} | Facebook">'
+                f'<meta property="og:description" content="Lighting and decor supplier #{n % 977}">')
+        intro = (f"<div data-pagelet='ProfileTilesFeed_0'>Intro · contact@{slug.replace('.', '-')}.invalid · "
+                 f"+1 555 {n % 900 + 100} {n % 9000 + 1000} · {n % 200 + 1} High Street Leeds</div>")
+        head = meta if not self.late_ms else (
+            f"<script>setTimeout(function(){{document.head.insertAdjacentHTML('beforeend', {meta!r})}}, {self.late_ms})</script>")
+        blocks = max(1, self.size_kb * 1024 // len(FILLER))
+        half = FILLER * (blocks // 2)
+        imgs = "".join(f"<img src='/img/{slug}/{i}.png'>" for i in range(4))
+        return (f"<!DOCTYPE html><html><head><title>{name}</title>{head}</head><body>{half}{intro}{imgs}"
+                f"{FILLER * (blocks - blocks // 2)}</body></html>").encode("utf-8")
+
+# 代替 ddgs.DDGS：Scraper(search_backend=FakeSearch(...)) 按 DDGS(proxy=...) 的方式调用
+class FakeSearch:
+    def __init__(self, per_keyword: int = 25, latency_ms: float = 300, ratelimit_rate: float = 0.0, seed: int = 0):
+        self.per_keyword = per_keyword
+        self.latency = latency_ms / 1000.0
+        self.ratelimit_rate = ratelimit_rate
+        self.rng = random.Random(seed)
+        self.calls = 0
+
+    def __call__(self, proxy=None) -> "FakeSearch":
+        return self
+
+    def __enter__(self): return self
+    def __exit__(self, *a): return False
+
+    def text(self, query: str, max_results: int = 20, **kw):
+        self.calls += 1
+        if self.latency: time.sleep(self.latency * self.rng.uniform(0.5, 1.5))
+        if self.rng.random() < self.ratelimit_rate:
+            from ddgs.exceptions import RatelimitException
+            raise RatelimitException("bench ratelimit")
+        kw_text = query.replace("site:facebook.com", "").strip()
+        tag = hashlib.md5(kw_text.encode()).hexdigest()[:8]
+        n = min(max_results, self.per_keyword)
+        return [{"href": f"https://www.facebook.com/bench.{tag}.{i}", "title": f"{kw_text} {i}"} for i in range(n)]
+
+# 浏览器路由：facebook.com 的请求改从本地服务器取（状态码/跳转原样返回），其余按原拦截策略处理
+class LocalRoutes:
+    def __init__(self, base: str, policy=None):
+        self.base = base
+        self.policy = policy
+
+    def target(self, url: str):
+        p = urlparse(url)
+        if not (p.hostname or "").endswith("facebook.com"): return None
+        return f"{self.base}/fb{p.path}" + (f"?{p.query}" if p.query else "")
+
+    def install(self, context):
+        def handler(route):
+            req = route.request
+            if self.policy is not None and self.policy.should_block(req.resource_type, req.url): return route.abort()
+            t = self.target(req.url)
+            if t is None: return route.abort()  # 离线：不放行任何外部请求
+            route.fulfill(response=route.fetch(url=t, max_redirects=0))
+        context.route("**/*", handler)
+
+    async def install_async(self, context):
+        async def handler(route):
+            req = route.request
+            if self.policy is not None and self.policy.should_block(req.resource_type, req.url): return await route.abort()
+            t = self.target(req.url)
+            if t is None: return await route.abort()
+            await route.fulfill(response=await route.fetch(url=t, max_redirects=0))
+        await context.route("**/*", handler)
+
+# 网站分析（requests）改写到本地 /site/<域名>
+def patch_site_session(base: str):
+    from requests.adapters import HTTPAdapter
+    from fb_hunter import enrich
+    class SiteAdapter(HTTPAdapter):
+        def send(self, request, **kw):
+            p = urlparse(request.url)
+            request.url = f"{base}/site/{p.hostname}{p.path or '/'}"
+            kw["proxies"] = None
+            return super().send(request, **kw)
+    make = enrich.make_session
+    def make_session(pool_size: int):
+        s = make(pool_size)
+        a = SiteAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        s.mount("http://", a); s.mount("https://", a)
+        return s
+    enrich.make_session = make_session
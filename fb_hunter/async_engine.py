@@ -0,0 +1,145 @@
+import os, asyncio, queue, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from .browser_pool import cookie_key, context_key, context_options
+from .render import NetworkTracker, wait_ready_async, track_bytes_async
+from .scraper import STOPPED
+
+STOP_POLL_S = 0.2
+
+# 单事件循环 + 单浏览器：并发页数由信号量限制，解析/入库放到线程池，避免阻塞事件循环。
+class AsyncFetchEngine:
+    def __init__(self, scraper, concurrency: int, stop_event: threading.Event):
+        self.scraper = scraper
+        self.concurrency = max(1, concurrency)
+        self.stop_event = stop_event
+        self._browser = None
+        self._contexts: Dict[str, Any] = {}
+        self._ctx_lock = asyncio.Lock()
+
+    async def _context(self, cookies: List[Dict[str, Any]], proxy):
+        key = context_key(cookies, proxy)
+        async with self._ctx_lock:
+            ctx = self._contexts.get(key)
+            if ctx is None:
+                ctx = await self._browser.new_context(**context_options(proxy))
+                if self.scraper.route_policy:
+                    await self.scraper.route_policy.install_async(ctx)
+                if cookies:
+                    await ctx.add_cookies(cookies)
+                self._contexts[key] = ctx
+            return ctx
+
+    async def save_state(self, cookies: List[Dict[str, Any]], path: str) -> bool:
+        prefix = cookie_key(cookies) + "@"
+        for key, ctx in list(self._contexts.items()):
+            if key.startswith(prefix):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                await ctx.storage_state(path=path)
+                return True
+        return False
+
+    async def _drop(self, cookies: List[Dict[str, Any]], proxy):
+        async with self._ctx_lock:
+            ctx = self._contexts.pop(context_key(cookies, proxy), None)
+        if ctx is not None:
+            try: await ctx.close()
+            except Exception: pass
+
+    # 限速等待分片睡眠，停止后最多再等 STOP_POLL_S 秒
+    async def _throttle(self, delay: float):
+        end = time.monotonic() + delay
+        while not self.stop_event.is_set():
+            left = end - time.monotonic()
+            if left <= 0: return
+            await asyncio.sleep(min(left, STOP_POLL_S))
+
+    async def fetch_page(self, url: str, cookies: List[Dict[str, Any]], owner: str = "a") -> Tuple[Optional[str], str]:
+        metrics = self.scraper.metrics
+        hit = self.scraper.cached_page(url)
+        if hit is not None:
+            metrics.count("fetch", "cached"); return hit
+
+        proxy = self.scraper.proxies.acquire(owner)
+        delay = self.scraper.limiter.reserve("facebook")
+        metrics.observe("throttle", delay, "facebook")
+        await self._throttle(delay)
+        if self.stop_event.is_set(): return None, STOPPED
+        with metrics.time("fetch") as sp:
+            page = await (await self._context(cookies, proxy)).new_page()
+            try:
+                tracker = NetworkTracker(page)
+                await track_bytes_async(page, tracker)
+                t0 = time.perf_counter()
+                try:
+                    resp = await page.goto(url, timeout=60000)
+                except Exception:
+                    metrics.observe("navigate", time.perf_counter() - t0, "error")
+                    if self.scraper.proxy_report(proxy, False): await self._drop(cookies, proxy)
+                    raise
+                latency = time.perf_counter() - t0
+                metrics.observe("navigate", latency)
+                waited, reason = await wait_ready_async(page, tracker, self.scraper.wait_time)
+                metrics.observe("render_wait", waited, reason)
+                self.scraper.log(f"[渲染] {url} 等待 {waited:.1f}s ({reason}) 下载 {tracker.bytes / 1024:.0f}KB")
+                html, why = self.scraper.store_page(url, await page.content(), page.url, resp.status if resp else 200)
+                sp.outcome = why; sp.bytes = tracker.bytes
+                if self.scraper.proxy_report(proxy, why != "blocked", latency): await self._drop(cookies, proxy)
+                return html, why
+            finally:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+
+    async def run(self, url_q: "queue.Queue[Optional[Dict[str, Any]]]", sink):
+        from playwright.async_api import async_playwright
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=self.concurrency + 1, thread_name_prefix="extract"))
+        # 空闲槽位池：槽位号即代理/会话的归属名 a1..aN，同一时刻只被一个任务占用
+        slots: "asyncio.Queue[int]" = asyncio.Queue()
+        for i in range(self.concurrency): slots.put_nowait(i + 1)
+        pending = set()
+
+        async def one(slot: int, item: Dict[str, Any]):
+            url = item["url"]; tid = f"a{slot}"; session = None
+            try:
+                try:
+                    session = await loop.run_in_executor(None, sink.begin, tid, item)
+                    sink.log(f"[{tid}] 打开: {url}")
+                    html, why = await self.fetch_page(url, session.cookies if session else [], tid)
+                except Exception as e:
+                    await loop.run_in_executor(None, sink.fetch_failed, tid, item, session, e); return
+                if sink.sessions.report(session, why):
+                    await self.save_state(session.cookies, session.state_path)
+                await loop.run_in_executor(None, sink.handle_result, tid, item, html, why)
+            except Exception as e:
+                sink.log(f"[{tid}] 处理异常: {url} -> {e}")
+            finally:
+                slots.put_nowait(slot)
+
+        async with async_playwright() as p:
+            self._browser = await p.chromium.launch(headless=True)
+            try:
+                while not self.stop_event.is_set():
+                    # 搜索阶段仍在边搜边入队：阻塞取放到线程里，取到结束标记 None 才退出
+                    try:
+                        item = await loop.run_in_executor(None, url_q.get, True, 0.5)
+                    except queue.Empty:
+                        continue
+                    if item is None:
+                        url_q.put(None); break
+                    slot = await slots.get()
+                    if self.stop_event.is_set():
+                        slots.put_nowait(slot); break
+                    t = asyncio.create_task(one(slot, item))
+                    pending.add(t); t.add_done_callback(pending.discard)
+                if pending:
+                    await asyncio.gather(*pending, return_exceptions=True)
+            finally:
+                for ctx in self._contexts.values():
+                    try: await ctx.close()
+                    except Exception: pass
+                self._contexts.clear()
+                for i in range(self.concurrency): self.scraper.proxies.release(f"a{i + 1}")
+                await self._browser.close()
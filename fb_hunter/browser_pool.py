@@ -0,0 +1,103 @@
+import os, json, hashlib, threading
+from typing import List, Dict, Any, Optional
+from .config import ProxyConfig
+from .proxy_manager import DIRECT
+from .render import RoutePolicy
+
+def cookie_key(cookies: List[Dict[str, Any]]) -> str:
+    if not cookies: return "anon"
+    raw = json.dumps(sorted((c.get("domain",""), c.get("name",""), c.get("value","")) for c in cookies))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+def context_key(cookies: List[Dict[str, Any]], proxy: Optional[ProxyConfig]) -> str:
+    return f"{cookie_key(cookies)}@{(proxy or DIRECT).server() or 'direct'}"
+
+def context_options(proxy: Optional[ProxyConfig]) -> Dict[str, Any]:
+    server = (proxy or DIRECT).server()
+    return {"proxy": {"server": server}} if server else {}
+
+class _Slot:
+    def __init__(self, pw, browser):
+        self.pw = pw
+        self.browser = browser
+        self.contexts: Dict[str, Any] = {}
+
+# 每个工作线程持有一个常驻 Chromium，按 (cookie 组, 代理) 复用 context；代理设在 context 上，换代理不必重启浏览器。
+# Playwright 同步 API 绑定创建它的线程，浏览器只能由所属线程关闭：工作线程退出前调用 release()。
+class BrowserPool:
+    def __init__(self, headless: bool = True, route_policy: Optional[RoutePolicy] = None):
+        self.route_policy = route_policy
+        self.headless = headless
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._live = 0
+
+    @property
+    def live(self) -> int:
+        return self._live
+
+    def _slot(self) -> _Slot:
+        s: Optional[_Slot] = getattr(self._local, "slot", None)
+        if s is not None and s.browser.is_connected():
+            return s
+        if s is not None:
+            self.release()
+        from playwright.sync_api import sync_playwright
+        pw = sync_playwright().start()
+        try:
+            browser = pw.chromium.launch(headless=self.headless)
+        except Exception:
+            pw.stop(); raise
+        s = _Slot(pw, browser)
+        self._local.slot = s
+        with self._lock: self._live += 1
+        return s
+
+    def context(self, cookies: List[Dict[str, Any]], proxy: Optional[ProxyConfig] = None):
+        s = self._slot()
+        key = context_key(cookies, proxy)
+        ctx = s.contexts.get(key)
+        if ctx is None:
+            ctx = s.browser.new_context(**context_options(proxy))
+            if self.route_policy:
+                self.route_policy.install(ctx)
+            if cookies:
+                ctx.add_cookies(cookies)
+            s.contexts[key] = ctx
+        return ctx
+
+    def drop_context(self, cookies: List[Dict[str, Any]], proxy: Optional[ProxyConfig] = None):
+        s: Optional[_Slot] = getattr(self._local, "slot", None)
+        if s is None: return
+        ctx = s.contexts.pop(context_key(cookies, proxy), None)
+        if ctx is not None:
+            try: ctx.close()
+            except Exception: pass
+
+    # 把当前线程中该 cookie 组任一 context 的登录态写到 path（Playwright storage_state 格式）
+    def save_state(self, cookies: List[Dict[str, Any]], path: str) -> bool:
+        s: Optional[_Slot] = getattr(self._local, "slot", None)
+        if s is None: return False
+        prefix = cookie_key(cookies) + "@"
+        for key, ctx in s.contexts.items():
+            if key.startswith(prefix):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                ctx.storage_state(path=path)
+                return True
+        return False
+
+    def release(self):
+        s: Optional[_Slot] = getattr(self._local, "slot", None)
+        if s is None: return
+        self._local.slot = None
+        for ctx in s.contexts.values():
+            try: ctx.close()
+            except Exception: pass
+        try: s.browser.close()
+        except Exception: pass
+        try: s.pw.stop()
+        except Exception: pass
+        with self._lock: self._live -= 1
+
+    def close(self):
+        self.release()
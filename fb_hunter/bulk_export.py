@@ -0,0 +1,148 @@
+import os, sqlite3, datetime, tempfile
+from contextlib import contextmanager
+from typing import List, Optional, Tuple, Callable, Iterable, Iterator
+from .core.paths import CACHE_DIR, DATA_DIR, safe_name
+from .keyword_cache import connect
+from .export_sink import FORMATS, ExportTarget
+from .config import DEFAULT_COLUMNS
+
+# 汇总导出：把 cache/<关键词_地区>/cache.db 分批 ATTACH 到一个 SQLite 连接上，按关键词/地区/入库日期过滤后
+# 流式写出（按 URL 去重，同一 URL 出现在多个库里时取最新入库的一条），不把历史数据整体读进内存。
+# 先扫一遍各库，把每个 URL 最新一条所在的库记到磁盘上的状态库里，第二遍按这张表逐批写出；
+# 状态库默认是临时文件，增量模式改用 cache/_exports/<名称>.db 持久保存已导出 URL 与入库时间水位线，下次只导出新增的记录。
+EXPORTS_DIR = os.path.join(CACHE_DIR, "_exports")
+WATERMARK_SLACK_S = 60  # 水位线往前留的余量：读库时还没提交的写入（created_at 已定）下次仍能导出，已导出的靠 seen 表跳过
+RECORD_COLUMNS = ["url", "title", "description", "email", "phone", "website", "address", "business_summary", "keyword", "region", "created_at"]
+
+class BulkExporter:
+    def __init__(self, keywords: Optional[Iterable[str]] = None, regions: Optional[Iterable[str]] = None,
+                 since: Optional[str] = None, until: Optional[str] = None, columns: Optional[List[str]] = None,
+                 formats: Iterable[str] = ("csv",), name: Optional[str] = None, data_dir: str = DATA_DIR, cache_dir: str = CACHE_DIR,
+                 incremental: bool = False, chunk_rows: int = 5000, log: Optional[Callable[[str], None]] = None):
+        self.keywords = [k.strip() for k in keywords or [] if k.strip()]
+        self.regions = [r.strip() for r in regions] if regions else []
+        self.since = since  # YYYY-MM-DD[ HH:MM:SS]，与 created_at 一样是 UTC
+        self.until = until  # 含当天
+        self.columns = [c for c in (columns or DEFAULT_COLUMNS) if c in RECORD_COLUMNS]
+        if "url" not in self.columns: self.columns.insert(0, "url")
+        self.formats = [f for f in dict.fromkeys(formats) if f in FORMATS] or ["csv"]
+        self.name = safe_name(name) if name else "all"
+        self.data_dir = data_dir
+        self.cache_dir = cache_dir
+        self.incremental = incremental
+        self.chunk_rows = max(1, chunk_rows)
+        self.log = log or (lambda s: None)
+
+    # 关键词目录名为 safe_name("关键词_地区") 或 safe_name("关键词")；指定关键词时按目录名前缀先筛一遍，精确过滤交给 SQL
+    def databases(self) -> List[str]:
+        prefixes = [safe_name(k) for k in self.keywords]
+        out = []
+        for d in sorted(os.listdir(self.cache_dir)) if os.path.isdir(self.cache_dir) else []:
+            if d.startswith("_"): continue
+            if prefixes and not any(d == p or d.startswith(p + "_") for p in prefixes): continue
+            path = os.path.join(self.cache_dir, d, "cache.db")
+            if os.path.isfile(path): out.append(path)
+        return out
+
+    def _where(self, since: Optional[str]) -> Tuple[str, List[str]]:
+        cond, params = [], []
+        if self.keywords:
+            cond.append(f"keyword IN ({','.join('?' * len(self.keywords))})"); params += self.keywords
+        if self.regions:
+            cond.append(f"COALESCE(region, '') IN ({','.join('?' * len(self.regions))})"); params += self.regions
+        if since:
+            cond.append("created_at >= ?"); params.append(since)
+        if self.until:
+            cond.append("created_at < date(?, '+1 day')"); params.append(self.until)
+        return (" WHERE " + " AND ".join(cond)) if cond else "", params
+
+    def _state(self) -> Tuple[sqlite3.Connection, Optional[str]]:
+        if self.incremental:
+            os.makedirs(EXPORTS_DIR, exist_ok=True)
+            path, tmp = os.path.join(EXPORTS_DIR, f"{self.name}.db"), None
+        else:
+            fd, path = tempfile.mkstemp(suffix=".db", prefix="export-", dir=tempfile.gettempdir()); os.close(fd); tmp = path
+        conn = connect(path)
+        conn.executescript("CREATE TABLE IF NOT EXISTS seen (url TEXT PRIMARY KEY);"
+                           "CREATE TABLE IF NOT EXISTS meta (k TEXT PRIMARY KEY, v TEXT);"
+                           "DROP TABLE IF EXISTS best;"
+                           "CREATE TABLE best (url TEXT PRIMARY KEY, created_at TEXT, db INTEGER NOT NULL);")
+        conn.commit()
+        return conn, tmp
+
+    # 把一批关键词库 ATTACH 为 b0, b1…，返回其中有 pages 表的 [(库序号, 别名)]；调用方在退出前提交
+    @contextmanager
+    def _attached(self, conn: sqlite3.Connection, dbs: List[str], start: int) -> Iterator[List[Tuple[int, str]]]:
+        names = []
+        try:
+            for j, path in enumerate(dbs):
+                conn.execute(f"ATTACH DATABASE ? AS b{j}", (path,))
+                if conn.execute(f"SELECT 1 FROM b{j}.sqlite_master WHERE type='table' AND name='pages'").fetchone():
+                    names.append((start + j, f"b{j}"))
+            yield names
+        except BaseException:
+            conn.rollback()  # 事务未结束时无法 DETACH
+            raise
+        finally:
+            for j in range(len(dbs)): conn.execute(f"DETACH DATABASE b{j}")
+
+    # 返回 (导出文件路径, 导出条数)
+    def run(self) -> Tuple[List[str], int]:
+        dbs = self.databases()
+        conn, tmp = self._state()
+        # 增量导出同一天可能跑多次，文件名带上时间，避免覆盖上一份
+        stamp = datetime.datetime.now().strftime("%Y-%m-%d_%H%M%S" if self.incremental else "%Y-%m-%d")
+        target = ExportTarget(os.path.join(self.data_dir, f"{self.name}_{stamp}"), self.columns, self.formats)
+        count = 0
+        try:
+            # 水位线在读任何库之前取定；下次从这里往后导出
+            mark = conn.execute("SELECT datetime('now', ?)", (f"-{WATERMARK_SLACK_S} seconds",)).fetchone()[0]
+            since = self.since
+            if self.incremental:
+                row = conn.execute("SELECT v FROM meta WHERE k='watermark'").fetchone()
+                if row is not None:
+                    since = max(since or "", row[0])
+                    self.log(f"[汇总导出] 增量：只导出 {row[0]} (UTC) 之后入库且未导出过的记录")
+            where, params = self._where(since)
+            limit = conn.getlimit(sqlite3.SQLITE_LIMIT_ATTACHED) if hasattr(conn, "getlimit") else 10
+            self.log(f"[汇总导出] 共 {len(dbs)} 个关键词库，每批 ATTACH {limit} 个")
+            # 第一遍：每个未导出过的 URL 记下最新入库的一条在哪个库（同一时间先到先得）
+            for i in range(0, len(dbs), limit):
+                with self._attached(conn, dbs[i:i+limit], i) as names:
+                    for k, n in names:
+                        conn.execute(f"INSERT INTO main.best (url, created_at, db) SELECT url, COALESCE(created_at, ''), ? FROM {n}.pages{where} "
+                                     f"{'AND' if where else 'WHERE'} url NOT IN (SELECT url FROM main.seen) "
+                                     "ON CONFLICT(url) DO UPDATE SET created_at=excluded.created_at, db=excluded.db "
+                                     "WHERE excluded.created_at > best.created_at", (k, *params))
+                    conn.commit()
+            # 第二遍：逐批只写出选中的那一条
+            cols = ", ".join(f"p.{c}" for c in RECORD_COLUMNS)
+            for i in range(0, len(dbs), limit):
+                with self._attached(conn, dbs[i:i+limit], i) as names:
+                    if not names: continue
+                    sql = " UNION ALL ".join(f"SELECT {cols} FROM {n}.pages p JOIN main.best b ON b.url=p.url AND b.db={k}" for k, n in names)
+                    # 每块写出后即记入 seen（另开游标，读游标保持打开），内存只有一块，中途崩溃重跑也不会重复导出
+                    cur = conn.execute(sql); mark_cur = conn.cursor()
+                    try:
+                        while True:
+                            rows = cur.fetchmany(self.chunk_rows)
+                            if not rows: break
+                            for r in rows: target.write(dict(zip(RECORD_COLUMNS, r)))
+                            target.flush(); count += len(rows)
+                            mark_cur.executemany("INSERT OR IGNORE INTO main.seen (url) VALUES (?)", ((r[0],) for r in rows)); conn.commit()
+                    finally:
+                        cur.close(); mark_cur.close()  # 读游标不关无法 DETACH
+                self.log(f"[汇总导出] {min(i + limit, len(dbs))}/{len(dbs)} 个库，已导出 {count} 条")
+            conn.execute("DROP TABLE main.best")
+            if self.incremental:
+                conn.execute("INSERT OR REPLACE INTO meta (k, v) VALUES ('watermark', ?)", (mark,))
+            conn.commit()
+        finally:
+            target.close()
+            conn.close()
+            if tmp is not None:
+                for suffix in ("", "-wal", "-shm"):
+                    try: os.remove(tmp + suffix)
+                    except OSError: pass
+        for p in target.paths: self.log(f"[汇总导出] 已保存：{p}")
+        return target.paths, count
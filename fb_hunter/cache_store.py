@@ -1,20 +1,192 @@
-import os, hashlib
-from typing import Optional
+import os, json, time, struct, hashlib, zlib, threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, List, Tuple, Dict
 from .core.paths import CACHE_DIR
 
+MAGIC = b"FBC1"
+MAGIC2 = b"FBC2"
+
+# 新鲜度策略（秒，None 表示永不过期）：正常条目用 ttl；负缓存（空结果/受限/过短）用 negative_ttl，可按原因单独覆盖
+@dataclass
+class CachePolicy:
+    ttl: Optional[float] = None
+    negative_ttl: Optional[float] = 24 * 3600
+    reason_ttl: Dict[str, float] = field(default_factory=dict)
+
+    def fresh(self, entry: "CacheEntry", now: Optional[float] = None) -> bool:
+        limit = self.reason_ttl.get(entry.reason, self.negative_ttl) if entry.negative else self.ttl
+        return limit is None or (now or time.time()) - entry.stored_at < limit
+
+@dataclass
+class CacheEntry:
+    data: bytes
+    stored_at: float
+    negative: bool = False
+    reason: str = "ok"
+
+# 磁盘布局：<root>/ab/cd/abcd….cache（两级分片），内容 zlib 压缩；旧版平铺的未压缩文件读取时自动迁移。
+# FBC2 文件头记录写入时间、是否负缓存及原因；旧格式以 mtime 作为写入时间，首次读取时改写为 FBC2。
+# 超过 max_bytes 时按最近访问时间（mtime，读取时刷新）淘汰到 90%；热点 key 另有一层内存 LRU。
 class FileCache:
-    def __init__(self, subdir: str):
-        self.root = os.path.join(CACHE_DIR, f"_runtime_{subdir}")
+    def __init__(self, subdir: str, max_bytes: int = 1 << 30, memory_items: int = 64, memory_bytes: int = 32 << 20,
+                 level: int = 6, root: Optional[str] = None, policy: Optional[CachePolicy] = None):
+        self.root = root or os.path.join(CACHE_DIR, f"_runtime_{subdir}")
         os.makedirs(self.root, exist_ok=True)
+        self.policy = policy or CachePolicy()
+        self.max_bytes = max_bytes
+        self.level = level
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self._mem: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._mem_size = 0
+        self._lock = threading.Lock()
+        self._disk_size: Optional[int] = None
+        self._evicting = False
+        threading.Thread(target=self._init_size, daemon=True).start()
+
+    def _hash(self, key: str) -> str:
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
     def _path(self, key: str) -> str:
-        h = hashlib.sha1(key.encode("utf-8")).hexdigest()
-        return os.path.join(self.root, h + ".cache")
+        h = self._hash(key)
+        return os.path.join(self.root, h[:2], h[2:4], h + ".cache")
+
+    def _legacy_path(self, key: str) -> str:
+        return os.path.join(self.root, self._hash(key) + ".cache")
+
     def get(self, key: str) -> Optional[bytes]:
+        e = self.get_entry(key)
+        return e.data if e is not None and not e.negative else None
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        e = self._load(key)
+        if e is None or not self.policy.fresh(e): return None
+        return e
+
+    def set(self, key: str, data: bytes, negative: bool = False, reason: str = "ok"):
+        self._write(key, CacheEntry(data, time.time(), negative, reason))
+
+    def _load(self, key: str) -> Optional[CacheEntry]:
+        with self._lock:
+            e = self._mem.get(key)
+            if e is not None:
+                self._mem.move_to_end(key)
+                return e
         p = self._path(key)
-        if os.path.exists(p):
+        try:
             with open(p, "rb") as f:
-                return f.read()
-        return None
-    def set(self, key: str, data: bytes):
-        with open(self._path(key), "wb") as f:
-            f.write(data)
+                raw = f.read()
+            mtime = os.path.getmtime(p)
+            try: os.utime(p)
+            except OSError: pass
+        except FileNotFoundError:
+            return self._migrate(key)
+        e = self._decode(raw, mtime)
+        if e is None: return None
+        if not raw.startswith(MAGIC2):
+            self._write(key, e)
+        else:
+            self._remember(key, e)
+        return e
+
+    def _write(self, key: str, e: CacheEntry):
+        p = self._path(key)
+        os.makedirs(os.path.dirname(p), exist_ok=True)
+        head = json.dumps({"t": e.stored_at, "neg": e.negative, "why": e.reason}).encode("utf-8")
+        blob = MAGIC2 + struct.pack(">I", len(head)) + head + zlib.compress(e.data, self.level)
+        try: old = os.path.getsize(p)
+        except OSError: old = 0
+        tmp = f"{p}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(blob)
+        os.replace(tmp, p)
+        self._remember(key, e)
+        with self._lock:
+            if self._disk_size is None: return
+            self._disk_size += len(blob) - old
+            over = self._disk_size > self.max_bytes and not self._evicting
+            if over: self._evicting = True
+        if over:
+            threading.Thread(target=self._evict, daemon=True).start()
+
+    def _decode(self, raw: bytes, mtime: float) -> Optional[CacheEntry]:
+        try:
+            if raw.startswith(MAGIC2):
+                n = struct.unpack(">I", raw[4:8])[0]
+                head = json.loads(raw[8:8+n].decode("utf-8"))
+                return CacheEntry(zlib.decompress(raw[8+n:]), float(head.get("t") or mtime),
+                                  bool(head.get("neg")), head.get("why") or "ok")
+            if raw.startswith(MAGIC):
+                return CacheEntry(zlib.decompress(raw[len(MAGIC):]), mtime)
+        except (zlib.error, struct.error, ValueError):
+            return None
+        return CacheEntry(raw, mtime)
+
+    def _migrate(self, key: str) -> Optional[CacheEntry]:
+        lp = self._legacy_path(key)
+        try:
+            with open(lp, "rb") as f:
+                e = CacheEntry(f.read(), os.path.getmtime(lp))
+        except FileNotFoundError:
+            return None
+        try:
+            self._write(key, e); os.remove(lp)
+        except OSError:
+            pass
+        return e
+
+    def _remember(self, key: str, e: CacheEntry):
+        if len(e.data) > self.memory_bytes // 4: return
+        with self._lock:
+            old = self._mem.pop(key, None)
+            if old is not None: self._mem_size -= len(old.data)
+            self._mem[key] = e; self._mem_size += len(e.data)
+            while self._mem and (len(self._mem) > self.memory_items or self._mem_size > self.memory_bytes):
+                _, v = self._mem.popitem(last=False); self._mem_size -= len(v.data)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        out = []
+        stack = [self.root]
+        while stack:
+            d = stack.pop()
+            try:
+                it = os.scandir(d)
+            except OSError:
+                continue
+            with it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif e.name.endswith(".cache"):
+                        try:
+                            st = e.stat()
+                            out.append((st.st_mtime, st.st_size, e.path))
+                        except OSError:
+                            pass
+        return out
+
+    def _init_size(self):
+        total = sum(size for _, size, _ in self._entries())
+        with self._lock:
+            self._disk_size = total
+            over = total > self.max_bytes and not self._evicting
+            if over: self._evicting = True
+        if over: self._evict()
+
+    def _evict(self):
+        try:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            target = int(self.max_bytes * 0.9)
+            for _, size, path in entries:
+                if total <= target: break
+                try:
+                    os.remove(path); total -= size
+                except OSError:
+                    pass
+            with self._lock:
+                self._disk_size = total
+        finally:
+            with self._lock:
+                self._evicting = False
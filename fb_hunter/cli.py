@@ -0,0 +1,201 @@
+import sys, time, signal, logging, argparse
+from typing import List, Optional, Callable
+from .config import DEFAULT_COLUMNS, ENGINES, ProxyConfig, ensure_app_dirs
+from .proxy_manager import ProxyManager, ProxyPool
+
+# 命令行入口（无 Qt / pandas）：python -m fb_hunter run -k keywords.txt --region US --format jsonl
+# 可由 cron 并行启动多份：各进程共享 cache/ 下的 SQLite（WAL）与文件缓存，导出文件用 --name 区分；
+# 同一批关键词要分到多个进程/机器上抓取时用 run --processes N（协调进程）与 worker --job <id>
+log = logging.getLogger("FBHunter.cli")
+
+def _read_lines(path: str) -> List[str]:
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8-sig")
+    try:
+        return [s.strip() for s in f if s.strip() and not s.strip().startswith("#")]
+    finally:
+        if f is not sys.stdin: f.close()
+
+def _proxy(args):
+    lines = list(args.proxy or []) + (_read_lines(args.proxy_file) if args.proxy_file else [])
+    proxies = ProxyManager.parse_list(lines)
+    if len(proxies) > 1: return ProxyPool(proxies)
+    return proxies[0] if proxies else ProxyConfig("none", "", 0)
+
+def _progress(args):
+    last = [0.0]
+    def progress(done: int, total: int):
+        now = time.monotonic()
+        if now - last[0] >= args.progress_every or done == total:
+            last[0] = now; log.info(f"[进度] {done}/{total}")
+    return progress
+
+def _on_signal(stop: Callable[[], None]):
+    def handler(signum, frame):
+        log.warning("[命令] 收到停止信号，正在收尾导出…"); stop()
+    signal.signal(signal.SIGINT, handler)
+    if hasattr(signal, "SIGTERM"): signal.signal(signal.SIGTERM, handler)
+
+# 协调进程把抓取相关的参数原样转给 worker 子进程
+def _worker_args(args) -> List[str]:
+    out = ["--threads", str(args.threads), "--engine", args.engine, "--wait", str(args.wait),
+           "--parse-workers", str(args.parse_workers), "--enrich-workers", str(args.enrich_workers),
+           "--search-workers", str(args.search_workers), "--progress-every", str(args.progress_every)]
+    for p in args.proxy or []: out += ["--proxy", p]
+    if args.proxy_file: out += ["--proxy-file", args.proxy_file]
+    for c in args.cookies or []: out += ["--cookies", c]
+    if args.no_block: out.append("--no-block")
+    return out
+
+def cmd_run(args) -> int:
+    keywords = list(args.keyword or []) + (_read_lines(args.keywords_file) if args.keywords_file else [])
+    keywords = list(dict.fromkeys(keywords))
+    if not keywords:
+        log.error("没有关键词：使用 -k 文件 或 -K 关键词"); return 2
+    if args.engine not in ENGINES:
+        log.error(f"未知引擎 {args.engine}"); return 2
+    cols = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else DEFAULT_COLUMNS
+
+    if args.processes > 1:
+        from .shard import ShardCoordinator
+        coord = ShardCoordinator(keywords, args.region, args.max_results, args.processes, _worker_args(args), columns=cols,
+                                 export_formats=tuple(args.format or ["csv"]), export_name=args.name, data_dir=args.out_dir,
+                                 metrics_path=args.metrics, log=log.info, progress=_progress(args))
+        _on_signal(coord.stop)
+        paths, count = coord.run()
+        log.info(f"=== 任务结束：共导出 {count} 条 ===")
+        for p in paths: print(p)
+        if coord.failed: return 1
+        return 130 if coord.stopped else 0
+
+    from .pipeline import Pipeline
+    from .render import RoutePolicy
+    pipe = Pipeline(keywords, args.region, args.max_results, args.threads, _proxy(args), args.wait, args.cookies or [],
+                    engine=args.engine, route_policy=RoutePolicy.from_settings({"block_resources": not args.no_block}),
+                    parse_workers=args.parse_workers, enrich_workers=args.enrich_workers, search_workers=args.search_workers,
+                    columns=cols, export_formats=tuple(args.format or ["csv"]), export_name=args.name, data_dir=args.out_dir,
+                    metrics_path=args.metrics, log=log.info, progress=_progress(args))
+    _on_signal(pipe.stop)
+
+    paths, count = pipe.run()
+    log.info(f"=== 任务结束：共导出 {count} 条 ===")
+    for p in paths: print(p)
+    if pipe.error is not None: return 1
+    return 130 if pipe.stopped else 0
+
+# 加入一个分片任务：关键词/地区/结果数取自任务库，链接从共享队列领取，任务抓完即退出；不导出
+def cmd_worker(args) -> int:
+    from .job_store import JobStore
+    from .pipeline import Pipeline
+    from .render import RoutePolicy
+    if args.engine not in ENGINES:
+        log.error(f"未知引擎 {args.engine}"); return 2
+    jobs = JobStore()
+    try:
+        job = jobs.job(args.job)
+    finally:
+        jobs.close()
+    if job is None:
+        log.error(f"任务 {args.job} 不存在（FBHUNTER_ROOT 是否指向协调进程的目录？）"); return 2
+    prefix = f"[{args.label}] " if args.label else ""
+    pipe = Pipeline(job["keywords"], job["region"], job["max_results"], args.threads, _proxy(args), args.wait, args.cookies or [],
+                    engine=args.engine, route_policy=RoutePolicy.from_settings({"block_resources": not args.no_block}),
+                    parse_workers=args.parse_workers, enrich_workers=args.enrich_workers, search_workers=args.search_workers,
+                    metrics_path=args.metrics, job_id=args.job, log=lambda s: log.info(prefix + s), progress=_progress(args))
+    _on_signal(pipe.stop)
+    pipe.run()
+    if pipe.error is not None: return 1
+    return 130 if pipe.stopped else 0
+
+# 解析器升级后手动批量重新解析（run 启动时也会自动进行）
+def cmd_reextract(args) -> int:
+    from .reextract import reextract_stale
+    from .page_index import close_index
+    from .keyword_cache import close_stores
+    try:
+        done, missing = reextract_stale(args.workers, log=log.info)
+    finally:
+        close_stores(); close_index()
+    log.info(f"=== 重新解析 {done} 条，缺少 HTML {missing} 条 ===")
+    return 0
+
+# 汇总导出 cache/ 下全部（或按关键词/地区/日期筛选的）历史记录，按 URL 去重，流式写出
+def cmd_export(args) -> int:
+    import datetime
+    from .bulk_export import BulkExporter
+    for d in (args.since, args.until):
+        try:
+            if d: datetime.date.fromisoformat(d[:10])
+        except ValueError:
+            log.error(f"日期格式应为 YYYY-MM-DD：{d}"); return 2
+    keywords = list(args.keyword or []) + (_read_lines(args.keywords_file) if args.keywords_file else [])
+    cols = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    exp = BulkExporter(keywords, args.region, args.since, args.until, columns=cols, formats=tuple(args.format or ["csv"]),
+                       name=args.name, incremental=args.incremental, chunk_rows=args.chunk_rows, log=log.info,
+                       **({"data_dir": args.out_dir} if args.out_dir else {}))
+    paths, count = exp.run()
+    log.info(f"=== 汇总导出 {count} 条 ===")
+    for p in paths: print(p)
+    return 0
+
+def _add_fetch_args(p: argparse.ArgumentParser):
+    p.add_argument("--threads", type=int, default=4, help="抓取线程数 / async 并发页数")
+    p.add_argument("--engine", default="threads")
+    p.add_argument("--wait", type=int, default=8, help="渲染等待上限(秒)")
+    p.add_argument("--proxy", action="append", help="代理，如 socks5://127.0.0.1:1080，可重复（多个即代理池）")
+    p.add_argument("--proxy-file", help="代理列表文件，每行一个")
+    p.add_argument("--cookies", action="append", help="cookies.json 路径，可重复")
+    p.add_argument("--parse-workers", type=int, default=0)
+    p.add_argument("--enrich-workers", type=int, default=4)
+    p.add_argument("--search-workers", type=int, default=3)
+    p.add_argument("--no-block", action="store_true", help="不拦截图片/视频/字体/统计脚本")
+    p.add_argument("--metrics", help="指标文件路径前缀，写出 .json 与 .prom（默认 <应用目录>/metrics/run-时间）")
+    p.add_argument("--progress-every", type=float, default=5.0, help="进度日志间隔(秒)")
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m fb_hunter", description="FB Hunter 命令行批量抓取")
+    sub = ap.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="搜索并抓取关键词，结果流式写入 CSV/JSONL")
+    run.add_argument("-k", "--keywords-file", help="关键词文件，每行一个（- 表示标准输入）")
+    run.add_argument("-K", "--keyword", action="append", help="单个关键词，可重复")
+    run.add_argument("--region", default="")
+    run.add_argument("--max-results", type=int, default=20)
+    _add_fetch_args(run)
+    run.add_argument("--processes", type=int, default=1, help="分片抓取的本机进程数，每个进程各自启动浏览器（>1 时本进程只做协调与导出）")
+    run.add_argument("--columns", help=f"导出列，逗号分隔（默认 {','.join(DEFAULT_COLUMNS)}）")
+    run.add_argument("--format", action="append", choices=["csv", "jsonl", "parquet"], help="导出格式，可重复（默认 csv）")
+    run.add_argument("--out-dir", help="主导出目录（默认 data/）")
+    run.add_argument("--name", help="主导出文件名前缀；并行运行时用来区分")
+    run.set_defaults(func=cmd_run)
+
+    worker = sub.add_parser("worker", help="加入分片任务（可在共享同一目录的其他机器上运行），抓完即退出")
+    worker.add_argument("--job", required=True, help="任务 ID，见协调进程日志")
+    worker.add_argument("--label", help="日志前缀，区分同一终端里的多个进程")
+    _add_fetch_args(worker)
+    worker.set_defaults(func=cmd_worker)
+
+    rex = sub.add_parser("reextract", help="用缓存的 HTML 重新解析旧版解析器生成的记录（不重新渲染）")
+    rex.add_argument("--workers", type=int, default=0, help="解析进程数（默认 CPU 核数 - 1）")
+    rex.set_defaults(func=cmd_reextract)
+
+    exp = sub.add_parser("export", help="汇总导出 cache/ 下各关键词库的历史记录（按 URL 去重，流式写出）")
+    exp.add_argument("-k", "--keywords-file", help="只导出这些关键词，每行一个")
+    exp.add_argument("-K", "--keyword", action="append", help="只导出该关键词，可重复")
+    exp.add_argument("--region", action="append", help="只导出该地区，可重复（\"\" 表示未指定地区）")
+    exp.add_argument("--since", help="入库日期下限 YYYY-MM-DD（UTC，含）")
+    exp.add_argument("--until", help="入库日期上限 YYYY-MM-DD（UTC，含）")
+    exp.add_argument("--incremental", action="store_true", help="只导出上次以同一 --name 导出之后新增的记录")
+    exp.add_argument("--columns", help=f"导出列，逗号分隔（默认 {','.join(DEFAULT_COLUMNS)}，另可选 created_at）")
+    exp.add_argument("--format", action="append", choices=["csv", "jsonl", "parquet"], help="导出格式，可重复（默认 csv）")
+    exp.add_argument("--out-dir", help="导出目录（默认 data/）")
+    exp.add_argument("--name", help="文件名前缀，也是增量状态的名称（默认 all）")
+    exp.add_argument("--chunk-rows", type=int, default=5000, help="每批写出的行数")
+    exp.set_defaults(func=cmd_export)
+    return ap
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr, format="[%(asctime)s][%(levelname)s] %(message)s", datefmt="%H:%M:%S")
+    log.setLevel(logging.INFO)
+    ensure_app_dirs()
+    return args.func(args)
@@ -1,12 +1,32 @@
-import os, json
+import os, sys, json
+from typing import Optional, Tuple
 from dataclasses import dataclass
-from PySide6.QtCore import QStandardPaths
 
-APP_DIR = os.path.join(QStandardPaths.writableLocation(QStandardPaths.AppDataLocation), "FBHunter")
+# 与原先 QStandardPaths.AppDataLocation 的位置一致，但不依赖 Qt；可用环境变量 FBHUNTER_APP_DIR 指定
+def _app_dir() -> str:
+    if os.environ.get("FBHUNTER_APP_DIR"): return os.path.abspath(os.environ["FBHUNTER_APP_DIR"])
+    home = os.path.expanduser("~")
+    if sys.platform == "win32":
+        base = os.environ.get("APPDATA") or os.path.join(home, "AppData", "Roaming")
+    elif sys.platform == "darwin":
+        base = os.path.join(home, "Library", "Application Support")
+    else:
+        base = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    return os.path.join(base, "FBHunter")
+
+APP_DIR = _app_dir()
 COOKIES_DIR = os.path.join(APP_DIR, "cookies")
 LOGS_DIR = os.path.join(APP_DIR, "logs")
 CFG_PATH = os.path.join(APP_DIR, "settings.json")
 
+# 运行时缓存容量上限（MB），可在 settings.json 的 cache_limits_mb 中覆盖
+CACHE_LIMITS_MB = {"html": 2048, "ddgs": 64}
+# 缓存新鲜度（小时）：[正常条目, 负缓存]，null 表示永不过期；可在 settings.json 的 cache_ttl_hours 中覆盖
+CACHE_TTL_HOURS = {"html": [24 * 30, 24], "ddgs": [24 * 7, 6]}
+# 请求速率（次/秒）：[初始, 下限, 上限]，运行中按限流反馈自动调整；可在 settings.json 的 rate_limits 中覆盖
+RATE_LIMITS = {"ddg": [0.5, 0.05, 1.0], "facebook": [1.0, 0.1, 4.0], "web": [2.0, 0.2, 8.0]}
+
+ENGINES = ("threads", "async")
 DEFAULT_COLUMNS = ["url","title","description","email","phone","website","address","business_summary","keyword","region"]
 
 @dataclass
@@ -20,6 +40,17 @@ class ProxyConfig:
         scheme = "http" if self.mode == "http" else "socks5"
         return f"{scheme}://{self.host}:{self.port}"
 
+    # 解析 "socks5://1.2.3.4:1080" / "http://host:port" / "host:port"（默认 http）；无法解析返回 None
+    @staticmethod
+    def parse(text: str) -> Optional["ProxyConfig"]:
+        t = (text or "").strip()
+        if not t or t.startswith("#"): return None
+        scheme, _, rest = t.rpartition("://")
+        mode = "socks5" if scheme.lower().startswith("socks") else "http"
+        host, _, port = rest.strip("/").rpartition(":")
+        if not host or not port.isdigit(): return None
+        return ProxyConfig(mode, host, int(port))
+
 def ensure_app_dirs():
     for d in (APP_DIR, COOKIES_DIR, LOGS_DIR):
         os.makedirs(d, exist_ok=True)
@@ -36,3 +67,24 @@ def load_settings():
 def save_settings(data: dict):
     with open(CFG_PATH, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
+
+def cache_limit_bytes(namespace: str) -> int:
+    over = load_settings().get("cache_limits_mb") or {}
+    return int(over.get(namespace, CACHE_LIMITS_MB.get(namespace, 1024))) << 20
+
+def cache_ttl_seconds(namespace: str) -> Tuple[Optional[float], Optional[float]]:
+    over = load_settings().get("cache_ttl_hours") or {}
+    ttl, neg = over.get(namespace) or CACHE_TTL_HOURS.get(namespace) or [None, 24]
+    return (ttl * 3600 if ttl is not None else None, neg * 3600 if neg is not None else None)
+
+# 是否保留渲染后的原始 HTML（_runtime_html）；关闭后只留解析结果，磁盘占用大幅下降，
+# 但解析器升级后旧记录无法离线重新解析，只能重新抓取。settings.json 的 keep_html 可覆盖
+def keep_html() -> bool:
+    return bool(load_settings().get("keep_html", True))
+
+def rate_limit(namespace: str) -> Tuple[float, float, float]:
+    over = load_settings().get("rate_limits") or {}
+    start, low, high = over.get(namespace) or RATE_LIMITS.get(namespace) or RATE_LIMITS["web"]
+    # 分片抓取时本机 N 个进程共用一个出口，协调进程设 FBHUNTER_RATE_SHARE=N，每个进程只用 1/N 的速率
+    share = max(1.0, float(os.environ.get("FBHUNTER_RATE_SHARE") or 1))
+    return float(start) / share, float(low) / share, float(high) / share
@@ -1,11 +1,9 @@
 import os
 
-APP_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+# 采集缓存 cache/ 与导出 data/ 默认在项目根目录；环境变量 FBHUNTER_ROOT 可指向别处（离线基准、并行实例隔离）
+APP_ROOT = os.path.abspath(os.environ.get("FBHUNTER_ROOT") or os.path.join(os.path.dirname(__file__), "..", ".."))
 DATA_DIR = os.path.join(APP_ROOT, "data")
 CACHE_DIR = os.path.join(APP_ROOT, "cache")
 
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(CACHE_DIR, exist_ok=True)
-
 def safe_name(s: str) -> str:
     return "".join(ch if ch.isalnum() or ch in "-_." or ch == " " else "_" for ch in (s or "")).strip().replace(" ", "_")
@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Optional
+from .site_cache import SiteCache, domain_key
+from .proxy_manager import ProxyPool
+from .metrics import get_metrics
+
+def make_session(pool_size: int):
+    import requests
+    from requests.adapters import HTTPAdapter
+    s = requests.Session()
+    s.headers.update({"User-Agent": "Mozilla/5.0"})
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    s.mount("http://", adapter); s.mount("https://", adapter)
+    return s
+
+# 独立的网站分析阶段：记录先落库，business_summary 稍后回填；同一域名在一次运行内只分析一次，跨运行走 SiteCache
+class Enricher:
+    def __init__(self, workers: int = 4, sites: Optional[SiteCache] = None, proxies: Optional[ProxyPool] = None,
+                 stop: Optional[threading.Event] = None):
+        self.workers = max(1, workers)
+        self.session = make_session(self.workers)
+        self.sites = sites or SiteCache(stop=stop)
+        self.proxies = proxies
+        self._ex = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="enrich")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Future] = {}
+
+    def submit(self, website: str, callback: Callable[[Optional[str]], None]) -> Future:
+        key = domain_key(website)
+        with self._lock:
+            fut = self._jobs.get(key)
+            if fut is None:
+                fut = self._jobs[key] = self._ex.submit(self._summarize, website)
+        fut.add_done_callback(lambda f: callback(None if f.cancelled() or f.exception() else f.result()))
+        return fut
+
+    def _summarize(self, website: str) -> Optional[str]:
+        proxy = self.proxies.acquire(threading.current_thread().name) if self.proxies else None
+        with get_metrics().time("enrich") as sp:
+            summary = self.sites.summarize(website, self.session, proxy)
+            sp.outcome = "ok" if summary else "empty"
+        return summary
+
+    def close(self, wait: bool = True):
+        self._ex.shutdown(wait=wait, cancel_futures=not wait)
+        self.session.close()
+        self.sites.close()
@@ -0,0 +1,124 @@
+import os, csv, json, time, datetime, threading, importlib.util
+from typing import List, Dict, Any, Optional, Callable, Iterable
+from .core.paths import DATA_DIR, CACHE_DIR, safe_name
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+def export_tag(keyword: str, region: str = "") -> str:
+    return f"{safe_name(keyword)}_{safe_name(region)}" if region else safe_name(keyword)
+
+# 单个导出目标：第一条记录到来时才建文件（与原先一样，同一天重复运行会覆盖当天文件）；
+# csv / jsonl 逐行写入，parquet 按批写 row group
+class ExportTarget:
+    def __init__(self, base: str, columns: List[str], formats: Iterable[str]):
+        self.base = base
+        self.columns = columns
+        self.formats = list(formats)
+        self.paths: List[str] = []
+        self._opened = False
+        self._csv = self._csv_writer = self._jsonl = None
+        self._pq_path = None; self._pq_writer = None; self._pq_rows: List[Dict[str, Any]] = []
+
+    def _open(self):
+        self._opened = True
+        os.makedirs(os.path.dirname(self.base), exist_ok=True)
+        for fmt in self.formats:
+            path = f"{self.base}.{fmt}"
+            if fmt == "csv":
+                self._csv = open(path, "w", newline="", encoding="utf-8-sig")
+                self._csv_writer = csv.writer(self._csv)
+                self._csv_writer.writerow(self.columns)
+            elif fmt == "jsonl":
+                self._jsonl = open(path, "w", encoding="utf-8")
+            elif fmt == "parquet":
+                self._pq_path = path
+                if os.path.exists(path): os.remove(path)
+            self.paths.append(path)
+
+    def write(self, row: Dict[str, Any]):
+        if not self._opened: self._open()
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(["" if row.get(c) is None else row.get(c) for c in self.columns])
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps({c: row.get(c) for c in self.columns}, ensure_ascii=False) + "\n")
+        if self._pq_path is not None:
+            self._pq_rows.append({c: None if row.get(c) is None else str(row.get(c)) for c in self.columns})
+
+    def flush(self):
+        for f in (self._csv, self._jsonl):
+            if f is not None: f.flush()
+        if self._pq_path is not None and self._pq_rows:
+            import pyarrow as pa, pyarrow.parquet as pq
+            table = pa.Table.from_pylist(self._pq_rows, schema=pa.schema([(c, pa.string()) for c in self.columns]))
+            if self._pq_writer is None:
+                self._pq_writer = pq.ParquetWriter(self._pq_path, table.schema)
+            self._pq_writer.write_table(table); self._pq_rows = []
+
+    def close(self):
+        self.flush()
+        for f in (self._csv, self._jsonl):
+            if f is not None: f.close()
+        if self._pq_writer is not None: self._pq_writer.close()
+
+# 流式导出：记录产生即写入 data/ 主文件（按 URL 去重），多关键词时同时写 cache/<关键词>/ 分文件；
+# 每 flush_rows 行或 flush_s 秒落盘一次，进程中途被杀也只丢最后一批
+class ExportSink:
+    def __init__(self, keywords: List[str], region: str, columns: List[str], formats: Iterable[str] = ("csv",),
+                 data_dir: str = DATA_DIR, split_dir: str = CACHE_DIR, flush_rows: int = 200, flush_s: float = 5.0,
+                 logger: Optional[Callable[[str], None]] = None, name: Optional[str] = None):
+        self.keywords = keywords
+        self.region = (region or "").strip()
+        self.columns = ["url"] + [c for c in columns if c != "url"]
+        self.formats = [f for f in dict.fromkeys(formats) if f in FORMATS] or ["csv"]
+        self.split_dir = split_dir
+        self.flush_rows = max(1, flush_rows)
+        self.flush_s = flush_s
+        self.log = logger or (lambda s: None)
+        if "parquet" in self.formats and importlib.util.find_spec("pyarrow") is None:
+            self.log("[导出] 未安装 pyarrow，跳过 Parquet 输出")
+            self.formats = [f for f in self.formats if f != "parquet"] or ["csv"]
+        self.today = datetime.datetime.now().strftime("%Y-%m-%d")
+        tag = export_tag(keywords[0], self.region) if len(keywords) == 1 else (f"multi_{safe_name(self.region)}" if self.region else "multi")
+        if name: tag = safe_name(name)
+        self.split = len(keywords) > 1
+        self._main = ExportTarget(os.path.join(data_dir, f"{tag}_{self.today}"), self.columns, self.formats)
+        self._subs: Dict[str, ExportTarget] = {}
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self.count = 0
+        self.closed = False
+
+    def _sub(self, keyword: str) -> ExportTarget:
+        t = self._subs.get(keyword)
+        if t is None:
+            kw_tag = export_tag(keyword, self.region)
+            t = self._subs[keyword] = ExportTarget(os.path.join(self.split_dir, kw_tag, f"{kw_tag}_{self.today}"), self.columns, self.formats)
+        return t
+
+    def write(self, row: Dict[str, Any]):
+        with self._lock:
+            url = row.get("url")
+            if url not in self._seen:
+                self._seen.add(url); self._main.write(row); self.count += 1
+            if self.split and row.get("keyword"):
+                self._sub(row["keyword"]).write(row)
+            self._unflushed += 1
+            if self._unflushed >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_s:
+                self._flush()
+
+    def _flush(self):
+        self._main.flush()
+        for t in self._subs.values(): t.flush()
+        self._unflushed = 0; self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self._lock: self._flush()
+
+    def close(self) -> List[str]:
+        with self._lock:
+            self.closed = True
+            self._main.close()
+            for t in self._subs.values(): t.close()
+            return self._main.paths + [p for t in self._subs.values() for p in t.paths]
@@ -0,0 +1,38 @@
+import threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Optional
+from .extractors import extract_from_html
+
+# 解析进程池：抓取线程只负责驱动浏览器，HTML 交给子进程解析后取回记录 dict，解析不再与抓取线程争抢 GIL。
+# workers=0 时在调用线程内解析；进程池崩溃后自动退回线程内解析。
+# 进程池在抓取线程里按需创建，此时进程里已有浏览器/写库等线程，fork 出来的子进程可能继承被锁住的锁，统一用 spawn。
+class ExtractPool:
+    def __init__(self, workers: int = 0):
+        self.workers = max(0, workers)
+        self._ex: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.broken = False
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if not self.workers or self.broken: return None
+        with self._lock:
+            if self._ex is None:
+                self._ex = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._ex
+
+    def extract(self, html: str, url: str) -> Dict[str, Any]:
+        ex = self._executor()
+        if ex is None:
+            return extract_from_html(html, url)
+        try:
+            return ex.submit(extract_from_html, html, url).result()
+        except BrokenProcessPool:
+            self.broken = True
+            return extract_from_html(html, url)
+
+    def close(self):
+        with self._lock:
+            ex, self._ex = self._ex, None
+        if ex is not None:
+            ex.shutdown(wait=True, cancel_futures=True)
@@ -1,9 +1,125 @@
-import re, requests
+import re, codecs
+import html as html_lib
 from typing import Dict, Any, Optional
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
+
+RX_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+RX_PHONE = re.compile(r"(\+\d{1,3}[-\s]?)?\(?\d{2,4}\)?[-\s]?\d{3,4}[-\s]?\d{3,4}")
+RX_WEBSITE = re.compile(r"((?:https?://)?(?:www\.)?[A-Za-z0-9-]+\.[A-Za-z]{2,}(?:/[^\s]*)?)")
+RX_ADDRESS = re.compile(r"\d{1,4}\s+\w+(?:\s\w+){1,4},?\s+\w+")
+RX_FB_SUFFIX = re.compile(r"\s*\|\s*Facebook$")
+
+# extract_from_html 的输出一旦变化就加一：全局索引里旧版本的记录会从缓存 HTML 批量重新解析（见 reextract.py）
+EXTRACTOR_VERSION = 1
+
+# 快速路径：不建 DOM 树，只对 <head> 做定向扫描取 meta/title，正文用一次正则剥标签得到与 get_text(" ", strip=True) 一致的文本
+RX_DROP = re.compile(r"<(script|style|template|rt|rp)\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>.*?</\1\s*>|<!--.*?-->|<![^>\[]*>|<\?[^>]*>", re.I | re.S)
+RX_CDATA = re.compile(r"<!\[CDATA\[(.*?)\]\]>", re.S)
+RX_TAG = re.compile(r"</?[A-Za-z][^\s/>]*(?:[^>\"']|\"[^\"]*\"|'[^']*')*>")
+RX_META = re.compile(r"<meta\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>", re.I)
+RX_ATTR = re.compile(r"([^\s=/>\"']+)(?:\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+)))?")
+RX_TITLE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.I | re.S)
+RX_HEADING = re.compile(r"<(h[12])\b(?:[^>\"']|\"[^\"]*\"|'[^']*')*>(.*?)</\1\s*>", re.I | re.S)
+RX_HEAD_END = re.compile(r"</head\s*>", re.I)
+
+def _attrs(tag: str) -> Dict[str, str]:
+    out: Dict[str, str] = {}
+    for m in RX_ATTR.finditer(tag, 5):
+        name = m.group(1).lower()
+        v = m.group(2) if m.group(2) is not None else m.group(3) if m.group(3) is not None else m.group(4)
+        out[name] = html_lib.unescape(v or "")
+    return out
+
+def _meta(parts, prop: str) -> Optional[str]:
+    for part in parts:
+        for m in RX_META.finditer(part):
+            a = _attrs(m.group(0))
+            if a.get("property") == prop: return a.get("content")
+    return None
+
+def _strings(markup: str):
+    for seg in RX_TAG.split(markup):
+        seg = html_lib.unescape(seg).strip()
+        if seg: yield seg
+
+# 以下为与 RX_* 等价的首个匹配查找：先用廉价的锚点（'@'、'.xx'、首字符）定位候选位置，避免正则逐字符试配
+RX_PHONE_FAST = re.compile(r"(?=[+(\d])" + RX_PHONE.pattern)
+RX_DOT = re.compile(r"\.[A-Za-z]{2}")
+LOCAL_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-")
+HOST_CHARS = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-")
+
+def _first_email(text: str):
+    at = text.find("@")
+    while at >= 0:
+        s = at
+        while s > 0 and text[s-1] in LOCAL_CHARS: s -= 1
+        if s < at:
+            m = RX_EMAIL.match(text, s)
+            if m: return m
+        at = text.find("@", at + 1)
+    return None
+
+def _first_website(text: str):
+    lo = 0
+    for d in RX_DOT.finditer(text):
+        dot = d.start()
+        if dot == 0 or text[dot-1] not in HOST_CHARS: continue
+        rs = dot - 1
+        while rs > 0 and text[rs-1] in HOST_CHARS: rs -= 1
+        for p in range(max(lo, rs - 12), dot):
+            m = RX_WEBSITE.match(text, p)
+            if m: return m
+        lo = max(lo, dot)
+    return None
+
+def _inner_text(markup: str) -> str:
+    return "".join(html_lib.unescape(seg) for seg in RX_TAG.split(markup)).strip()
 
 def extract_from_html(html: str, url: str) -> Dict[str, Any]:
+    d = {"url": url, "title": None, "description": None, "email": None,
+         "phone": None, "website": None, "address": None, "business_summary": None}
+
+    clean = RX_CDATA.sub(r"\1", RX_DROP.sub(" ", html))
+    m = RX_HEAD_END.search(clean)
+    parts = (clean[:m.end()], clean[m.end():]) if m else (clean,)
+
+    ogt = _meta(parts, "og:title")
+    if ogt and ogt.strip(): d["title"] = ogt.strip()
+    if not d["title"]:
+        t = RX_TITLE.search(clean)
+        tt = _inner_text(t.group(1)) if t else ""
+        if tt: d["title"] = tt
+    if not d["title"]:
+        h = RX_HEADING.search(clean)
+        ht = _inner_text(h.group(2)) if h else ""
+        if ht: d["title"] = ht
+    if not d["title"]:
+        parsed = urlparse(url)
+        d["title"] = parsed.path.strip("/").split("/")[0].replace("-"," ").replace("_"," ").title()
+    if d["title"]:
+        d["title"] = RX_FB_SUFFIX.sub("", d["title"]).strip()
+
+    ogd = _meta(parts, "og:description")
+    if ogd: d["description"] = ogd
+
+    text = " ".join(_strings(clean))
+    email = _first_email(text)
+    phone = RX_PHONE_FAST.search(text)
+    website = _first_website(text)
+    address = RX_ADDRESS.search(text)
+
+    if email: d["email"] = email.group()
+    if phone: d["phone"] = phone.group()
+    if website:
+        w = website.group(1)
+        if not w.startswith("http"): w = "https://" + w
+        d["website"] = w
+    if address: d["address"] = address.group()
+    return d
+
+# 参考实现（BeautifulSoup 全量解析），用于一致性校验与基准对比
+def extract_from_html_soup(html: str, url: str) -> Dict[str, Any]:
+    from bs4 import BeautifulSoup
     soup = BeautifulSoup(html, "html.parser")
     d = {"url": url, "title": None, "description": None, "email": None,
          "phone": None, "website": None, "address": None, "business_summary": None}
@@ -40,24 +156,72 @@ def extract_from_html(html: str, url: str) -> Dict[str, Any]:
     if address: d["address"] = address.group()
     return d
 
-def analyze_website(website_url: str) -> Optional[str]:
+BLOCK_MARKERS = ("temporarily blocked", "you're temporarily blocked", "you’re temporarily blocked", "rate limit exceeded")
+GONE_MARKERS = ("this content isn't available", "this content isn’t available", "this page isn't available", "this page isn’t available")
+
+# 页面结果分类：ok / too_short / login_wall / blocked / unavailable
+def classify_page(html: str, final_url: str = "", status: int = 200) -> str:
+    if status == 429: return "blocked"
+    if status in (404, 410): return "unavailable"
+    low_url = (final_url or "").lower()
+    if "/login" in low_url or "/checkpoint" in low_url: return "login_wall"
+    if len(html) <= 10000: return "too_short"
+    low = html[:300000].lower()
+    if any(m in low for m in BLOCK_MARKERS): return "blocked"
+    if any(m in low for m in GONE_MARKERS) and 'property="og:title"' not in low: return "unavailable"
+    if 'id="login_form"' in low and 'property="og:title"' not in low: return "login_wall"
+    return "ok"
+
+SITE_RULES = {
+    "christmas": "Christmas/holiday decorations or lighting",
+    "lighting": "Lighting products or installation",
+    "import": "Importer/wholesaler",
+    "wholesale": "Wholesale trader",
+    "retail": "Retail/shop",
+    "manufacturer": "Manufacturer or factory",
+    "decor": "Decorations/design"
+}
+SITE_WORDS = 220
+SITE_MAX_BYTES = 512 * 1024
+RX_OPEN_BLOCK = re.compile(r"<(script|style|template)\b", re.I)
+
+def page_text(markup: str) -> str:
+    return " ".join(_strings(RX_CDATA.sub(r"\1", RX_DROP.sub(" ", markup))))
+
+def _trim_open_block(markup: str) -> str:
+    last = None
+    for last in RX_OPEN_BLOCK.finditer(markup): pass
+    if last and not re.search(rf"</{last.group(1)}\s*>", markup[last.end():], re.I):
+        return markup[:last.start()]
+    return markup
+
+# 流式读取：攒够 SITE_WORDS 个可见词或读满 max_bytes 即断开，不再下载整页
+def read_capped(resp, max_bytes: int = SITE_MAX_BYTES, words: int = SITE_WORDS) -> str:
+    dec = codecs.getincrementaldecoder(resp.encoding or "utf-8")(errors="replace")
+    parts = []; got = 0; checked = 0
+    for chunk in resp.iter_content(16384):
+        got += len(chunk); parts.append(dec.decode(chunk))
+        if got >= max_bytes: break
+        if got - checked >= 65536:
+            checked = got
+            if len(page_text(_trim_open_block("".join(parts))).split()) >= words: break
+    parts.append(dec.decode(b"", final=True))
+    return "".join(parts)
+
+def summarize_markup(markup: str) -> Optional[str]:
+    if len(markup) < 500: return None
+    snippet = " ".join(page_text(_trim_open_block(markup)).split()[:SITE_WORDS]).lower()
+    for k,v in SITE_RULES.items():
+        if k in snippet: return f"Likely engaged in {v}."
+    return "General business website."
+
+def analyze_website(website_url: str, session=None) -> Optional[str]:
     try:
-        resp = requests.get(website_url, headers={"User-Agent":"Mozilla/5.0"}, timeout=12)
-        if resp.status_code != 200 or len(resp.text) < 500: return None
-        soup = BeautifulSoup(resp.text, "html.parser")
-        t = soup.get_text(" ", strip=True); snippet = " ".join(t.split()[:220])
-        rules = {
-            "christmas": "Christmas/holiday decorations or lighting",
-            "lighting": "Lighting products or installation",
-            "import": "Importer/wholesaler",
-            "wholesale": "Wholesale trader",
-            "retail": "Retail/shop",
-            "manufacturer": "Manufacturer or factory",
-            "decor": "Decorations/design"
-        }
-        for k,v in rules.items():
-            if k in snippet.lower(): return f"Likely engaged in {v}."
-        return "General business website."
+        if session is None: import requests as session
+        resp = session.get(website_url, headers={"User-Agent":"Mozilla/5.0"}, timeout=12, stream=True)
+        with resp:
+            if resp.status_code != 200: return None
+            return summarize_markup(read_capped(resp))
     except Exception:
         return None
 
@@ -0,0 +1,228 @@
+import os, json, time, hashlib, threading
+from contextlib import contextmanager
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from .core.paths import CACHE_DIR
+from .keyword_cache import connect
+
+# 持久化任务队列：关键词搜索状态 + URL 抓取状态，程序中断后下次运行从断点继续
+JOBS_DIR = os.path.join(CACHE_DIR, "_jobs")
+MAX_ATTEMPTS = 3
+LEASE_S = 300  # 抓取中的租约；持有者崩溃后过期自动回到 pending
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS jobs (
+        id TEXT PRIMARY KEY,
+        signature TEXT NOT NULL,
+        keywords TEXT NOT NULL,
+        region TEXT NOT NULL DEFAULT '',
+        max_results INTEGER,
+        status TEXT NOT NULL DEFAULT 'running',
+        created_at REAL,
+        updated_at REAL
+    );
+    CREATE INDEX IF NOT EXISTS idx_jobs_sig ON jobs(signature, status);
+    CREATE TABLE IF NOT EXISTS job_keywords (
+        job_id TEXT NOT NULL,
+        keyword TEXT NOT NULL,
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        updated_at REAL,
+        PRIMARY KEY (job_id, keyword)
+    );
+    CREATE TABLE IF NOT EXISTS job_urls (
+        job_id TEXT NOT NULL,
+        url TEXT NOT NULL,
+        keyword TEXT NOT NULL,
+        also TEXT NOT NULL DEFAULT '[]',
+        state TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        owner TEXT,
+        lease_until REAL,
+        reason TEXT,
+        updated_at REAL,
+        PRIMARY KEY (job_id, url)
+    );
+    CREATE INDEX IF NOT EXISTS idx_job_urls_state ON job_urls(job_id, state);
+"""
+
+def job_signature(keywords: Iterable[str], region: str, max_results: int) -> str:
+    raw = json.dumps([sorted(set(keywords)), (region or "").strip(), int(max_results)], ensure_ascii=False)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+class JobStore:
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            os.makedirs(JOBS_DIR, exist_ok=True)
+            path = os.path.join(JOBS_DIR, "jobs.db")
+        self.path = path
+        self._conn = connect(path)
+        self._conn.executescript(_SCHEMA)
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(job_keywords)")}
+        for col, typ in (("owner", "TEXT"), ("lease_until", "REAL")):
+            if col not in cols: self._conn.execute(f"ALTER TABLE job_keywords ADD COLUMN {col} {typ}")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def _exec(self, sql: str, params: Tuple = ()):
+        with self._lock, self._conn:
+            return self._conn.execute(sql, params)
+
+    def _query(self, sql: str, params: Tuple = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    # 多进程共用同一任务库时的读-改-写：BEGIN IMMEDIATE 先拿写锁，其间不会被其他进程插入
+    @contextmanager
+    def _immediate(self):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback(); raise
+
+    # 同一组关键词/地区/结果数若有未完成的任务则续跑，返回 (job_id, 是否续跑)
+    def open_job(self, keywords: List[str], region: str, max_results: int) -> Tuple[str, bool]:
+        sig = job_signature(keywords, region, max_results)
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE signature=? AND status!='done' ORDER BY created_at DESC LIMIT 1", (sig,)).fetchone()
+            if row is not None:
+                job_id = row[0]
+                self._conn.execute("UPDATE jobs SET status='running', updated_at=? WHERE id=?", (now, job_id))
+                self._conn.execute("UPDATE job_keywords SET state='pending' WHERE job_id=? AND (state='searching' OR (state='failed' AND attempts<?))",
+                                   (job_id, MAX_ATTEMPTS))
+                self._conn.execute("UPDATE job_urls SET state='pending', owner=NULL, lease_until=NULL WHERE job_id=? AND state='inflight'", (job_id,))
+                return job_id, True
+            job_id = f"{sig}-{int(now)}"
+            self._conn.execute("INSERT INTO jobs (id, signature, keywords, region, max_results, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               (job_id, sig, json.dumps(keywords, ensure_ascii=False), (region or "").strip(), int(max_results), now, now))
+            self._conn.executemany("INSERT OR IGNORE INTO job_keywords (job_id, keyword, updated_at) VALUES (?, ?, ?)",
+                                   [(job_id, kw, now) for kw in keywords])
+            return job_id, False
+
+    def job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT keywords, region, max_results, status FROM jobs WHERE id=?", (job_id,))
+        if not rows: return None
+        kws, region, max_results, status = rows[0]
+        return {"id": job_id, "keywords": json.loads(kws), "region": region, "max_results": max_results, "status": status}
+
+    def finish_job(self, job_id: str, status: str = "done"):
+        self._exec("UPDATE jobs SET status=?, updated_at=? WHERE id=?", (status, time.time(), job_id))
+
+    def keywords(self, job_id: str, states: Iterable[str] = ("pending", "failed")) -> List[str]:
+        states = tuple(states)
+        return [r[0] for r in self._query(
+            f"SELECT keyword FROM job_keywords WHERE job_id=? AND state IN ({','.join('?' * len(states))}) AND attempts<?",
+            (job_id, *states, MAX_ATTEMPTS))]
+
+    def mark_keyword(self, job_id: str, keyword: str, state: str):
+        bump = 1 if state in ("searching",) else 0
+        self._exec("UPDATE job_keywords SET state=?, attempts=attempts+?, updated_at=? WHERE job_id=? AND keyword=?",
+                   (state, bump, time.time(), job_id, keyword))
+
+    # 新链接入库；已存在的只合并关联关键词
+    def add_urls(self, job_id: str, items: List[Dict[str, Any]]):
+        now = time.time()
+        with self._lock, self._conn:
+            for it in items:
+                also = json.dumps(it.get("also") or [], ensure_ascii=False)
+                cur = self._conn.execute("INSERT OR IGNORE INTO job_urls (job_id, url, keyword, also, updated_at) VALUES (?, ?, ?, ?, ?)",
+                                         (job_id, it["url"], it["keyword"], also, now))
+                if not cur.rowcount:
+                    self._conn.execute("UPDATE job_urls SET also=?, updated_at=? WHERE job_id=? AND url=?", (also, now, job_id, it["url"]))
+
+    def pending_urls(self, job_id: str) -> List[Dict[str, Any]]:
+        rows = self._query("SELECT url, keyword, also FROM job_urls WHERE job_id=? AND (state='pending' OR (state='failed' AND attempts<?)) ORDER BY rowid",
+                           (job_id, MAX_ATTEMPTS))
+        return [{"url": u, "keyword": kw, "also": json.loads(also or "[]")} for u, kw, also in rows]
+
+    def done_urls(self, job_id: str) -> List[Tuple[str, str, List[str]]]:
+        rows = self._query("SELECT url, keyword, also FROM job_urls WHERE job_id=? AND state='done' AND reason='ok'", (job_id,))
+        return [(u, kw, json.loads(also or "[]")) for u, kw, also in rows]
+
+    def start_url(self, job_id: str, url: str, owner: str, lease_s: float = LEASE_S):
+        now = time.time()
+        self._exec("UPDATE job_urls SET state='inflight', owner=?, lease_until=?, attempts=attempts+1, updated_at=? WHERE job_id=? AND url=?",
+                   (owner, now + lease_s, now, job_id, url))
+
+    # reason 为 ok / 负缓存原因（均视为已完成）；异常时 state='failed'，续跑时未超过重试次数的会重新入队
+    def finish_url(self, job_id: str, url: str, state: str = "done", reason: str = "ok"):
+        self._exec("UPDATE job_urls SET state=?, reason=?, owner=NULL, lease_until=NULL, updated_at=? WHERE job_id=? AND url=?",
+                   (state, reason, time.time(), job_id, url))
+
+    def reclaim_expired(self, job_id: str) -> int:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE job_keywords SET state='pending', owner=NULL, lease_until=NULL WHERE job_id=? AND state='searching' AND lease_until<?",
+                               (job_id, now))
+            return self._conn.execute("UPDATE job_urls SET state='pending', owner=NULL, lease_until=NULL WHERE job_id=? AND state='inflight' AND lease_until<?",
+                                      (job_id, now)).rowcount
+
+    # ---- 分片抓取：多个进程（可在不同机器上，共享同一 cache/ 目录）从同一任务领取关键词与链接 ----
+
+    # 领取一个待搜索关键词（含租约过期的）；尝试次数仍由 mark_keyword('searching') 计
+    def claim_keyword(self, job_id: str, owner: str, lease_s: float = LEASE_S) -> Optional[str]:
+        now = time.time()
+        with self._immediate() as c:
+            row = c.execute("SELECT keyword FROM job_keywords WHERE job_id=? AND ((state='pending' AND attempts<?) "
+                            "OR (state='searching' AND lease_until<?)) ORDER BY rowid LIMIT 1", (job_id, MAX_ATTEMPTS, now)).fetchone()
+            if row is None: return None
+            c.execute("UPDATE job_keywords SET state='searching', owner=?, lease_until=?, updated_at=? WHERE job_id=? AND keyword=?",
+                      (owner, now + lease_s, now, job_id, row[0]))
+            return row[0]
+
+    # 领取至多 n 个待抓取链接（含可重试的失败链接与租约过期的），标记为抓取中；尝试次数仍由 start_url 计
+    def claim_urls(self, job_id: str, owner: str, n: int, lease_s: float = LEASE_S) -> List[Dict[str, Any]]:
+        if n <= 0: return []
+        now = time.time()
+        with self._immediate() as c:
+            rows = c.execute("SELECT url, keyword, also FROM job_urls WHERE job_id=? AND (state='pending' OR (state='failed' AND attempts<?) "
+                             "OR (state='inflight' AND lease_until<?)) ORDER BY rowid LIMIT ?", (job_id, MAX_ATTEMPTS, now, n)).fetchall()
+            c.executemany("UPDATE job_urls SET state='inflight', owner=?, lease_until=?, updated_at=? WHERE job_id=? AND url=?",
+                          [(owner, now + lease_s, now, job_id, u) for u, _, _ in rows])
+        return [{"url": u, "keyword": kw, "also": json.loads(also or "[]")} for u, kw, also in rows]
+
+    # 搜索结果入库（跨进程去重）：新链接 pending；已在全局索引中的直接记为完成；
+    # 已存在的只合并关联关键词。返回 (新入队的条目, 已被别的进程抓完、需要补记该关键词的链接)
+    def offer_urls(self, job_id: str, keyword: str, urls: Iterable[str], known: Iterable[str] = ()) -> Tuple[List[Dict[str, Any]], List[str]]:
+        now = time.time(); fresh: List[Dict[str, Any]] = []; late: List[str] = []
+        known = set(known)
+        with self._immediate() as c:
+            for u in dict.fromkeys(list(urls) + list(known)):
+                state, reason = ("done", "ok") if u in known else ("pending", None)
+                cur = c.execute("INSERT OR IGNORE INTO job_urls (job_id, url, keyword, state, reason, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                                (job_id, u, keyword, state, reason, now))
+                if cur.rowcount:
+                    if u not in known: fresh.append({"url": u, "keyword": keyword, "also": []})
+                    continue
+                first, also, cur_state = c.execute("SELECT keyword, also, state FROM job_urls WHERE job_id=? AND url=?", (job_id, u)).fetchone()
+                also = json.loads(also or "[]")
+                if keyword != first and keyword not in also:
+                    c.execute("UPDATE job_urls SET also=?, updated_at=? WHERE job_id=? AND url=?",
+                              (json.dumps(also + [keyword], ensure_ascii=False), now, job_id, u))
+                    if cur_state == "done" and u not in known: late.append(u)
+        return fresh, late
+
+    # 链接当前关联的全部关键词（首个为发现它的关键词）；其他进程可能在抓取期间追加了关联
+    def url_keywords(self, job_id: str, url: str) -> List[str]:
+        rows = self._query("SELECT keyword, also FROM job_urls WHERE job_id=? AND url=?", (job_id, url))
+        if not rows: return []
+        return [rows[0][0]] + [k for k in json.loads(rows[0][1] or "[]") if k != rows[0][0]]
+
+    # 没有待搜索/搜索中的关键词，也没有待抓取/抓取中/可重试的链接；搜索失败的关键词留到续跑，不算在内
+    def drained(self, job_id: str) -> bool:
+        kw = self._query("SELECT COUNT(*) FROM job_keywords WHERE job_id=? AND ((state='pending' AND attempts<?) OR state='searching')",
+                         (job_id, MAX_ATTEMPTS))[0][0]
+        urls = self._query("SELECT COUNT(*) FROM job_urls WHERE job_id=? AND (state IN ('pending','inflight') OR (state='failed' AND attempts<?))",
+                           (job_id, MAX_ATTEMPTS))[0][0]
+        return not kw and not urls
+
+    def counts(self, job_id: str) -> Dict[str, int]:
+        return dict(self._query("SELECT state, COUNT(*) FROM job_urls WHERE job_id=? GROUP BY state", (job_id,)))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
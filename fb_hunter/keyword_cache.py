@@ -1,6 +1,11 @@
-import os, sqlite3
-from typing import Dict, Any
+import os, sqlite3, threading, queue, time
+from typing import Dict, Any, List, Iterable, Optional, Tuple, Callable
 from .core.paths import CACHE_DIR, safe_name
+from .metrics import get_metrics
+
+PAGE_FIELDS = ["url","title","description","email","phone","website","address","business_summary"]
+# 多台机器共享网络目录（NFS/SMB）时 WAL 依赖的共享内存不可用，设 FBHUNTER_JOURNAL=DELETE 改用回滚日志
+JOURNAL_MODE = os.environ.get("FBHUNTER_JOURNAL", "WAL").upper()
 
 def kw_dir(keyword: str, region: str = "") -> str:
     tag = f"{(keyword or '').strip()}_{(region or '').strip()}" if region else (keyword or '').strip()
@@ -11,51 +16,204 @@ def kw_dir(keyword: str, region: str = "") -> str:
 def db_path(keyword: str, region: str = "") -> str:
     return os.path.join(kw_dir(keyword, region), "cache.db")
 
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute(f"PRAGMA journal_mode={JOURNAL_MODE}")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        url TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        email TEXT,
+        phone TEXT,
+        website TEXT,
+        address TEXT,
+        business_summary TEXT,
+        keyword TEXT,
+        region TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+_UPSERT = """
+    INSERT OR IGNORE INTO pages
+    (url, title, description, email, phone, website, address, business_summary, keyword, region)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_SET_SUMMARY = "UPDATE pages SET business_summary=? WHERE url=?"
+_REFRESH = "UPDATE pages SET title=?, description=?, email=?, phone=?, website=?, address=? WHERE url=?"
+
+# 单写线程：攒够 batch_rows 行或 interval_ms 毫秒提交一次事务；flush() 阻塞到已入队的写入全部落盘
+class BatchWriter:
+    # on_commit 在写线程里以刚提交的 [(sql, params)] 调用，供调用方清理自己为未提交行保留的内存副本
+    def __init__(self, path: str, batch_rows: int = 200, interval_ms: int = 500, name: str = "sqlite-writer",
+                 on_commit: Optional[Callable[[List[Tuple]], None]] = None):
+        self.path = path
+        self.on_commit = on_commit
+        self.batch_rows = max(1, batch_rows)
+        self.interval = max(1, interval_ms) / 1000.0
+        self._q: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._closed = False
+        self.last_error: Optional[Exception] = None
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def put(self, sql: str, params: Tuple):
+        if self._closed: raise RuntimeError(f"writer closed: {self.path}")
+        self._q.put((sql, params))
+
+    # 等到此前 put 的行都已提交；期间写库失败则抛出该错误（sqlite3.Error）
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        if self._closed: return True
+        ev = threading.Event()
+        self._q.put(("__flush__", ev))
+        ok = ev.wait(timeout)
+        self._raise()
+        return ok
+
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join()
+        self._raise()
+
+    def _raise(self):
+        err, self.last_error = self.last_error, None
+        if err is not None: raise err
+
+    def _run(self):
+        conn = connect(self.path)
+        batch: List[Tuple] = []; waiters: List[threading.Event] = []
+        deadline = None; stop = False; retry = False
+        try:
+            while not stop:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._q.get(timeout=timeout)
+                    if item is None: stop = True
+                    elif item[0] == "__flush__": waiters.append(item[1])
+                    else:
+                        batch.append(item)
+                        if deadline is None: deadline = time.monotonic() + self.interval
+                except queue.Empty:
+                    pass
+                due = deadline is not None and time.monotonic() >= deadline
+                if batch and (len(batch) >= self.batch_rows and not retry or due or waiters or stop):
+                    try:
+                        self._commit(conn, batch)
+                        if self.on_commit is not None: self.on_commit(batch)
+                        batch = []; deadline = None; retry = False
+                    except sqlite3.OperationalError as e:
+                        # 锁等待超时、磁盘满等：保留本批，一个周期后连同新行一起重试；
+                        # 有 flush 在等或正在关闭时把错误交给调用方，关闭时仍失败的这批才丢弃
+                        if waiters or stop: self.last_error = e
+                        if stop: batch = []
+                        deadline = time.monotonic() + self.interval; retry = True
+                    except sqlite3.Error as e:
+                        self.last_error = e; batch = []; deadline = None; retry = False
+                elif not batch:
+                    deadline = None
+                for ev in waiters: ev.set()
+                waiters = []
+        finally:
+            conn.close()
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[Tuple]):
+        with get_metrics().time("db_commit"):
+            for attempt in range(5):
+                try:
+                    with conn:
+                        for sql, params in batch:
+                            conn.execute(sql, params)
+                    return
+                except sqlite3.OperationalError as e:
+                    if "locked" not in str(e) or attempt == 4: raise
+                    time.sleep(0.2 * (attempt + 1))
+
+class KeywordStore:
+    def __init__(self, keyword: str, region: str = "", batch_rows: int = 200, interval_ms: int = 500):
+        self.keyword = keyword
+        self.region = region
+        self.path = db_path(keyword, region)
+        self._conn = connect(self.path)
+        self._conn.execute(_SCHEMA); self._conn.commit()
+        self._lock = threading.Lock()
+        self._queued: set = set()
+        self._writer = BatchWriter(self.path, batch_rows, interval_ms, name=f"kw-writer:{safe_name(keyword)}")
+
+    def exists(self, url: str) -> bool:
+        return not self.filter_new([url])
+
+    def filter_new(self, urls: Iterable[str]) -> List[str]:
+        urls = list(dict.fromkeys(urls))
+        known = set()
+        with self._lock:
+            known.update(u for u in urls if u in self._queued)
+            todo = [u for u in urls if u not in known]
+            for i in range(0, len(todo), 500):
+                chunk = todo[i:i+500]
+                q = f"SELECT url FROM pages WHERE url IN ({','.join('?' * len(chunk))})"
+                known.update(r[0] for r in self._conn.execute(q, chunk))
+        return [u for u in urls if u not in known]
+
+    def upsert(self, row: Dict[str, Any]):
+        with self._lock:
+            self._queued.add(row.get("url"))
+        self._writer.put(_UPSERT, tuple(row.get(k) for k in PAGE_FIELDS) + (self.keyword, self.region))
+
+    def set_summary(self, url: str, summary: Optional[str]):
+        self._writer.put(_SET_SUMMARY, (summary, url))
+
+    # 重新解析后更新已有记录的提取字段（网站摘要不动）
+    def refresh(self, row: Dict[str, Any]):
+        self._writer.put(_REFRESH, tuple(row.get(k) for k in ("title", "description", "email", "phone", "website", "address")) + (row["url"],))
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        try:
+            self._writer.close()
+        finally:
+            with self._lock:
+                self._conn.close()
+
+_stores: Dict[Tuple[str, str], KeywordStore] = {}
+_stores_lock = threading.Lock()
+
+def get_store(keyword: str, region: str = "") -> KeywordStore:
+    key = (keyword, region)
+    with _stores_lock:
+        st = _stores.get(key)
+        if st is None:
+            st = _stores[key] = KeywordStore(keyword, region)
+        return st
+
+def flush_stores():
+    with _stores_lock:
+        stores = list(_stores.values())
+    for st in stores: st.flush()
+
+def close_stores():
+    with _stores_lock:
+        stores = list(_stores.values()); _stores.clear()
+    err = None
+    for st in stores:
+        try:
+            st.close()
+        except sqlite3.Error as e:
+            err = err or e
+    if err is not None: raise err
+
 def init_cache(keyword: str, region: str = ""):
-    conn = sqlite3.connect(db_path(keyword, region))
-    try:
-        c = conn.cursor()
-        c.execute("""
-            CREATE TABLE IF NOT EXISTS pages (
-                url TEXT PRIMARY KEY,
-                title TEXT,
-                description TEXT,
-                email TEXT,
-                phone TEXT,
-                website TEXT,
-                address TEXT,
-                business_summary TEXT,
-                keyword TEXT,
-                region TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            );
-        """)
-        conn.commit()
-    finally:
-        conn.close()
+    get_store(keyword, region)
 
 def exists(keyword: str, url: str, region: str = "") -> bool:
-    conn = sqlite3.connect(db_path(keyword, region))
-    try:
-        c = conn.cursor()
-        c.execute("SELECT 1 FROM pages WHERE url=?", (url,))
-        return c.fetchone() is not None
-    finally:
-        conn.close()
+    return get_store(keyword, region).exists(url)
 
 def upsert(keyword: str, row: Dict[str, Any], region: str = ""):
-    conn = sqlite3.connect(db_path(keyword, region))
-    try:
-        c = conn.cursor()
-        c.execute("""
-            INSERT OR IGNORE INTO pages
-            (url, title, description, email, phone, website, address, business_summary, keyword, region)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            row.get("url"), row.get("title"), row.get("description"), row.get("email"),
-            row.get("phone"), row.get("website"), row.get("address"), row.get("business_summary"),
-            keyword, region
-        ))
-        conn.commit()
-    finally:
-        conn.close()
+    get_store(keyword, region).upsert(row)
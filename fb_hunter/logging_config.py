@@ -1,8 +1,12 @@
-import logging, os
-from logging.handlers import RotatingFileHandler
+import logging, os, queue, atexit
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from .config import LOGS_DIR
 
+# 控制台/文件输出放到后台线程（QueueListener），调用方（GUI 线程）只做一次入队
+_listener = None
+
 def setup_logging(app_name: str = "FBHunter", level: int = logging.INFO) -> logging.Logger:
+    global _listener
     logger = logging.getLogger(app_name)
     logger.setLevel(level)
     if logger.handlers:
@@ -13,5 +17,8 @@ def setup_logging(app_name: str = "FBHunter", level: int = logging.INFO) -> logg
     fmt_file = logging.Formatter("%(asctime)s [%(levelname)s] %(name)s: %(message)s", "%Y-%m-%d %H:%M:%S")
     fh = RotatingFileHandler(os.path.join(LOGS_DIR, "app.log"), maxBytes=2*1024*1024, backupCount=5, encoding="utf-8")
     fh.setLevel(level); fh.setFormatter(fmt_file)
-    logger.addHandler(ch); logger.addHandler(fh)
+    q = queue.SimpleQueue()
+    _listener = QueueListener(q, ch, fh, respect_handler_level=True); _listener.start()
+    atexit.register(_listener.stop)  # 退出前把队列里剩余的日志写完
+    logger.addHandler(QueueHandler(q))
     return logger
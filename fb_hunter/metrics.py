@@ -0,0 +1,159 @@
+import os, json, time, bisect, datetime, threading
+from collections import deque
+from typing import Dict, Any, List, Optional
+from .config import APP_DIR
+
+METRICS_DIR = os.path.join(APP_DIR, "metrics")
+# 直方图分桶上界（秒），与 Prometheus 的 le 标签一致；最后一档为 +Inf
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RATE_WINDOW_S = 60.0
+
+# 单个阶段：耗时直方图 + 各结果计数 + 字节数 + 在途数；p50/p95 按分桶线性插值（与 histogram_quantile 相同）
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.observed = 0
+        self.sum_s = 0.0
+        self.outcomes: Dict[str, int] = {}
+        self.bytes = 0
+        self.inflight = 0
+        self._recent: deque = deque(maxlen=100000)  # 最近完成时间，用于每分钟速率
+
+    def observe(self, seconds: Optional[float], outcome: str = "ok", nbytes: int = 0):
+        if seconds is not None:
+            self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            self.observed += 1; self.sum_s += seconds
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.bytes += nbytes
+        self._recent.append(time.monotonic())
+
+    @property
+    def count(self) -> int:
+        return sum(self.outcomes.values())
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.observed: return None
+        rank = q * self.observed; seen = 0
+        for i, n in enumerate(self.buckets):
+            if seen + n >= rank and n:
+                if i == len(BUCKETS): return BUCKETS[-1]
+                lo = BUCKETS[i - 1] if i else 0.0
+                return lo + (BUCKETS[i] - lo) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def per_min(self, elapsed: float) -> float:
+        now = time.monotonic()
+        while self._recent and now - self._recent[0] > RATE_WINDOW_S: self._recent.popleft()
+        window = min(RATE_WINDOW_S, max(1.0, elapsed))
+        return len(self._recent) * 60.0 / window
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        cum = 0; buckets = []
+        for le, n in zip(list(BUCKETS) + ["+Inf"], self.buckets):
+            cum += n; buckets.append([le, cum])
+        p50, p95 = self.quantile(0.5), self.quantile(0.95)
+        return {"count": self.count, "outcomes": dict(self.outcomes), "inflight": self.inflight, "bytes": self.bytes,
+                "sum_s": round(self.sum_s, 3), "p50_s": None if p50 is None else round(p50, 3),
+                "p95_s": None if p95 is None else round(p95, 3), "per_min": round(self.per_min(elapsed), 2), "buckets": buckets}
+
+class _Span:
+    __slots__ = ("metrics", "stage", "outcome", "bytes", "t0")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics; self.stage = stage; self.outcome = "ok"; self.bytes = 0
+
+    def __enter__(self) -> "_Span":
+        self.metrics._enter(self.stage); self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, et, e, tb):
+        self.metrics._exit(self.stage, time.perf_counter() - self.t0, "error" if et is not None and self.outcome == "ok" else self.outcome, self.bytes)
+
+# 各阶段运行指标，进程内共享；用法：with metrics.time("navigate") as sp: ...; sp.outcome = "blocked"
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.stages: Dict[str, StageStats] = {}
+            self.started = time.monotonic()
+            self.started_at = time.time()
+
+    def _stage(self, name: str) -> StageStats:
+        s = self.stages.get(name)
+        if s is None: s = self.stages[name] = StageStats(name)
+        return s
+
+    def _enter(self, name: str):
+        with self._lock: self._stage(name).inflight += 1
+
+    def _exit(self, name: str, seconds: float, outcome: str, nbytes: int):
+        with self._lock:
+            s = self._stage(name); s.inflight -= 1; s.observe(seconds, outcome, nbytes)
+
+    def time(self, stage: str) -> _Span:
+        return _Span(self, stage)
+
+    def observe(self, stage: str, seconds: Optional[float], outcome: str = "ok", nbytes: int = 0):
+        with self._lock: self._stage(stage).observe(seconds, outcome, nbytes)
+
+    # 只计数不计时，例如缓存命中
+    def count(self, stage: str, outcome: str = "ok"):
+        self.observe(stage, None, outcome)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            elapsed = time.monotonic() - self.started
+            return {"started_at": datetime.datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+                    "elapsed_s": round(elapsed, 1), "stages": {k: s.as_dict(elapsed) for k, s in self.stages.items()}}
+
+    def to_prometheus(self) -> str:
+        snap = self.snapshot(); out = []
+        out.append("# TYPE fbhunter_stage_seconds histogram")
+        for name, s in snap["stages"].items():
+            for le, n in s["buckets"]: out.append(f'fbhunter_stage_seconds_bucket{{stage="{name}",le="{le}"}} {n}')
+            out.append(f'fbhunter_stage_seconds_sum{{stage="{name}"}} {s["sum_s"]}')
+            out.append(f'fbhunter_stage_seconds_count{{stage="{name}"}} {s["buckets"][-1][1]}')
+        out.append("# TYPE fbhunter_stage_total counter")
+        for name, s in snap["stages"].items():
+            for outcome, n in s["outcomes"].items(): out.append(f'fbhunter_stage_total{{stage="{name}",outcome="{outcome}"}} {n}')
+        out.append("# TYPE fbhunter_stage_bytes_total counter")
+        for name, s in snap["stages"].items():
+            if s["bytes"]: out.append(f'fbhunter_stage_bytes_total{{stage="{name}"}} {s["bytes"]}')
+        out.append("# TYPE fbhunter_stage_inflight gauge")
+        for name, s in snap["stages"].items(): out.append(f'fbhunter_stage_inflight{{stage="{name}"}} {s["inflight"]}')
+        out.append("# TYPE fbhunter_run_seconds gauge")
+        out.append(f"fbhunter_run_seconds {snap['elapsed_s']}")
+        return "\n".join(out) + "\n"
+
+    # 写出 <base>.json 与 <base>.prom（Prometheus 文本格式，可交给 node_exporter 的 textfile 收集器）
+    def write(self, base: Optional[str] = None) -> List[str]:
+        if base is None:
+            base = os.path.join(METRICS_DIR, "run-" + datetime.datetime.fromtimestamp(self.started_at).strftime("%Y%m%d-%H%M%S"))
+        base = os.path.splitext(base)[0] if base.endswith((".json", ".prom")) else base
+        os.makedirs(os.path.dirname(os.path.abspath(base)), exist_ok=True)
+        with open(base + ".json", "w", encoding="utf-8") as f: json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        with open(base + ".prom", "w", encoding="utf-8") as f: f.write(self.to_prometheus())
+        return [base + ".json", base + ".prom"]
+
+    # 每个阶段一行：次数 / p50 / p95 / 非 ok 结果
+    def summary_lines(self) -> List[str]:
+        lines = []
+        for name, s in self.snapshot()["stages"].items():
+            bad = {k: v for k, v in s["outcomes"].items() if k not in ("ok", "cached")}
+            lat = f" p50={s['p50_s']:.2f}s p95={s['p95_s']:.2f}s" if s["p50_s"] is not None else ""
+            lines.append(f"{name} n={s['count']}{lat}" + (f" {bad}" if bad else "") + (f" {s['bytes'] / 1048576:.1f}MB" if s["bytes"] else ""))
+        return lines
+
+_metrics: Optional[Metrics] = None
+_metrics_lock = threading.Lock()
+
+def get_metrics() -> Metrics:
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None: _metrics = Metrics()
+        return _metrics
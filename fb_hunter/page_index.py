@@ -0,0 +1,147 @@
+import os, threading
+from typing import Dict, Any, Iterable, Optional, List, Tuple
+from .core.paths import CACHE_DIR
+from .keyword_cache import PAGE_FIELDS, BatchWriter, connect, _SET_SUMMARY
+from .extractors import EXTRACTOR_VERSION
+
+# 全局页面索引：记录只存一份，关键词/地区命中另存关联行；跨关键词的同一 URL 不再重复渲染、重复解析。
+# 每条记录带生成它的解析器版本，版本不一致的记录不算命中，由 reextract 从缓存 HTML 重新解析
+INDEX_DIR = os.path.join(CACHE_DIR, "_index")
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS pages (
+        url TEXT PRIMARY KEY,
+        title TEXT,
+        description TEXT,
+        email TEXT,
+        phone TEXT,
+        website TEXT,
+        address TEXT,
+        business_summary TEXT,
+        extractor_version INTEGER,
+        checked_version INTEGER,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE IF NOT EXISTS hits (
+        url TEXT NOT NULL,
+        keyword TEXT NOT NULL,
+        region TEXT NOT NULL DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (url, keyword, region)
+    );
+    CREATE INDEX IF NOT EXISTS idx_hits_kw ON hits(keyword, region);
+"""
+
+# 同一 URL 再次写入（重新解析）时覆盖提取字段，已有的网站摘要保留
+_PUT = f"""
+    INSERT INTO pages ({', '.join(PAGE_FIELDS)}, extractor_version)
+    VALUES ({', '.join('?' * (len(PAGE_FIELDS) + 1))})
+    ON CONFLICT(url) DO UPDATE SET {', '.join(f'{k}=excluded.{k}' for k in PAGE_FIELDS[1:] if k != 'business_summary')},
+        business_summary=COALESCE(excluded.business_summary, pages.business_summary), extractor_version=excluded.extractor_version
+"""
+_STALE = "SELECT {} FROM pages WHERE extractor_version IS NOT ? AND checked_version IS NOT ?"
+_CHECKED = "UPDATE pages SET checked_version=? WHERE url=?"
+_HIT = "INSERT OR IGNORE INTO hits (url, keyword, region) VALUES (?, ?, ?)"
+
+class PageIndex:
+    def __init__(self, path: Optional[str] = None):
+        if path is None:
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            path = os.path.join(INDEX_DIR, "pages.db")
+        self.path = path
+        self._conn = connect(path)
+        self._conn.executescript(_SCHEMA)
+        cols = {r[1] for r in self._conn.execute("PRAGMA table_info(pages)")}
+        for col in ("extractor_version", "checked_version"):
+            if col not in cols: self._conn.execute(f"ALTER TABLE pages ADD COLUMN {col} INTEGER")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pages_ver ON pages(extractor_version)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+        # 已 put 但写线程还没提交的记录：URL -> (写入参数, 记录)，提交后按写入参数的身份清掉，新写入的同一 URL 不受影响
+        self._pending: Dict[str, Tuple[Tuple, Dict[str, Any]]] = {}
+        self._writer = BatchWriter(path, name="index-writer", on_commit=self._committed)
+
+    def _committed(self, batch: List[Tuple]):
+        with self._lock:
+            for sql, params in batch:
+                if sql is _PUT and self._pending.get(params[0], (None,))[0] is params: del self._pending[params[0]]
+
+    # current=True 时只返回当前解析器版本的记录（决定能否跳过抓取/解析）；导出、续跑等取任意版本
+    def lookup(self, urls: Iterable[str], current: bool = False) -> Dict[str, Dict[str, Any]]:
+        urls = list(dict.fromkeys(urls))
+        ver = f" AND extractor_version={EXTRACTOR_VERSION}" if current else ""
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for u in urls:
+                if u in self._pending: out[u] = dict(self._pending[u][1])
+            todo = [u for u in urls if u not in out]
+            for i in range(0, len(todo), 500):
+                chunk = todo[i:i+500]
+                q = f"SELECT {', '.join(PAGE_FIELDS)} FROM pages WHERE url IN ({','.join('?' * len(chunk))}){ver}"
+                for r in self._conn.execute(q, chunk):
+                    out[r[0]] = dict(zip(PAGE_FIELDS, r))
+        return out
+
+    def put(self, record: Dict[str, Any]):
+        params = tuple(record.get(k) for k in PAGE_FIELDS) + (EXTRACTOR_VERSION,)
+        with self._lock:  # 入队也在锁内：同一 URL 的写入顺序与 _pending 一致
+            self._pending[record["url"]] = (params, {k: record.get(k) for k in PAGE_FIELDS})
+            self._writer.put(_PUT, params)
+
+    # 由旧版解析器生成（或升级前没有版本号）、且本版本还没尝试过重新解析的记录
+    def stale_urls(self) -> List[str]:
+        with self._lock:
+            return [r[0] for r in self._conn.execute(_STALE.format("url"), (EXTRACTOR_VERSION, EXTRACTOR_VERSION))
+                    if r[0] not in self._pending]
+
+    def stale_count(self) -> int:
+        with self._lock:
+            return self._conn.execute(_STALE.format("COUNT(*)"), (EXTRACTOR_VERSION, EXTRACTOR_VERSION)).fetchone()[0]
+
+    # 没有缓存 HTML、无法重新解析的旧记录：记下本版本已检查过，不再每次运行都扫描；
+    # lookup(current=True) 仍不算命中，下次遇到时重新抓取
+    def mark_checked(self, urls: Iterable[str]):
+        for u in urls: self._writer.put(_CHECKED, (EXTRACTOR_VERSION, u))
+
+    # URL -> [(关键词, 地区)]，用于把重新解析的结果同步到各关键词库
+    def hits_for(self, urls: Iterable[str]) -> Dict[str, List[Tuple[str, str]]]:
+        urls = list(dict.fromkeys(urls)); out: Dict[str, List[Tuple[str, str]]] = {}
+        with self._lock:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i+500]
+                for u, kw, region in self._conn.execute(f"SELECT url, keyword, region FROM hits WHERE url IN ({','.join('?' * len(chunk))})", chunk):
+                    out.setdefault(u, []).append((kw, region))
+        return out
+
+    def set_summary(self, url: str, summary: Optional[str]):
+        with self._lock:
+            if url in self._pending: self._pending[url][1]["business_summary"] = summary
+        self._writer.put(_SET_SUMMARY, (summary, url))
+
+    def hit(self, url: str, keyword: str, region: str = ""):
+        self._writer.put(_HIT, (url, keyword, region or ""))
+
+    def flush(self):
+        self._writer.flush()
+
+    def close(self):
+        try:
+            self._writer.close()
+        finally:
+            with self._lock:
+                self._conn.close(); self._pending.clear()
+
+_index: Optional[PageIndex] = None
+_index_lock = threading.Lock()
+
+def get_index() -> PageIndex:
+    global _index
+    with _index_lock:
+        if _index is None: _index = PageIndex()
+        return _index
+
+def close_index():
+    global _index
+    with _index_lock:
+        idx, _index = _index, None
+    if idx is not None: idx.close()
@@ -0,0 +1,402 @@
+import os, socket, sqlite3, threading, queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from .scraper import Scraper, SearchFailed, NEGATIVE_LABELS, STOPPED
+from .render import RoutePolicy
+from .session_pool import SessionPool, Session
+from .job_store import JobStore
+from .keyword_cache import PAGE_FIELDS, get_store, close_stores
+from .page_index import get_index, close_index
+from .reextract import reextract_stale
+from .enrich import Enricher
+from .export_sink import ExportSink
+from .config import DEFAULT_COLUMNS, ENGINES
+from .metrics import get_metrics
+
+END = None  # 搜索阶段结束标记：消费者取到后放回队列并退出
+SHARD_POLL_S = 1.0  # 分片模式下任务库暂时领不到链接时的轮询间隔
+
+# 抓取流水线（不依赖 Qt）：搜索 -> 抓取 -> 解析入库 -> 网站摘要 -> 流式导出。
+# GUI 的 ScrapeWorker 与命令行都只是在外面包一层，log / progress 回调可在任意线程被调用。
+class Pipeline:
+    def __init__(self, keywords: List[str], region: str, max_results: int, threads: int, proxy, wait_time: int, cookie_paths: List[str],
+                 engine: str = "threads", route_policy: Optional[RoutePolicy] = None, parse_workers: int = 0,
+                 enrich_workers: int = 4, search_workers: int = 3, columns: Optional[List[str]] = None,
+                 export_formats: Tuple[str, ...] = ("csv",), export_name: Optional[str] = None, data_dir: Optional[str] = None,
+                 metrics_path: Optional[str] = None, search_backend=None, job_id: Optional[str] = None,
+                 log: Optional[Callable[[str], None]] = None, progress: Optional[Callable[[int, int], None]] = None):
+        self.log = log or (lambda s: None)
+        self.progress = progress or (lambda done, total: None)
+        self.keywords = keywords
+        self.region = region.strip()
+        self.max_results = max_results
+        self.threads = max(1, threads)
+        self._stop = threading.Event()
+        self.scraper = Scraper(proxy, wait_time, logger=self.log, route_policy=route_policy,
+                               parse_workers=parse_workers, search_backend=search_backend, stop=self._stop)
+        self.cookie_paths = cookie_paths
+        self.engine = engine if engine in ENGINES else "threads"
+        self.enrich_workers = max(1, enrich_workers)
+        self.search_workers = max(1, search_workers)
+        self.enricher: Optional[Enricher] = None
+        self._lock = threading.Lock()
+        self.columns = columns or DEFAULT_COLUMNS
+        self.export_formats = export_formats
+        self.export_name = export_name
+        self.data_dir = data_dir
+        self.error: Optional[Exception] = None
+        self.sink: Optional[ExportSink] = None
+        self._held: Dict[str, List[Dict[str, Any]]] = {}  # 等待网站摘要的行，摘要回来后再写出
+        self._queued: Dict[str, Dict[str, Any]] = {}
+        self.sessions: Optional[SessionPool] = None
+        self.jobs: Optional[JobStore] = None
+        self.job_id = job_id or ""
+        # 传入 job_id 即分片模式：加入协调进程建好的任务，关键词与链接都从共享任务库领取，
+        # 本进程不导出（由协调进程在全部结束后统一去重导出）
+        self.shared = bool(job_id)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._done = 0
+        self._total = 0
+        self.metrics = get_metrics()
+        self.metrics_path = metrics_path
+        self.metrics_paths: List[str] = []
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    # 返回 (导出文件路径, 导出条数)
+    def run(self) -> Tuple[List[str], int]:
+        paths: List[str] = []
+        self.metrics.reset()
+        try:
+            for kw in self.keywords:
+                get_store(kw, self.region)
+            if not self.shared and get_index().stale_count():
+                reextract_stale(self.scraper.extractor.workers, self.log, self._stop)
+
+            if not self.shared:
+                self.sink = ExportSink(self.keywords, self.region, self.columns, self.export_formats, name=self.export_name,
+                                       logger=self.log, **({"data_dir": self.data_dir} if self.data_dir else {}))
+            self.sessions = SessionPool(self.cookie_paths, logger=self.log)
+            self.jobs = JobStore()
+            if self.shared:
+                resumed = False; self.log(f"[分片] {self.owner} 加入任务 {self.job_id}")
+            else:
+                self.job_id, resumed = self.jobs.open_job(self.keywords, self.region, self.max_results)
+
+            self.enricher = Enricher(self.enrich_workers, proxies=self.scraper.proxies, stop=self._stop)
+            if len(self.scraper.proxies) > 1:
+                self.log(f"[代理] 代理池 {len(self.scraper.proxies)} 个，按线程分配")
+            url_q: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+            if resumed: self._resume(url_q)
+            producer = threading.Thread(target=self._search_stage, args=(url_q,), daemon=True)
+            producer.start()
+            feeder = threading.Thread(target=self._feed_shared, args=(url_q,), daemon=True) if self.shared else None
+            if feeder is not None: feeder.start()
+
+            if self.engine == "async":
+                self._run_async(url_q)
+            else:
+                self._run_threads(url_q)
+            producer.join()
+            if feeder is not None: feeder.join()
+            self.log(f"[队列] 共抓取 {self._done}/{self._total} 个")
+
+            if not self._stop.is_set():
+                self.log("[摘要] 等待网站分析完成…")
+                self.enricher.close(wait=True)
+            if not self.shared:  # 分片任务的收尾与导出由协调进程负责
+                left = self.jobs.keywords(self.job_id) or self.jobs.pending_urls(self.job_id)
+                self.jobs.finish_job(self.job_id, "stopped" if self._stop.is_set() or left else "done")
+                if left: self.log(f"[任务] 未完成，下次以相同关键词/地区启动将从断点继续")
+        except Exception as e:
+            self.error = e
+            self.log(f"[致命错误] {e}")
+        finally:
+            paths = self._close_sink()
+            if self.enricher is not None:
+                enricher, self.enricher = self.enricher, None
+                enricher.close(wait=False)
+            self.scraper.close()
+            if self.sessions is not None: self.sessions.save_health()
+            if self.jobs is not None: self.jobs.close()
+            for close in (close_stores, close_index):
+                try:
+                    close()
+                except sqlite3.Error as e:
+                    self.error = self.error or e; self.log(f"[致命错误] 本地库写入失败：{e}")
+            self._write_metrics()
+        return paths, self.sink.count if self.sink is not None else 0
+
+    # 续跑：上次已完成的记录从全局索引补回结果，未完成的链接直接入队，已搜索过的关键词不再搜索
+    def _resume(self, url_q: "queue.Queue[Optional[Dict[str, Any]]]"):
+        done = self.jobs.done_urls(self.job_id)
+        known = get_index().lookup(u for u, _, _ in done)
+        for u, kw, also in done:
+            if u in known: self._record(dict(known[u]), [kw] + also)
+        pending = self.jobs.pending_urls(self.job_id)
+        with self._lock:
+            for it in pending: self._queued[it["url"]] = it
+            self._total += len(pending)
+        for it in pending: url_q.put(it)
+        left = self.jobs.keywords(self.job_id)
+        self.log(f"[续跑] 任务 {self.job_id}：已完成 {len(done)}，待抓取 {len(pending)}，待搜索关键词 {len(left)}/{len(self.keywords)}")
+
+    # 搜索阶段：多个关键词并发搜索，每完成一个就把去重后的新链接送入抓取队列，浏览器不必等全部搜索结束
+    def _search_stage(self, url_q: "queue.Queue[Optional[Dict[str, Any]]]"):
+        if self.shared: return self._search_shared()
+        try:
+            with ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix="search") as ex:
+                todo = set(self.jobs.keywords(self.job_id))
+                futs = {ex.submit(self._search_one, kw): kw for kw in self.keywords if kw in todo}
+                for fut in as_completed(futs):
+                    if self._stop.is_set():
+                        for f in futs: f.cancel()
+                        break
+                    kw = futs[fut]
+                    try:
+                        self._enqueue(kw, fut.result(), url_q)
+                        self.jobs.mark_keyword(self.job_id, kw, "done")
+                    except SearchFailed as e:
+                        self.jobs.mark_keyword(self.job_id, kw, "failed"); self.log(f"[搜索失败] {e}，下次运行时重试")
+                    except Exception as e:
+                        self.jobs.mark_keyword(self.job_id, kw, "failed")
+                        self.log(f"[搜索异常] {kw} -> {e}")
+        finally:
+            url_q.put(END)
+
+    # 分片：每个搜索线程反复从任务库领取一个关键词，领不到就结束；结束标记由 _feed_shared 发出。
+    # 搜索失败的关键词本次不再领取（负缓存未过期，马上重试只会白白耗掉尝试次数），续跑时重新排队
+    def _search_shared(self):
+        def loop():
+            while not self._stop.is_set():
+                kw = self.jobs.claim_keyword(self.job_id, self.owner)
+                if kw is None: return
+                try:
+                    urls = self._search_one(kw)
+                    if self._stop.is_set():
+                        self.jobs.mark_keyword(self.job_id, kw, "pending"); return
+                    self._enqueue_shared(kw, urls)
+                    self.jobs.mark_keyword(self.job_id, kw, "done")
+                except SearchFailed as e:
+                    self.jobs.mark_keyword(self.job_id, kw, "failed"); self.log(f"[搜索失败] {e}，下次运行时重试")
+                except Exception as e:
+                    self.jobs.mark_keyword(self.job_id, kw, "failed")
+                    self.log(f"[搜索异常] {kw} -> {e}")
+        with ThreadPoolExecutor(max_workers=self.search_workers, thread_name_prefix="search") as ex:
+            for f in [ex.submit(loop) for _ in range(self.search_workers)]: f.result()
+
+    def _search_one(self, kw: str) -> List[str]:
+        if self._stop.is_set(): return []
+        self.jobs.mark_keyword(self.job_id, kw, "searching")
+        disp = f"{kw} (地区: {self.region})" if self.region else kw
+        self.log(f"[搜索] {disp}")
+        query = f"{kw} {self.region}" if self.region else kw
+        return self.scraper.ddgs_search_one(query, self.max_results)
+
+    def _enqueue(self, kw: str, urls: List[str], url_q: "queue.Queue[Optional[Dict[str, Any]]]"):
+        new_urls = get_store(kw, self.region).filter_new(urls)
+        known = get_index().lookup(new_urls, current=True)
+        for rec in known.values():
+            self._record(dict(rec), [kw])
+        # 同一 URL 被多个关键词命中时只渲染一次，其余关键词记为关联；已抓完的补记到索引记录上
+        fresh: List[Dict[str, Any]] = []; late: List[str] = []; touched: List[Dict[str, Any]] = []
+        with self._lock:
+            for u in new_urls:
+                if u in known: continue
+                first = self._queued.get(u)
+                if first is None:
+                    it = {"url": u, "keyword": kw, "also": []}
+                    self._queued[u] = it; fresh.append(it)
+                elif first.get("done"):
+                    late.append(u)
+                elif kw != first["keyword"] and kw not in first["also"]:
+                    first["also"].append(kw); touched.append(dict(first, also=list(first["also"])))
+            self._total += len(fresh)
+            self.progress(self._done, self._total)
+        self.jobs.add_urls(self.job_id, fresh + touched)
+        for it in fresh: url_q.put(it)
+        for rec in get_index().lookup(late).values():
+            self._record(dict(rec), [kw])
+        self.log(f"[搜索完成] {kw} -> 新链接 {len(new_urls)} (已过滤历史缓存，其中 {len(known)} 条复用全局索引)，入队 {len(fresh)}，待抓取共 {self._total}")
+
+    # 分片：新链接写进共享任务库（跨进程去重），由各进程的 _feed_shared 领取；已被其他进程抓完的补记关键词
+    def _enqueue_shared(self, kw: str, urls: List[str]):
+        new_urls = get_store(kw, self.region).filter_new(urls)
+        known = get_index().lookup(new_urls, current=True)
+        for rec in known.values():
+            self._record(dict(rec), [kw])
+        fresh, late = self.jobs.offer_urls(self.job_id, kw, [u for u in new_urls if u not in known], known=list(known))
+        for rec in get_index().lookup(late).values():
+            self._record(dict(rec), [kw])
+        self.log(f"[搜索完成] {kw} -> 新链接 {len(new_urls)} (其中 {len(known)} 条复用全局索引)，新入任务库 {len(fresh)}")
+
+    # 分片：按本进程空闲的抓取位从任务库领取链接；任务库里既没有待搜索的关键词、也没有待抓取/抓取中的链接时发出结束标记。
+    # 其他进程崩溃留下的租约过期后会被回收重抓；停止时本地队列里还没开始抓的链接退回 pending
+    def _feed_shared(self, url_q: "queue.Queue[Optional[Dict[str, Any]]]"):
+        try:
+            while not self._stop.is_set():
+                items = self.jobs.claim_urls(self.job_id, self.owner, self.threads - url_q.qsize())
+                for it in items: url_q.put(it)
+                c = self.jobs.counts(self.job_id)
+                with self._lock:
+                    seen = (self._done, self._total)
+                    self._total = sum(c.values()); self._done = c.get("done", 0)
+                    if (self._done, self._total) != seen: self.progress(self._done, self._total)
+                if not items:
+                    if self.jobs.drained(self.job_id): break
+                    self.jobs.reclaim_expired(self.job_id)
+                    self._stop.wait(SHARD_POLL_S)
+        finally:
+            while True:
+                try:
+                    it = url_q.get_nowait()
+                except queue.Empty:
+                    break
+                if it is not END: self.jobs.finish_url(self.job_id, it["url"], "pending", None)
+            url_q.put(END)
+
+    # 取出一个链接开始抓取：任务库标记为抓取中，并分配当前最健康的账号
+    def begin(self, tid, item: Dict[str, Any]) -> Optional[Session]:
+        self.jobs.start_url(self.job_id, item["url"], f"{self.owner}/{tid}")
+        return self.sessions.pick()
+
+    def fetch_failed(self, tid, item: Dict[str, Any], session: Optional[Session], e: Exception):
+        self.metrics.count("page", "error")
+        self.sessions.report(session, "error")
+        self.jobs.finish_url(self.job_id, item["url"], "failed", "error")
+        self.log(f"[{tid}] 抓取异常: {item['url']} -> {e}")
+
+    def _run_threads(self, url_q: "queue.Queue[Optional[Dict[str, Any]]]"):
+        def worker_fn(tid: int):
+            try:
+                while not self._stop.is_set():
+                    try:
+                        item = url_q.get(timeout=0.5)
+                    except queue.Empty:
+                        continue
+                    if item is END:
+                        url_q.put(END); break
+                    url = item["url"]; session = None
+                    try:
+                        session = self.begin(tid, item)  # 领租约/分配账号失败（如库被锁）也按抓取失败记账，线程不退出
+                        self.log(f"[{tid}] 打开: {url}")
+                        html, why = self.scraper.fetch_page(url, session.cookies if session else [])
+                    except Exception as e:
+                        self.fetch_failed(tid, item, session, e); continue
+                    try:
+                        if self.sessions.report(session, why):
+                            self.scraper.browsers.save_state(session.cookies, session.state_path)
+                        self.handle_result(tid, item, html, why)
+                    except Exception as e:
+                        self.log(f"[{tid}] 处理异常: {url} -> {e}")
+            finally:
+                self.scraper.release_browser()
+
+        threads: List[threading.Thread] = []
+        for i in range(self.threads):
+            t = threading.Thread(target=worker_fn, args=(i+1,), daemon=True)
+            threads.append(t); t.start()
+        for t in threads: t.join()
+
+    def _run_async(self, url_q: "queue.Queue[Optional[Dict[str, Any]]]"):
+        import asyncio
+        from .async_engine import AsyncFetchEngine
+        self.log(f"[引擎] asyncio 单浏览器，并发页数 {self.threads}")
+        engine = AsyncFetchEngine(self.scraper, self.threads, self._stop)
+        asyncio.run(engine.run(url_q, self))
+
+    def handle_result(self, tid: int, item: Dict[str, Any], html: Optional[str], why: str = "ok"):
+        url = item["url"]; kw = item["keyword"]
+        if why == STOPPED:  # 停止时还在限速等待，页面没打开：退回待抓取
+            self.jobs.finish_url(self.job_id, url, "pending", None); return
+        self.metrics.count("page", why.split(":", 1)[0])
+        if not html:
+            with self._lock: item["done"] = True
+            cached = why.startswith("cached:")
+            label = NEGATIVE_LABELS.get(why.split(":", 1)[-1], why)
+            self.log(f"[{tid}] 空白/受限 ({label}{'，负缓存' if cached else ''}): {url}")
+            self.jobs.finish_url(self.job_id, url, "done", why)
+            with self._lock:
+                self._done += 1; self.progress(self._done, self._total)
+            return
+        # HTML 来自缓存且全局索引里已有当前解析器版本的记录：直接复用，不再解析；已有摘要的也不再分析网站
+        rec = get_index().lookup([url], current=True).get(url) if why == "cached" else None
+        if rec is not None:
+            self.metrics.count("extract", "cached")
+            info = {**rec, "keyword": kw, "region": self.region}
+        else:
+            info = self.scraper.extract_info(html, url, kw, self.region)
+            get_index().put(info)
+        # 记录进了全局索引之后才标记完成：此前同一 URL 被其他关键词搜到时仍追加到 also，之后走 late 从索引补记
+        with self._lock:
+            item["done"] = True; also = list(item.get("also", []))
+        keywords = (self.jobs.url_keywords(self.job_id, url) or [kw] + also) if self.shared else [kw] + also
+        enrich = bool(info.get("website")) and not info.get("business_summary")
+        self._record(info, keywords, hold=enrich and self.enricher is not None and self.sink is not None)
+        if enrich:
+            self._enrich(url, info["website"], keywords)
+        self.jobs.finish_url(self.job_id, url, "done", "ok")
+        with self._lock:
+            self._done += 1
+            self.progress(self._done, self._total)
+            self.log(
+                f"[{tid}] OK: {url}\n"
+                f"    title={info.get('title')}\n"
+                f"    email={info.get('email')} phone={info.get('phone')}\n"
+                f"    website={info.get('website')}"
+            )
+
+    def _enrich(self, url: str, website: str, keywords: List[str]):
+        enricher = self.enricher
+        if enricher is None: self._release(url); return
+        def done(summary: Optional[str]):
+            if summary and self.enricher is enricher:
+                get_index().set_summary(url, summary)
+                for kw in keywords:
+                    get_store(kw, self.region).set_summary(url, summary)
+                self.log(f"[摘要] {url} -> {summary}")
+            self._release(url, summary)
+        enricher.submit(website, done)
+
+    def _record(self, info: Dict[str, Any], keywords: List[str], hold: bool = False):
+        index = get_index()
+        for kw in keywords:
+            row = {k: info.get(k) for k in PAGE_FIELDS}
+            get_store(kw, self.region).upsert(row)
+            index.hit(row["url"], kw, self.region)
+            r = {**info, "keyword": kw, "region": self.region}
+            if hold:
+                with self._lock: self._held.setdefault(r["url"], []).append(r)
+            elif self.sink is not None:
+                self.sink.write(r)
+
+    # 写出与关闭都在 self._lock 内进行，迟到的摘要回调不会写入已关闭的导出文件
+    def _release(self, url: str, summary: Optional[str] = None):
+        with self._lock:
+            for r in self._held.pop(url, []):
+                if summary: r["business_summary"] = summary
+                if self.sink is not None and not self.sink.closed: self.sink.write(r)
+
+    # 运行结束写出指标文件（JSON + Prometheus 文本），并在日志里给出各阶段 p50/p95
+    def _write_metrics(self):
+        try:
+            for line in self.metrics.summary_lines(): self.log(f"[指标] {line}")
+            self.metrics_paths = self.metrics.write(self.metrics_path)
+            self.log(f"[指标] 已保存：{self.metrics_paths[0]}")
+        except Exception as e:
+            self.log(f"[指标] 写出失败：{e}")
+
+    def _close_sink(self) -> List[str]:
+        if self.sink is None: return []
+        with self._lock:
+            for rows in self._held.values():
+                for r in rows: self.sink.write(r)
+            self._held = {}
+            paths = self.sink.close()
+        for p in paths: self.log(f"[导出] 已保存：{p}")
+        return paths
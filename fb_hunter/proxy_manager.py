@@ -1,7 +1,13 @@
-import os, platform, subprocess, requests
-from typing import Tuple
+import os, time, platform, subprocess, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Tuple, List, Dict, Optional, Iterable
 from .config import ProxyConfig
 
+DIRECT = ProxyConfig("none", "", 0)
+EVICT_AFTER = 3       # 连续失败次数达到后移出轮换
+READMIT_AFTER = 300   # 首次移出后的冷却秒数，每次再被移出翻倍
+READMIT_MAX = 3600
+
 class ProxyManager:
     @staticmethod
     def read_system_proxy() -> ProxyConfig:
@@ -46,9 +52,111 @@ class ProxyManager:
 
     @staticmethod
     def test_connectivity(proxy: ProxyConfig, test_url: str = "https://httpbin.org/ip", timeout: int = 6) -> Tuple[bool,str]:
+        import requests
         try:
             proxies = {"http": proxy.server(), "https": proxy.server()} if proxy.server() else None
             r = requests.get(test_url, timeout=timeout, proxies=proxies)
             return (r.status_code == 200, f"HTTP {r.status_code}")
         except Exception as e:
             return (False, str(e))
+
+    @staticmethod
+    def parse_list(lines: Iterable[str]) -> List[ProxyConfig]:
+        out = [ProxyConfig.parse(l) for l in lines]
+        return list({p.server(): p for p in out if p is not None and p.server()}.values())
+
+class _ProxyStat:
+    def __init__(self, proxy: ProxyConfig):
+        self.proxy = proxy
+        self.ok = 0
+        self.fail = 0
+        self.streak = 0        # 连续失败
+        self.latency = None    # 秒，指数滑动平均
+        self.evictions = 0
+        self.evicted_until = 0.0
+        self.users = 0
+
+    def score(self) -> float:
+        rate = (self.ok + 1) / (self.ok + self.fail + 2)
+        return rate / (1.0 + (self.latency if self.latency is not None else 1.0))
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"server": self.proxy.server(), "ok": self.ok, "fail": self.fail, "users": self.users,
+                "latency": round(self.latency, 3) if self.latency is not None else None,
+                "evicted": self.evicted_until > time.time(), "score": round(self.score(), 3)}
+
+# 代理池：每个 worker（线程/异步槽位/搜索线程）固定分到一个代理，按成功率与延迟打分；
+# 连续失败的代理移出轮换，冷却后以"试用"身份重新加入，再失败一次即再次移出。池为空时直连。
+class ProxyPool:
+    def __init__(self, proxies: Iterable[ProxyConfig], evict_after: int = EVICT_AFTER, readmit_after: float = READMIT_AFTER):
+        self._stats: Dict[str, _ProxyStat] = {p.server(): _ProxyStat(p) for p in proxies if p.server()}
+        self.evict_after = max(1, evict_after)
+        self.readmit_after = readmit_after
+        self._owners: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def of(cls, proxy) -> "ProxyPool":
+        if isinstance(proxy, ProxyPool): return proxy
+        return cls([proxy] if proxy is not None and proxy.server() else [])
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def _active(self, now: float) -> List[_ProxyStat]:
+        live = []
+        for st in self._stats.values():
+            if st.evicted_until and st.evicted_until <= now:
+                st.evicted_until = 0.0; st.streak = self.evict_after - 1
+            if not st.evicted_until: live.append(st)
+        return live
+
+    def acquire(self, owner: str) -> ProxyConfig:
+        with self._lock:
+            if not self._stats: return DIRECT
+            now = time.time()
+            key = self._owners.get(owner)
+            st = self._stats.get(key) if key else None
+            if st is not None and not st.evicted_until: return st.proxy
+            if st is not None: st.users -= 1
+            live = self._active(now) or sorted(self._stats.values(), key=lambda s: s.evicted_until)[:1]
+            best = max(live, key=lambda s: (s.score() / (1 + s.users), -s.users))
+            best.users += 1; self._owners[owner] = best.proxy.server()
+            return best.proxy
+
+    def release(self, owner: str):
+        with self._lock:
+            key = self._owners.pop(owner, None)
+            st = self._stats.get(key) if key else None
+            if st is not None: st.users = max(0, st.users - 1)
+
+    # 返回 True 表示该代理刚被移出轮换，调用方应丢弃基于它的浏览器 context
+    def report(self, proxy: ProxyConfig, ok: bool, latency: Optional[float] = None) -> bool:
+        with self._lock:
+            st = self._stats.get(proxy.server() or "")
+            if st is None: return False
+            if ok:
+                st.ok += 1; st.streak = 0
+                if latency is not None:
+                    st.latency = latency if st.latency is None else st.latency * 0.7 + latency * 0.3
+                return False
+            st.fail += 1; st.streak += 1
+            if st.streak < self.evict_after or st.evicted_until: return False
+            st.evictions += 1
+            st.evicted_until = time.time() + min(READMIT_MAX, self.readmit_after * 2 ** (st.evictions - 1))
+            return True
+
+    def probe(self, test_url: str = "https://httpbin.org/ip", timeout: int = 6, workers: int = 8) -> Dict[str, Tuple[bool, str]]:
+        stats = list(self._stats.values())
+        def one(st: _ProxyStat):
+            t0 = time.perf_counter()
+            ok, msg = ProxyManager.test_connectivity(st.proxy, test_url, timeout)
+            self.report(st.proxy, ok, time.perf_counter() - t0)
+            return st.proxy.server(), (ok, msg)
+        if not stats: return {}
+        with ThreadPoolExecutor(max_workers=min(workers, len(stats))) as ex:
+            return dict(ex.map(one, stats))
+
+    def snapshot(self) -> List[Dict[str, object]]:
+        with self._lock:
+            return sorted((st.as_dict() for st in self._stats.values()), key=lambda d: -d["score"])
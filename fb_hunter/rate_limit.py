@@ -0,0 +1,107 @@
+import time, random, threading
+from typing import Dict, Optional, List
+from urllib.parse import urlparse
+from .config import rate_limit
+
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+RECOVER_AFTER = 10  # 连续成功多少次后减少一级退避
+
+def backoff_delay(attempt: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempt - 1)) * random.uniform(0.5, 1.0)
+
+# 自适应令牌桶（AIMD）：成功时加性提速，被限流时速率减半并指数退避（带抖动），直到上限/下限
+class TokenBucket:
+    def __init__(self, rate: float, min_rate: float, max_rate: float, burst: float = 1.0):
+        self.min_rate = max(0.001, min_rate)
+        self.max_rate = max(self.min_rate, max_rate)
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.burst = max(1.0, burst)
+        self.step = (self.max_rate - self.min_rate) / 50 or self.min_rate
+        self.tokens = self.burst
+        self.stamp = time.monotonic()  # 退避期间 stamp 被推到未来，令牌从退避结束才开始累积
+        self.strikes = 0
+        self.streak = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self.stamp:
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+
+    # 预约一个令牌，返回需要等待的秒数；令牌可以为负，表示已排队的预约
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            return max(0.0, self.stamp - now) + max(0.0, -self.tokens / self.rate)
+
+    def penalize(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.strikes += 1; self.streak = 0
+            pause = backoff_delay(self.strikes)
+            self.stamp = max(self.stamp, now + pause)
+            self.tokens = min(self.tokens, 0.0)
+            return pause
+
+    def success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.step)
+            self.streak += 1
+            if self.streak >= RECOVER_AFTER:
+                self.strikes = max(0, self.strikes - 1); self.streak = 0
+
+# 所有线程共享：ddg / facebook 各一个桶，第三方网站按域名各一个桶（共用 web 的参数）
+class RateLimiter:
+    def __init__(self, limits: Optional[Dict[str, List[float]]] = None):
+        self.limits = limits or {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(url: str) -> str:
+        host = (urlparse(url if "://" in url else "https://" + url).hostname or "").lower()
+        if host.endswith("facebook.com"): return "facebook"
+        if host.endswith("duckduckgo.com"): return "ddg"
+        return "web:" + (host[4:] if host.startswith("www.") else host)
+
+    def bucket(self, key: str) -> TokenBucket:
+        with self._lock:
+            b = self._buckets.get(key)
+            if b is None:
+                ns = key.split(":", 1)[0]
+                b = self._buckets[key] = TokenBucket(*(self.limits.get(ns) or rate_limit(ns)))
+            return b
+
+    def reserve(self, key: str) -> float:
+        return self.bucket(key).reserve()
+
+    def acquire(self, key: str, stop: Optional[threading.Event] = None) -> float:
+        delay = self.reserve(key)
+        if delay > 0:
+            if stop is not None: stop.wait(delay)
+            else: time.sleep(delay)
+        return delay
+
+    def penalize(self, key: str) -> float:
+        return self.bucket(key).penalize()
+
+    def success(self, key: str):
+        self.bucket(key).success()
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return {k: round(b.rate, 3) for k, b in self._buckets.items()}
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_limiter() -> RateLimiter:
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None: _limiter = RateLimiter()
+        return _limiter
@@ -0,0 +1,49 @@
+import os, time, threading, multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, Tuple, List
+from .extractors import EXTRACTOR_VERSION, extract_from_html
+from .cache_store import FileCache
+from .config import cache_limit_bytes
+from .page_index import get_index
+from .keyword_cache import get_store
+
+BATCH = 256
+
+def _extract(job: Tuple[str, str]):
+    return extract_from_html(*job)
+
+# 解析器升级（EXTRACTOR_VERSION 变化）后，从 _runtime_html 里缓存的 HTML 用进程池批量重新解析全局索引中的旧版本记录，
+# 不重新渲染；结果写回全局索引与命中过它的各关键词库，网站摘要保留。没有缓存 HTML 的记录保持原样，下次遇到时重新抓取。
+# 返回 (重新解析条数, 缺少 HTML 条数)
+def reextract_stale(workers: int = 0, log: Optional[Callable[[str], None]] = None,
+                    stop: Optional[threading.Event] = None) -> Tuple[int, int]:
+    log = log or (lambda s: None)
+    index = get_index()
+    stale = index.stale_urls()
+    if not stale: return 0, 0
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    log(f"[重新解析] 全局索引中 {len(stale)} 条记录不是当前解析器版本 v{EXTRACTOR_VERSION}，用 {workers} 个进程从缓存 HTML 重新解析")
+    html_cache = FileCache("html", max_bytes=cache_limit_bytes("html"))
+    done = missing = 0; t0 = time.monotonic()
+    # 全局索引/关键词库的写线程已在运行，用 spawn 而不是 fork 启动子进程（与 ExtractPool 一致）
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as ex:
+        for i in range(0, len(stale), BATCH):
+            if stop is not None and stop.is_set(): break
+            chunk = stale[i:i+BATCH]; jobs: List[Tuple[str, str]] = []; absent: List[str] = []
+            for u in chunk:
+                e = html_cache.get_entry(f"html::{u}")
+                if e is None or e.negative: absent.append(u); continue
+                jobs.append((e.data.decode("utf-8", errors="ignore"), u))
+            index.mark_checked(absent); missing += len(absent)
+            old = index.lookup(u for _, u in jobs)
+            hits = index.hits_for(u for _, u in jobs)
+            for info in ex.map(_extract, jobs, chunksize=8):
+                u = info["url"]
+                info["business_summary"] = (old.get(u) or {}).get("business_summary")
+                index.put(info)
+                for kw, region in hits.get(u, []): get_store(kw, region).refresh(info)
+                done += 1
+            log(f"[重新解析] {min(i + BATCH, len(stale))}/{len(stale)}，{done / max(0.001, time.monotonic() - t0):.0f} 条/秒")
+    index.flush()
+    if missing: log(f"[重新解析] {missing} 条没有缓存 HTML（已过期/淘汰或未保留），保持旧记录，下次遇到时重新抓取")
+    return done, missing
@@ -0,0 +1,150 @@
+import re, time
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, Sequence
+
+# extract_from_html 依赖的字段：og:title + og:description，或主页简介区块
+READY_JS = """() => {
+  const q = s => document.querySelector(s);
+  const meta = q('meta[property="og:title"]') && q('meta[property="og:description"]');
+  const intro = q('[data-pagelet*="ProfileTilesFeed"]') || q('[data-pagelet*="Intro"]') || q('[data-pagelet*="About"]');
+  return !!(meta || intro);
+}"""
+
+POLL_MS = 250
+IDLE_MS = 800
+
+# 只需要 meta 与可见文本：图片/视频/字体以及统计、埋点脚本一律不下载
+BLOCK_TYPES = ("image", "media", "font")
+BLOCK_PATTERNS = (
+    r"google-analytics\.com", r"googletagmanager\.com", r"doubleclick\.net",
+    r"connect\.facebook\.net/.+/(fbevents|signals)", r"facebook\.com/(tr|ajax/bz|ajax/bnzai)\b",
+    r"/logging/", r"\.(mp4|m4s|webm|m3u8|woff2?|ttf)(\?|$)",
+)
+
+@dataclass
+class RoutePolicy:
+    block_types: Sequence[str] = BLOCK_TYPES
+    block_patterns: Sequence[str] = BLOCK_PATTERNS
+    _rx: Optional[re.Pattern] = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        self.block_types = frozenset(self.block_types)
+        self._rx = re.compile("|".join(f"(?:{p})" for p in self.block_patterns)) if self.block_patterns else None
+
+    @classmethod
+    def from_settings(cls, cfg: dict) -> Optional["RoutePolicy"]:
+        if not cfg.get("block_resources", True): return None
+        return cls(cfg.get("block_types") or BLOCK_TYPES, cfg.get("block_patterns") or BLOCK_PATTERNS)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        if resource_type in self.block_types: return True
+        return bool(self._rx and self._rx.search(url))
+
+    def install(self, context):
+        def handler(route):
+            req = route.request
+            if self.should_block(req.resource_type, req.url): route.abort()
+            else: route.continue_()
+        context.route("**/*", handler)
+
+    async def install_async(self, context):
+        async def handler(route):
+            req = route.request
+            if self.should_block(req.resource_type, req.url): await route.abort()
+            else: await route.continue_()
+        await context.route("**/*", handler)
+
+class NetworkTracker:
+    def __init__(self, page):
+        self.inflight = 0
+        self.bytes = 0
+        self._wire = False
+        self.last_change = time.monotonic()
+        page.on("request", self._start)
+        page.on("requestfinished", self._end)
+        page.on("requestfailed", self._end)
+        page.on("response", self._response)
+
+    # CDP 给出真实的线上字节数（含压缩与分块）；不可用时退回 Content-Length 估算
+    def attach_cdp(self, cdp):
+        cdp.on("Network.loadingFinished", self._loaded)
+        self._wire = True
+
+    def _loaded(self, params):
+        self.bytes += int(params.get("encodedDataLength") or 0)
+
+    def _response(self, resp):
+        if self._wire: return
+        try:
+            self.bytes += int(resp.headers.get("content-length") or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def _start(self, _req):
+        self.inflight += 1; self.last_change = time.monotonic()
+
+    def _end(self, _req):
+        self.inflight = max(0, self.inflight - 1); self.last_change = time.monotonic()
+
+    def idle(self, now: float) -> bool:
+        return self.inflight == 0 and (now - self.last_change) * 1000 >= IDLE_MS
+
+# 就绪判定：DOM 中出现所需字段，或网络空闲；wait_time 仅作为上限
+class Readiness:
+    def __init__(self, tracker: NetworkTracker, ceiling_s: float):
+        self.tracker = tracker
+        self.ceiling_s = max(0.0, ceiling_s)
+        self.t0 = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.t0
+
+    def verdict(self, dom_ready: bool) -> Optional[str]:
+        if dom_ready: return "meta"
+        if self.tracker.idle(time.monotonic()): return "networkidle"
+        if self.elapsed() >= self.ceiling_s: return "timeout"
+        return None
+
+    def poll_ms(self) -> int:
+        left = (self.ceiling_s - self.elapsed()) * 1000
+        return int(max(1, min(POLL_MS, left)))
+
+def _dom_ready(page) -> bool:
+    try:
+        return bool(page.evaluate(READY_JS))
+    except Exception:
+        return False
+
+def wait_ready(page, tracker: NetworkTracker, ceiling_s: float) -> Tuple[float, str]:
+    r = Readiness(tracker, ceiling_s)
+    while True:
+        reason = r.verdict(_dom_ready(page))
+        if reason: return r.elapsed(), reason
+        page.wait_for_timeout(r.poll_ms())
+
+async def wait_ready_async(page, tracker: NetworkTracker, ceiling_s: float) -> Tuple[float, str]:
+    r = Readiness(tracker, ceiling_s)
+    while True:
+        try:
+            dom = bool(await page.evaluate(READY_JS))
+        except Exception:
+            dom = False
+        reason = r.verdict(dom)
+        if reason: return r.elapsed(), reason
+        await page.wait_for_timeout(r.poll_ms())
+
+def track_bytes(page, tracker: NetworkTracker):
+    try:
+        cdp = page.context.new_cdp_session(page)
+        cdp.send("Network.enable")
+        tracker.attach_cdp(cdp)
+    except Exception:
+        pass
+
+async def track_bytes_async(page, tracker: NetworkTracker):
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Network.enable")
+        tracker.attach_cdp(cdp)
+    except Exception:
+        pass
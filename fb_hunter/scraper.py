@@ -1,37 +1,77 @@
-import os, time, socket
-from typing import List, Dict, Any, Optional, Callable
-from ddgs import DDGS
+import time, socket, threading
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
 from urllib.error import URLError
-import requests
-from playwright.sync_api import sync_playwright
-from .config import ProxyConfig
-from .extractors import extract_from_html, normalize_fb_url, analyze_website, is_profile_or_page, extract_poster_url_from_post
-from .cache_store import FileCache
+from .config import ProxyConfig, cache_limit_bytes, cache_ttl_seconds, keep_html
+from .extractors import normalize_fb_url, is_profile_or_page, extract_poster_url_from_post, classify_page
+from .cache_store import FileCache, CachePolicy
+from .extract_pool import ExtractPool
+from .browser_pool import BrowserPool
+from .render import NetworkTracker, RoutePolicy, wait_ready, track_bytes
+from .rate_limit import get_limiter, backoff_delay
+from .proxy_manager import ProxyPool
+from .metrics import get_metrics
+
+# 负缓存按原因区分有效期（秒）：限流/代理类故障很快重试，失效页面长期跳过
+SEARCH_REASON_TTL = {"ratelimit": 1800, "proxy": 600, "timeout": 600, "request": 600, "error": 1800}
+PAGE_REASON_TTL = {"blocked": 1800, "unavailable": 7 * 24 * 3600}
+# 登录墙取决于抓取时用的会话（Cookie），换个会话可能就能打开，不按 URL 负缓存；会话健康由 SessionPool.report 统计
+SESSION_REASONS = ("login_wall",)
+NEGATIVE_LABELS = {"too_short": "内容过短", "login_wall": "登录墙", "blocked": "访问受限", "unavailable": "页面失效",
+                   "empty": "返回空", "no_results": "无匹配内容", "ratelimit": "请求频率过高", "proxy": "代理错误",
+                   "timeout": "网络超时", "request": "请求失败", "error": "未知错误"}
+STOPPED = "stopped"  # fetch_page 在限速等待时收到停止信号，没有打开页面
+SEARCH_OK = ("ok", "empty", "no_results")  # 其余原因算搜索失败，关键词留待下次重试
+
+class SearchFailed(Exception):
+    def __init__(self, keyword: str, reason: str):
+        super().__init__(f"{keyword} 搜索失败 ({NEGATIVE_LABELS.get(reason, reason)})")
+        self.reason = reason
+
+def _policy(namespace: str, reason_ttl: Dict[str, float]) -> CachePolicy:
+    ttl, neg = cache_ttl_seconds(namespace)
+    return CachePolicy(ttl, neg, reason_ttl)
 
 class Scraper:
-    def __init__(self, proxy: ProxyConfig, wait_time: int = 8, logger: Optional[Callable[[str],None]] = None):
-        self.proxy = proxy
+    def __init__(self, proxy: Union[ProxyConfig, ProxyPool], wait_time: int = 8, logger: Optional[Callable[[str],None]] = None,
+                 route_policy: Optional[RoutePolicy] = None, parse_workers: int = 0, search_backend=None,
+                 stop: Optional[threading.Event] = None):
+        self.proxies = ProxyPool.of(proxy)
         self.wait_time = wait_time
         self.log = logger or (lambda s: None)
-        self.search_cache = FileCache("ddgs")
-        self.html_cache = FileCache("html")
+        self.search_cache = FileCache("ddgs", max_bytes=cache_limit_bytes("ddgs"), policy=_policy("ddgs", SEARCH_REASON_TTL))
+        self.html_cache = FileCache("html", max_bytes=cache_limit_bytes("html"), policy=_policy("html", PAGE_REASON_TTL))
+        self.keep_html = keep_html()  # 关闭时只缓存负结果，正常页面只留全局索引里的解析结果
+        self.route_policy = route_policy
+        self.browsers = BrowserPool(route_policy=route_policy)
+        self.extractor = ExtractPool(parse_workers)
+        self.limiter = get_limiter()
+        self.metrics = get_metrics()
+        self.search_backend = search_backend  # 替换 DDGS 的搜索后端（离线基准用），接口同 DDGS(proxy=...).text(...)
+        self.stop = stop or threading.Event()  # 流水线的停止信号：限速等待中途醒来，不再发请求
 
     def ddgs_search_one(self, keyword: str, max_results: int) -> List[str]:
+        import requests
+        from ddgs import DDGS
+        from ddgs.exceptions import RatelimitException
         cache_key = f"ddgs::{keyword}::{max_results}"
-        cached = self.search_cache.get(cache_key)
-        if cached:
-            return cached.decode("utf-8").split("\n") if cached else []
-
-        if self.proxy.server():
-            os.environ["HTTP_PROXY"] = self.proxy.server()
-            os.environ["HTTPS_PROXY"] = self.proxy.server()
-        else:
-            os.environ.pop("HTTP_PROXY", None); os.environ.pop("HTTPS_PROXY", None)
+        cached = self.search_cache.get_entry(cache_key)
+        if cached is not None:
+            self.metrics.count("search", "cached")
+            if cached.negative:
+                self.log(f"[缓存] {keyword} 近期搜索失败 ({NEGATIVE_LABELS.get(cached.reason, cached.reason)})，暂不重试")
+                if cached.reason not in SEARCH_OK: raise SearchFailed(keyword, cached.reason)
+                return []
+            return [u for u in cached.data.decode("utf-8").split("\n") if u]
 
-        urls: List[str] = []
+        urls: List[str] = []; why = "empty"
+        owner = threading.current_thread().name
         for attempt in range(1,4):
+            proxy = self.proxies.acquire(owner)
+            self.metrics.observe("throttle", self.limiter.acquire("ddg", self.stop), "ddg")
+            if self.stop.is_set(): return []
+            t0 = time.perf_counter()
             try:
-                with DDGS() as ddgs:
+                with (self.search_backend or DDGS)(proxy=proxy.server()) as ddgs:
                     results = ddgs.text(f"site:facebook.com {keyword}", max_results=max_results, region="us-en", safesearch="Off")
                     for r in results:
                         href = r.get("href")
@@ -44,63 +84,117 @@ class Scraper:
                             else:
                                 continue
                         urls.append(u)
+                why = "ok" if urls else "empty"
+                self.limiter.success("ddg"); self.proxy_report(proxy, True, time.perf_counter() - t0)
                 if urls:
                     break
                 else:
-                    self.log(f"[警告] {keyword} 无搜索结果 (DuckDuckGo 返回空)"); break
+                    why = "empty"; self.log(f"[警告] {keyword} 无搜索结果 (DuckDuckGo 返回空)"); break
+            except RatelimitException:
+                why = "ratelimit"; pause = self.limiter.penalize("ddg"); self.proxy_report(proxy, False)
+                self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 请求频率过高 (DuckDuckGo 限制访问)，降速并暂停 {pause:.0f}s"); continue
             except (requests.exceptions.ProxyError, URLError) as e:
-                self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 代理错误 ({e})")
+                why = "proxy"; self.proxy_report(proxy, False); self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 代理错误 ({e})")
             except (requests.exceptions.Timeout, socket.timeout) as e:
-                self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 网络连接超时 ({e})")
+                why = "timeout"; self.proxy_report(proxy, False); self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 网络连接超时 ({e})")
             except requests.exceptions.RequestException as e:
-                self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 请求失败 ({e})")
+                why = "request"; self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 请求失败 ({e})")
             except Exception as e:
                 msg = str(e)
                 if "No results found" in msg:
-                    self.log(f"[警告] {keyword} 无搜索结果 (DuckDuckGo 无匹配内容)"); break
-                elif "429" in msg:
-                    self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 请求频率过高 (DuckDuckGo 限制访问)")
+                    why = "no_results"; self.log(f"[警告] {keyword} 无搜索结果 (DuckDuckGo 无匹配内容)"); break
+                elif "429" in msg or "ratelimit" in msg.lower():
+                    why = "ratelimit"; pause = self.limiter.penalize("ddg"); self.proxy_report(proxy, False)
+                    self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 请求频率过高 (DuckDuckGo 限制访问)，降速并暂停 {pause:.0f}s"); continue
                 else:
-                    self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 未知错误 ({msg})")
-            time.sleep(2)
+                    why = "error"; self.log(f"[搜索异常] 第 {attempt} 次: {keyword}\n    原因: 未知错误 ({msg})")
+            finally:
+                self.metrics.observe("search", time.perf_counter() - t0, why)
+            time.sleep(backoff_delay(attempt))
 
         urls = list(dict.fromkeys(urls))
-        self.search_cache.set(cache_key, "\n".join(urls).encode("utf-8"))
+        if urls:
+            self.search_cache.set(cache_key, "\n".join(urls).encode("utf-8"))
+        else:
+            self.search_cache.set(cache_key, b"", negative=True, reason=why)
+            if why not in SEARCH_OK: raise SearchFailed(keyword, why)
         return urls
 
     def fetch_html(self, url: str, cookies: List[Dict[str, Any]]) -> Optional[str]:
-        cache_key = f"html::{url}"
-        cached = self.html_cache.get(cache_key)
-        if cached:
-            return cached.decode("utf-8", errors="ignore")
-
-        with sync_playwright() as p:
-            launch_kwargs = {"headless": True}
-            if self.proxy.server():
-                launch_kwargs["proxy"] = {"server": self.proxy.server()}
-            browser = p.chromium.launch(**launch_kwargs)
-            context = browser.new_context()
-            if cookies:
-                context.add_cookies(cookies)
-            page = context.new_page()
+        return self.fetch_page(url, cookies)[0]
+
+    # 返回 (html, 原因)；html 为 None 时原因说明为何不可用，负缓存命中的原因带 "cached:" 前缀，正缓存命中为 "cached"
+    def cached_page(self, url: str) -> Optional[Tuple[Optional[str], str]]:
+        e = self.html_cache.get_entry(f"html::{url}")
+        if e is None or (e.negative and e.reason in SESSION_REASONS): return None  # 旧版本写下的登录墙负缓存不再采用
+        if e.negative: return None, f"cached:{e.reason}"
+        return e.data.decode("utf-8", errors="ignore"), "cached"
+
+    def store_page(self, url: str, html: str, final_url: str = "", status: int = 200) -> Tuple[Optional[str], str]:
+        why = classify_page(html, final_url, status)
+        if why == "blocked":
+            pause = self.limiter.penalize("facebook")
+            self.log(f"[限流] facebook 访问受限，降速至 {self.limiter.bucket('facebook').rate:.2f} 页/秒，暂停 {pause:.0f}s")
+        else:
+            self.limiter.success("facebook")
+        if why == "ok":
+            if self.keep_html: self.html_cache.set(f"html::{url}", html.encode("utf-8"))
+            return html, why
+        if why not in SESSION_REASONS: self.html_cache.set(f"html::{url}", b"", negative=True, reason=why)
+        return None, why
+
+    def fetch_page(self, url: str, cookies: List[Dict[str, Any]]) -> Tuple[Optional[str], str]:
+        hit = self.cached_page(url)
+        if hit is not None:
+            self.metrics.count("fetch", "cached"); return hit
+
+        proxy = self.proxies.acquire(threading.current_thread().name)
+        self.metrics.observe("throttle", self.limiter.acquire("facebook", self.stop), "facebook")
+        if self.stop.is_set(): return None, STOPPED
+        with self.metrics.time("fetch") as sp:
+            page = self.browsers.context(cookies, proxy).new_page()
             try:
-                page.goto(url, timeout=60000)
-                page.wait_for_timeout(self.wait_time * 1000)
-                html = page.content()
-                if len(html) > 10000:
-                    self.html_cache.set(cache_key, html.encode("utf-8"))
-                    return html
-                return None
+                tracker = NetworkTracker(page)
+                track_bytes(page, tracker)
+                t0 = time.perf_counter()
+                try:
+                    resp = page.goto(url, timeout=60000)
+                except Exception:
+                    self.metrics.observe("navigate", time.perf_counter() - t0, "error")
+                    if self.proxy_report(proxy, False): self.browsers.drop_context(cookies, proxy)
+                    raise
+                latency = time.perf_counter() - t0
+                self.metrics.observe("navigate", latency)
+                waited, reason = wait_ready(page, tracker, self.wait_time)
+                self.metrics.observe("render_wait", waited, reason)
+                self.log(f"[渲染] {url} 等待 {waited:.1f}s ({reason}) 下载 {tracker.bytes / 1024:.0f}KB")
+                html, why = self.store_page(url, page.content(), page.url, resp.status if resp else 200)
+                sp.outcome = why; sp.bytes = tracker.bytes
+                if self.proxy_report(proxy, why != "blocked", latency): self.browsers.drop_context(cookies, proxy)
+                return html, why
             finally:
                 try:
-                    context.close(); browser.close()
+                    page.close()
                 except Exception:
                     pass
 
+    # 返回 True 表示代理刚被移出轮换
+    def proxy_report(self, proxy: ProxyConfig, ok: bool, latency: Optional[float] = None) -> bool:
+        evicted = self.proxies.report(proxy, ok, latency)
+        if evicted: self.log(f"[代理] {proxy.server()} 连续失败，暂时移出轮换")
+        return evicted
+
+    def release_browser(self):
+        self.browsers.release()
+        self.proxies.release(threading.current_thread().name)
+
+    def close(self):
+        self.extractor.close()
+
     def extract_info(self, html: str, url: str, keyword: str, region: str) -> Dict[str, Any]:
-        info = extract_from_html(html, url)
+        with self.metrics.time("extract") as sp:
+            sp.bytes = len(html)
+            info = self.extractor.extract(html, url)
         info["keyword"] = keyword
         info["region"] = region
-        if info.get("website"):
-            info["business_summary"] = analyze_website(info["website"]) or None
         return info
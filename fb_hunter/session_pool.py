@@ -0,0 +1,122 @@
+import os, json, time, threading
+from typing import List, Dict, Any, Optional, Callable
+from .config import APP_DIR
+from .cookies_manager import CookiesManager
+
+SESSIONS_DIR = os.path.join(APP_DIR, "sessions")
+HEALTH_PATH = os.path.join(SESSIONS_DIR, "health.json")
+QUARANTINE_S = 6 * 3600
+WINDOW = 20            # 只看最近若干次渲染结果
+MIN_SAMPLES = 4
+BAD_RATE = 0.5         # 最近结果中登录墙/受限占比超过即隔离
+BAD_STREAK = 3         # 或连续失败次数
+SAVE_EVERY = 100       # 每成功多少次刷新一次 storage_state
+
+# 一个账号 = 一个 cookies 文件；登录态保存在 sessions/<账号>.state.json，下次运行优先使用
+class Session:
+    def __init__(self, path: str):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.state_path = os.path.join(SESSIONS_DIR, f"{self.name}.state.json")
+        self.cookies: List[Dict[str, Any]] = []
+        self.recent: List[bool] = []
+        self.ok = 0
+        self.login_wall = 0
+        self.blocked = 0
+        self.streak = 0
+        self.inflight = 0
+        self.saved_at_ok = -1
+        self.quarantined_until = 0.0
+
+    def load(self):
+        state = None
+        if os.path.exists(self.state_path) and os.path.getmtime(self.state_path) >= os.path.getmtime(self.path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f: state = json.load(f)
+            except Exception:
+                state = None
+        self.cookies = (state or {}).get("cookies") or CookiesManager.parse_for_playwright(self.path)
+
+    def health(self) -> float:
+        good = sum(self.recent)
+        return (good + 1) / (len(self.recent) + 2)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"ok": self.ok, "login_wall": self.login_wall, "blocked": self.blocked,
+                "recent": [int(x) for x in self.recent], "quarantined_until": self.quarantined_until}
+
+# 会话池：按近期健康度分配账号，登录墙/受限比例过高的账号隔离一段时间；健康数据跨运行保存
+class SessionPool:
+    def __init__(self, paths: List[str], logger: Optional[Callable[[str], None]] = None):
+        self.log = logger or (lambda s: None)
+        self._lock = threading.Lock()
+        self.sessions: List[Session] = []
+        health = self._load_health()
+        for p in dict.fromkeys(paths):
+            s = Session(p)
+            try:
+                s.load()
+            except Exception as e:
+                self.log(f"[cookies错误] {p} -> {e}"); continue
+            h = health.get(s.name) or {}
+            s.ok = int(h.get("ok", 0)); s.login_wall = int(h.get("login_wall", 0)); s.blocked = int(h.get("blocked", 0))
+            s.recent = [bool(x) for x in h.get("recent", [])][-WINDOW:]
+            s.quarantined_until = float(h.get("quarantined_until", 0))
+            self.sessions.append(s)
+        for s in self.sessions:
+            if s.quarantined_until > time.time():
+                self.log(f"[会话] {s.name} 隔离中，{(s.quarantined_until - time.time()) / 60:.0f} 分钟后恢复")
+
+    @staticmethod
+    def _load_health() -> Dict[str, Any]:
+        try:
+            with open(HEALTH_PATH, "r", encoding="utf-8") as f: return json.load(f)
+        except Exception:
+            return {}
+
+    def save_health(self):
+        os.makedirs(SESSIONS_DIR, exist_ok=True)
+        with self._lock:
+            data = {**self._load_health(), **{s.name: s.as_dict() for s in self.sessions}}
+        tmp = HEALTH_PATH + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, HEALTH_PATH)
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    # 健康度最高、在途最少的账号优先；全部隔离时返回 None（匿名访问）
+    def pick(self) -> Optional[Session]:
+        with self._lock:
+            now = time.time()
+            live = [s for s in self.sessions if s.quarantined_until <= now]
+            if not live: return None
+            best = max(live, key=lambda s: (s.health() / (1 + s.inflight), -s.inflight))
+            best.inflight += 1
+            return best
+
+    # 记录一次渲染结果；返回 True 表示应把该账号当前浏览器登录态写回 storage_state
+    def report(self, s: Optional[Session], why: str) -> bool:
+        if s is None: return False
+        quarantined = False
+        with self._lock:
+            s.inflight = max(0, s.inflight - 1)
+            if why.startswith("cached") or why not in ("ok", "login_wall", "blocked"): return False
+            good = why == "ok"
+            s.recent = (s.recent + [good])[-WINDOW:]
+            if good:
+                s.ok += 1; s.streak = 0
+                save = s.saved_at_ok < 0 or s.ok - s.saved_at_ok >= SAVE_EVERY
+                if save: s.saved_at_ok = s.ok
+                return save
+            if why == "login_wall": s.login_wall += 1
+            else: s.blocked += 1
+            s.streak += 1
+            bad = len(s.recent) - sum(s.recent)
+            if s.streak >= BAD_STREAK or (len(s.recent) >= MIN_SAMPLES and bad / len(s.recent) > BAD_RATE):
+                s.quarantined_until = time.time() + QUARANTINE_S; s.streak = 0; s.recent = []
+                quarantined = True
+        if quarantined:
+            self.log(f"[会话] {s.name} 登录墙/受限过多（登录墙 {s.login_wall}，受限 {s.blocked}），隔离 {QUARANTINE_S // 3600} 小时")
+            self.save_health()
+        return False
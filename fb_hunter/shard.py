@@ -0,0 +1,120 @@
+import os, sys, time, signal, datetime, threading, subprocess
+from typing import List, Optional, Tuple, Callable
+from .job_store import JobStore
+from .page_index import get_index, close_index
+from .keyword_cache import close_stores
+from .reextract import reextract_stale
+from .export_sink import ExportSink
+from .config import DEFAULT_COLUMNS
+from .metrics import METRICS_DIR
+
+# 多进程分片抓取的协调进程：建好（或续跑）任务后启动 N 个 `python -m fb_hunter worker --job <id>` 子进程，
+# 每个子进程有自己的浏览器，从共享任务库 cache/_jobs/jobs.db 原子领取关键词与链接（带租约，崩溃后自动回收）。
+# 其他机器把 FBHUNTER_ROOT 指向同一共享目录、运行同样的 worker 命令即可加入。
+# 子进程不导出；全部结束后由这里从任务库 + 全局索引统一导出，主文件按 URL 去重。
+POLL_S = 2.0
+
+class ShardCoordinator:
+    def __init__(self, keywords: List[str], region: str, max_results: int, processes: int, worker_args: List[str],
+                 columns: Optional[List[str]] = None, export_formats: Tuple[str, ...] = ("csv",), export_name: Optional[str] = None,
+                 data_dir: Optional[str] = None, metrics_path: Optional[str] = None,
+                 log: Optional[Callable[[str], None]] = None, progress: Optional[Callable[[int, int], None]] = None):
+        self.log = log or (lambda s: None)
+        self.progress = progress or (lambda done, total: None)
+        self.keywords = keywords
+        self.region = region.strip()
+        self.max_results = max_results
+        self.processes = max(1, processes)
+        self.worker_args = worker_args
+        self.columns = columns or DEFAULT_COLUMNS
+        self.export_formats = export_formats
+        self.export_name = export_name
+        self.data_dir = data_dir
+        # 每个子进程一份指标文件：<前缀>-w1.json …
+        self.metrics_path = metrics_path or os.path.join(METRICS_DIR, "shard-" + datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+        self.job_id = ""
+        self.failed = 0
+        self._procs: List[subprocess.Popen] = []
+        self._stop = threading.Event()
+        self._signalled = False
+        self._seen = (-1, -1)
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    # 返回 (导出文件路径, 导出条数)
+    def run(self) -> Tuple[List[str], int]:
+        jobs = JobStore()
+        try:
+            self.job_id, resumed = jobs.open_job(self.keywords, self.region, self.max_results)
+            if get_index().stale_count():
+                reextract_stale(log=self.log, stop=self._stop)
+            close_stores(); close_index()  # 导出时重新打开，运行期间不占着写线程
+            self.log(f"[分片] 任务 {self.job_id}{'（续跑）' if resumed else ''}：启动 {self.processes} 个抓取进程")
+            self.log(f"[分片] 其他机器共享同一目录后可加入：python -m fb_hunter worker --job {self.job_id}")
+            self._procs = [self._spawn(i + 1) for i in range(self.processes)]
+            while any(p.poll() is None for p in self._procs):
+                self._tick(jobs)
+            self.failed = sum(1 for p in self._procs if p.returncode not in (0, 130, -signal.SIGTERM))
+            if self.failed: self.log(f"[分片] {self.failed} 个抓取进程异常退出")
+            # 本机进程都退出后，等其他机器上还在抓的链接结束；租约过期的会被回收
+            while not self._stop.is_set() and jobs.counts(self.job_id).get("inflight") and not jobs.drained(self.job_id):
+                self._tick(jobs)
+            left = not jobs.drained(self.job_id) or bool(jobs.keywords(self.job_id))
+            jobs.finish_job(self.job_id, "stopped" if self._stop.is_set() or left else "done")
+            if left: self.log("[任务] 未完成，下次以相同关键词/地区启动将从断点继续")
+            return self.export(jobs)
+        finally:
+            self._terminate()
+            jobs.close()
+
+    def _spawn(self, n: int) -> subprocess.Popen:
+        cmd = [sys.executable, "-m", "fb_hunter", "worker", "--job", self.job_id, "--label", f"w{n}",
+               "--metrics", f"{self.metrics_path}-w{n}", *self.worker_args]
+        env = {**os.environ, "FBHUNTER_RATE_SHARE": str(self.processes)}
+        return subprocess.Popen(cmd, env=env)
+
+    def _tick(self, jobs: JobStore):
+        if self._stop.is_set(): self._terminate()
+        jobs.reclaim_expired(self.job_id)
+        c = jobs.counts(self.job_id)
+        seen = (c.get("done", 0), sum(c.values()))
+        if seen != self._seen: self._seen = seen; self.progress(*seen)
+        time.sleep(POLL_S)
+
+    # 子进程收到 SIGTERM 后与命令行 Ctrl+C 一样收尾；已领取未开始的链接退回任务库
+    def _terminate(self):
+        if self._signalled: return
+        self._signalled = True
+        for p in self._procs:
+            if p.poll() is not None: continue
+            try:
+                p.terminate() if os.name == "nt" else p.send_signal(signal.SIGTERM)
+            except OSError:
+                pass
+
+    # 统一导出：任务里成功的链接（含复用全局索引的）从全局索引取记录，每个关联关键词一行；
+    # 主文件按 URL 去重，多关键词时另写各关键词分文件
+    def export(self, jobs: JobStore) -> Tuple[List[str], int]:
+        sink = ExportSink(self.keywords, self.region, self.columns, self.export_formats, name=self.export_name,
+                          logger=self.log, **({"data_dir": self.data_dir} if self.data_dir else {}))
+        index = get_index()
+        try:
+            done = jobs.done_urls(self.job_id)
+            for i in range(0, len(done), 500):
+                chunk = done[i:i+500]
+                recs = index.lookup(u for u, _, _ in chunk)
+                for u, kw, also in chunk:
+                    rec = recs.get(u)
+                    if rec is None: continue
+                    for k in dict.fromkeys([kw] + also):
+                        sink.write({**rec, "keyword": k, "region": self.region})
+        finally:
+            paths = sink.close()
+            close_index()
+        for p in paths: self.log(f"[导出] 已保存：{p}")
+        return paths, sink.count
@@ -0,0 +1,102 @@
+import os, time, threading
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+from .core.paths import CACHE_DIR
+from .keyword_cache import connect
+from .extractors import read_capped, summarize_markup
+from .rate_limit import RateLimiter, get_limiter
+
+SITES_DIR = os.path.join(CACHE_DIR, "_sites")
+SITE_TTL = 7 * 24 * 3600
+SITE_NEGATIVE_TTL = 24 * 3600
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS sites (
+        domain TEXT PRIMARY KEY,
+        url TEXT,
+        summary TEXT,
+        etag TEXT,
+        last_modified TEXT,
+        status INTEGER,
+        checked_at REAL
+    );
+"""
+
+def domain_key(url: str) -> str:
+    u = (url or "").strip()
+    if "://" not in u: u = "https://" + u
+    host = (urlparse(u).hostname or "").lower().rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+# 按域名缓存 business_summary：TTL 内直接返回；过期后带 If-None-Match / If-Modified-Since 条件请求，304 只刷新时间
+class SiteCache:
+    def __init__(self, path: Optional[str] = None, ttl: float = SITE_TTL, negative_ttl: float = SITE_NEGATIVE_TTL,
+                 limiter: Optional[RateLimiter] = None, stop: Optional[threading.Event] = None):
+        if path is None:
+            os.makedirs(SITES_DIR, exist_ok=True)
+            path = os.path.join(SITES_DIR, "sites.db")
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.limiter = limiter or get_limiter()
+        self.stop = stop or threading.Event()  # 停止后不再等限速、不再发请求，有旧摘要就先用旧的
+        self._conn = connect(path)
+        self._conn.execute(_SCHEMA); self._conn.commit()
+        self._lock = threading.Lock()
+
+    def _get(self, domain: str) -> Optional[Tuple]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT summary, etag, last_modified, status, checked_at FROM sites WHERE domain=?", (domain,)
+            ).fetchone()
+
+    def _put(self, domain: str, url: str, summary: Optional[str], etag: Optional[str], last_modified: Optional[str], status: int):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sites (domain, url, summary, etag, last_modified, status, checked_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (domain, url, summary, etag, last_modified, status, time.time()))
+
+    def _touch(self, domain: str):
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE sites SET checked_at=? WHERE domain=?", (time.time(), domain))
+
+    def summarize(self, url: str, session, proxy=None) -> Optional[str]:
+        domain = domain_key(url)
+        if not domain: return None
+        row = self._get(domain)
+        if row is not None:
+            summary, etag, last_modified, status, checked_at = row
+            ttl = self.ttl if summary else self.negative_ttl
+            if time.time() - (checked_at or 0) < ttl: return summary
+        headers = {}
+        if row is not None and row[0]:
+            if row[1]: headers["If-None-Match"] = row[1]
+            if row[2]: headers["If-Modified-Since"] = row[2]
+        key = self.limiter.key_for(url)
+        self.limiter.acquire(key, self.stop)
+        if self.stop.is_set(): return row[0] if row is not None else None
+        try:
+            server = proxy.server() if proxy is not None else None
+            resp = session.get(url, headers=headers, timeout=12, stream=True,
+                               proxies={"http": server, "https": server} if server else None)
+        except Exception:
+            return row[0] if row is not None else None
+        with resp:
+            if resp.status_code in (429, 503): self.limiter.penalize(key)
+            else: self.limiter.success(key)
+            if resp.status_code == 304 and row is not None:
+                self._touch(domain)
+                return row[0]
+            if resp.status_code != 200:
+                if row is not None and row[0]: return row[0]
+                self._put(domain, url, None, None, None, resp.status_code)
+                return None
+            try:
+                summary = summarize_markup(read_capped(resp))
+            except Exception:
+                return row[0] if row is not None else None
+            self._put(domain, url, summary, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), 200)
+            return summary
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
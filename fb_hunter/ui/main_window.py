@@ -1,17 +1,22 @@
-import os, datetime
-from typing import List, Dict
+import os
+from typing import List, Dict, TYPE_CHECKING
+from PySide6.QtCore import QTimer
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QComboBox, QLineEdit, QPushButton,
-    QTextEdit, QFileDialog, QListWidget, QSpinBox, QGroupBox, QGridLayout, QCheckBox, QMessageBox, QProgressBar
+    QTextEdit, QPlainTextEdit, QFileDialog, QListWidget, QSpinBox, QGroupBox, QGridLayout, QCheckBox, QMessageBox, QProgressBar
 )
-from PySide6.QtGui import QTextCursor
-from ..config import DEFAULT_COLUMNS, save_settings, load_settings, ensure_app_dirs, COOKIES_DIR, ProxyConfig
+from ..config import DEFAULT_COLUMNS, ENGINES, save_settings, load_settings, ensure_app_dirs, COOKIES_DIR, ProxyConfig
 from ..logging_config import setup_logging
-from ..proxy_manager import ProxyManager
+from ..render import RoutePolicy
+from ..proxy_manager import ProxyManager, ProxyPool
 from ..cookies_manager import CookiesManager
-from ..worker_qt import ScrapeWorker
-from ..core.paths import DATA_DIR, CACHE_DIR, safe_name
-import pandas as pd
+if TYPE_CHECKING:
+    from ..worker_qt import ScrapeWorker
+
+LOG_MAX_LINES = 5000  # 日志框只保留最近若干行，完整日志在 logs/app.log
+# 指标面板显示的阶段（顺序即显示顺序）
+STAGE_LABELS = {"search": "搜索", "throttle": "限速等待", "fetch": "整页抓取", "navigate": "导航", "render_wait": "渲染等待",
+                "extract": "解析", "enrich": "网站分析", "db_commit": "入库"}
 
 class MainWindow(QWidget):
     def __init__(self):
@@ -22,7 +27,7 @@ class MainWindow(QWidget):
         self.resize(1120, 840)
 
         self.cookies_files: List[str] = []
-        self.worker: ScrapeWorker | None = None
+        self.worker: "ScrapeWorker | None" = None
         self._build_ui()
         self._load_settings()
         self._auto_detect_proxy()
@@ -41,6 +46,9 @@ class MainWindow(QWidget):
         g.addWidget(QLabel("地址"),0,2); g.addWidget(self.proxy_host,0,3)
         g.addWidget(QLabel("端口"),0,4); g.addWidget(self.proxy_port,0,5)
         g.addWidget(self.btn_test_proxy,0,6)
+        self.proxy_list = QPlainTextEdit(); self.proxy_list.setFixedHeight(56)
+        self.proxy_list.setPlaceholderText("代理池（可选）：每行一个，如 socks5://1.2.3.4:1080 或 host:port；填写后忽略上方单个代理，按线程分配并自动剔除失效代理")
+        g.addWidget(QLabel("代理池"),1,0); g.addWidget(self.proxy_list,1,1,1,6)
         proxy_group.setLayout(g); layout.addWidget(proxy_group)
 
         # Cookies 管理
@@ -64,13 +72,25 @@ class MainWindow(QWidget):
         self.kw_edit = QTextEdit(); self.kw_edit.setPlaceholderText("每行一个关键词…")
         self.region_edit = QLineEdit(); self.region_edit.setPlaceholderText("地区（可选）：例如 United States / Japan / Germany")
         self.spin_max = QSpinBox(); self.spin_max.setRange(1, 100); self.spin_max.setValue(15)
-        self.spin_threads = QSpinBox(); self.spin_threads.setRange(1, 16); self.spin_threads.setValue(4)
+        self.spin_threads = QSpinBox(); self.spin_threads.setRange(1, 50); self.spin_threads.setValue(4)
+        self.engine_box = QComboBox(); self.engine_box.addItems(list(ENGINES))
+        self.engine_box.setToolTip("threads：每线程一个浏览器；async：单浏览器 asyncio 并发（适合 30~50 页同时在途）")
         self.spin_wait = QSpinBox(); self.spin_wait.setRange(3, 20); self.spin_wait.setValue(8)
+        self.spin_wait.setToolTip("等待上限：页面所需字段出现或网络空闲即提前结束")
         k.addWidget(QLabel("关键词"), 0, 0); k.addWidget(self.kw_edit, 0, 1, 3, 5)
         k.addWidget(QLabel("地区"), 3, 0); k.addWidget(self.region_edit, 3, 1, 1, 5)
         k.addWidget(QLabel("每词最大结果"), 4, 0); k.addWidget(self.spin_max, 4, 1)
-        k.addWidget(QLabel("线程数"), 4, 2); k.addWidget(self.spin_threads, 4, 3)
-        k.addWidget(QLabel("渲染等待(秒)"), 4, 4); k.addWidget(self.spin_wait, 4, 5)
+        k.addWidget(QLabel("线程/并发数"), 4, 2); k.addWidget(self.spin_threads, 4, 3)
+        k.addWidget(QLabel("渲染等待上限(秒)"), 4, 4); k.addWidget(self.spin_wait, 4, 5)
+        k.addWidget(QLabel("引擎"), 5, 0); k.addWidget(self.engine_box, 5, 1)
+        self.chk_block = QCheckBox("拦截图片/视频/字体/统计脚本"); self.chk_block.setChecked(True)
+        k.addWidget(self.chk_block, 5, 2, 1, 2)
+        self.spin_parse = QSpinBox(); self.spin_parse.setRange(0, max(1, os.cpu_count() or 1)); self.spin_parse.setValue(0)
+        self.spin_parse.setToolTip("HTML 解析进程数，与线程数独立；0 表示在抓取线程内解析")
+        k.addWidget(QLabel("解析进程"), 5, 4); k.addWidget(self.spin_parse, 5, 5)
+        self.spin_search = QSpinBox(); self.spin_search.setRange(1, 8); self.spin_search.setValue(3)
+        self.spin_search.setToolTip("同时搜索的关键词数；搜索完成的关键词立即开始抓取，过高容易触发 DuckDuckGo 限流")
+        k.addWidget(QLabel("搜索并发"), 6, 0); k.addWidget(self.spin_search, 6, 1)
         kw_group.setLayout(k); layout.addWidget(kw_group)
 
         # 导出（仅控制列）
@@ -85,6 +105,9 @@ class MainWindow(QWidget):
             e.addWidget(cb, col_row, col_col)
             col_col = 0 if col_col > 2 else col_col + 1
             if col_col == 0: col_row += 1
+        self.chk_jsonl = QCheckBox("同时导出 JSONL"); self.chk_parquet = QCheckBox("同时导出 Parquet")
+        self.chk_parquet.setToolTip("需要安装 pyarrow")
+        e.addWidget(self.chk_jsonl, col_row + 1, 0); e.addWidget(self.chk_parquet, col_row + 1, 1)
         export_group.setLayout(e); layout.addWidget(export_group)
 
         # 控制+进度
@@ -95,11 +118,16 @@ class MainWindow(QWidget):
         ctrl.addWidget(self.btn_start); ctrl.addWidget(self.btn_stop); ctrl.addStretch(1)
         layout.addLayout(ctrl)
 
-        self.progress = QProgressBar(); self.progress.setRange(0,1); self.progress.setValue(0)
+        self.progress = QProgressBar(); self.progress.setRange(0,1); self.progress.setValue(0); self.progress.setFormat("%v / %m")
         layout.addWidget(self.progress)
 
+        # 运行指标：每秒刷新一次
+        self.metrics_view = QLabel("运行指标：任务开始后显示各阶段耗时")
+        layout.addWidget(self.metrics_view)
+        self._metrics_timer = QTimer(self); self._metrics_timer.setInterval(1000); self._metrics_timer.timeout.connect(self.refresh_metrics)
+
         # 日志
-        self.log = QTextEdit(); self.log.setReadOnly(True)
+        self.log = QPlainTextEdit(); self.log.setReadOnly(True); self.log.setMaximumBlockCount(LOG_MAX_LINES)
         layout.addWidget(self.log, 2)
 
     def _load_settings(self):
@@ -107,6 +135,15 @@ class MainWindow(QWidget):
         self.proxy_mode.setCurrentText(cfg.get("proxy_mode","none"))
         self.proxy_host.setText(cfg.get("proxy_host",""))
         self.proxy_port.setText(str(cfg.get("proxy_port","")))
+        self.proxy_list.setPlainText("\n".join(cfg.get("proxy_list") or []))
+        self.engine_box.setCurrentText(cfg.get("engine","threads"))
+        self.chk_block.setChecked(bool(cfg.get("block_resources", True)))
+        self.spin_parse.setValue(int(cfg.get("parse_workers", 0)))
+        self.spin_search.setValue(int(cfg.get("search_workers", 3)))
+        formats = cfg.get("export_formats") or ["csv"]
+        self.chk_jsonl.setChecked("jsonl" in formats); self.chk_parquet.setChecked("parquet" in formats)
+        self._enrich_workers = int(cfg.get("enrich_workers", 4))
+        self._route_cfg = {k: cfg[k] for k in ("block_types","block_patterns") if k in cfg}
         self.cookie_list.clear()
         files = cfg.get("cookies_files") or []
         auto = CookiesManager.list_cookie_files()
@@ -120,7 +157,15 @@ class MainWindow(QWidget):
             "proxy_mode": self.proxy_mode.currentText(),
             "proxy_host": self.proxy_host.text().strip(),
             "proxy_port": int(self.proxy_port.text() or 0),
-            "cookies_files": self.cookies_files
+            "proxy_list": [s.strip() for s in self.proxy_list.toPlainText().splitlines() if s.strip()],
+            "cookies_files": self.cookies_files,
+            "engine": self.engine_box.currentText(),
+            "block_resources": self.chk_block.isChecked(),
+            "parse_workers": self.spin_parse.value(),
+            "search_workers": self.spin_search.value(),
+            "export_formats": self._export_formats(),
+            "enrich_workers": self._enrich_workers,
+            **self._route_cfg
         }
         from ..config import save_settings as _s; _s(cfg)
 
@@ -133,7 +178,19 @@ class MainWindow(QWidget):
         else:
             self.append_log("[代理] 未检测到系统代理，默认直连")
 
+    def _export_formats(self) -> List[str]:
+        return ["csv"] + (["jsonl"] if self.chk_jsonl.isChecked() else []) + (["parquet"] if self.chk_parquet.isChecked() else [])
+
+    def _proxy_pool(self) -> ProxyPool | None:
+        proxies = ProxyManager.parse_list(self.proxy_list.toPlainText().splitlines())
+        return ProxyPool(proxies) if proxies else None
+
     def on_test_proxy(self):
+        pool = self._proxy_pool()
+        if pool is not None:
+            res = pool.probe()
+            lines = [f"{'可用' if ok else '不可用'}  {srv}  {msg[:60]}" for srv, (ok, msg) in res.items()]
+            QMessageBox.information(self, "代理测试", f"可用 {sum(ok for ok, _ in res.values())}/{len(res)}\n" + "\n".join(lines)); return
         proxy = ProxyConfig(self.proxy_mode.currentText(), self.proxy_host.text().strip(), int(self.proxy_port.text() or 0))
         from ..proxy_manager import ProxyManager as PM
         ok, msg = PM.test_connectivity(proxy)
@@ -182,15 +239,22 @@ class MainWindow(QWidget):
         cols = [c for c, cb in self.chk_cols.items() if cb.isChecked()]
         if "url" not in cols: cols = ["url"] + [c for c in cols if c != "url"]
 
-        proxy = ProxyConfig(self.proxy_mode.currentText(), self.proxy_host.text().strip(), port)
-        self.worker = ScrapeWorker(keywords, region, self.spin_max.value(), self.spin_threads.value(), proxy, self.spin_wait.value(), self.cookies_files)
-        self.worker.log.connect(self.append_log)
+        from ..worker_qt import ScrapeWorker  # 抓取核心首次开始任务时才加载，窗口启动更快
+        proxy = self._proxy_pool() or ProxyConfig(self.proxy_mode.currentText(), self.proxy_host.text().strip(), port)
+        self.worker = ScrapeWorker(keywords, region, self.spin_max.value(), self.spin_threads.value(), proxy, self.spin_wait.value(), self.cookies_files,
+                                  engine=self.engine_box.currentText(),
+                                  route_policy=RoutePolicy.from_settings({"block_resources": self.chk_block.isChecked(), **self._route_cfg}),
+                                  parse_workers=self.spin_parse.value(), enrich_workers=self._enrich_workers,
+                                  search_workers=self.spin_search.value(), columns=cols, export_formats=tuple(self._export_formats()),
+                                  logger=self.logger)
+        self.worker.log.connect(self.show_logs)
         self.worker.progress.connect(self.on_progress)
-        self.worker.finished_all.connect(lambda rows: self.on_finished(rows, cols, keywords, region))
+        self.worker.finished_all.connect(self.on_finished)
         self.append_log("=== 任务开始 ===")
         self.btn_start.setEnabled(True); self.btn_stop.setEnabled(True)
         self.progress.reset(); self.progress.setMaximum(1); self.progress.setValue(0)
         self.worker.start()
+        self._metrics_timer.start()
         self._save_settings()
 
     def on_stop(self):
@@ -201,54 +265,43 @@ class MainWindow(QWidget):
         if self.progress.maximum() != max(1, total):
             self.progress.setMaximum(max(1, total))
         self.progress.setValue(done)
-        self.append_log(f"[进度] {done}/{total}")
-
-    def _export_csv(self, df: pd.DataFrame, path: str):
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        df.to_csv(path, index=False, encoding="utf-8-sig")
-        self.append_log(f"[导出] 已保存：{path}")
 
-    def on_finished(self, rows: List[Dict], cols: List[str], keywords: List[str], region: str):
-        count = len(rows)
-        self.append_log(f"=== 任务结束：共新增 {count} 条 ===")
+    # 记录在抓取过程中已流式写入 data/（多关键词时另写 cache/<关键词>/ 分文件），这里只做收尾提示
+    def on_finished(self, paths: List[str], count: int):
+        self.refresh_metrics(); self._metrics_timer.stop()
+        self.append_log(f"=== 任务结束：共导出 {count} 条 ===")
         self.progress.setValue(self.progress.maximum())
-
         if count == 0:
-            QMessageBox.information(self, "完成", "没有新的数据"); 
-            self.btn_start.setEnabled(True); self.btn_stop.setEnabled(False); self.worker=None; return
-
-        df_all = pd.DataFrame(rows)
-        if "url" in df_all.columns:
-            df_all = df_all.drop_duplicates(subset=["url"], keep="first")
-        for c in cols:
-            if c not in df_all.columns: df_all[c] = None
-        df_all = df_all[cols]
-
-        today = datetime.datetime.now().strftime("%Y-%m-%d")
-        if len(keywords) == 1:
-            tag = f"{safe_name(keywords[0])}_{safe_name(region)}" if region else safe_name(keywords[0])
-            export_path = os.path.join(DATA_DIR, f"{tag}_{today}.csv")
-            self._export_csv(df_all, export_path)
+            QMessageBox.information(self, "完成", "没有新的数据")
         else:
-            tag = f"multi_{safe_name(region)}" if region else "multi"
-            export_path = os.path.join(DATA_DIR, f"{tag}_{today}.csv")
-            self._export_csv(df_all, export_path)
-
-            # 可选：按关键词分文件到 cache/<kw_region>/
-            if "keyword" in df_all.columns:
-                for kw, df_kw in df_all.groupby("keyword"):
-                    kw_tag = f"{safe_name(kw)}_{safe_name(region)}" if region else safe_name(kw)
-                    sub_dir = os.path.join(CACHE_DIR, kw_tag)
-                    os.makedirs(sub_dir, exist_ok=True)
-                    sub_path = os.path.join(sub_dir, f"{kw_tag}_{today}.csv")
-                    self._export_csv(df_kw, sub_path)
-
-        QMessageBox.information(self, "完成", f"任务完成，共导出 {len(df_all)} 条数据。")
-
+            QMessageBox.information(self, "完成", f"任务完成，共导出 {count} 条数据。\n" + "\n".join(paths[:3]))
         self.btn_start.setEnabled(True); self.btn_stop.setEnabled(False)
         self.worker = None
 
+    def refresh_metrics(self):
+        if self.worker is None: return
+        snap = self.worker.pipeline.metrics.snapshot(); stages = snap["stages"]
+        page = stages.get("page") or {}
+        sec = lambda v: "-" if v is None else f"{v:.2f}s"
+        rows = []
+        for key, label in STAGE_LABELS.items():
+            st = stages.get(key)
+            if not st: continue
+            other = ", ".join(f"{k} {v}" for k, v in sorted(st["outcomes"].items(), key=lambda kv: -kv[1]) if k not in ("ok", "cached"))
+            rows.append(f"<tr><td>{label}</td><td align=right>{st['count']}</td><td align=right>{st['inflight']}</td>"
+                        f"<td align=right>{sec(st['p50_s'])}</td><td align=right>{sec(st['p95_s'])}</td><td>{other}</td></tr>")
+        head = "".join(f"<th>{h}</th>" for h in ("阶段", "次数", "在途", "p50", "p95", "其他结果"))
+        self.metrics_view.setText(
+            f"<b>{page.get('per_min', 0):.1f}</b> 页/分钟 · 已处理 {page.get('count', 0)} 页 · 运行 {snap['elapsed_s']:.0f}s"
+            f"<table cellspacing=0 cellpadding=2><tr>{head}</tr>{''.join(rows)}</table>")
+
     def append_log(self, msg: str):
-        self.log.append(msg)
-        self.log.moveCursor(QTextCursor.End)
         self.logger.info(msg)
+        self.show_logs([msg])
+
+    # 一批日志一次性追加（抓取线程的日志已由 ScrapeWorker 写入文件）；用户往上翻看时不强制滚到底部
+    def show_logs(self, lines: List[str]):
+        bar = self.log.verticalScrollBar()
+        stick = bar.value() >= bar.maximum() - 4
+        self.log.appendPlainText("\n".join(lines[-LOG_MAX_LINES:]))
+        if stick: bar.setValue(bar.maximum())
@@ -1,108 +1,53 @@
-from PySide6.QtCore import QThread, Signal
-import threading, queue
-from typing import List, Dict, Any
-from .scraper import Scraper
-from .cookies_manager import CookiesManager
-from .keyword_cache import init_cache, exists as kw_exists, upsert as kw_upsert
+import logging
+from collections import deque
+from PySide6.QtCore import QThread, QTimer, Signal
+from typing import List, Optional
+from .pipeline import Pipeline
 
+FLUSH_MS = 200  # 日志/进度每 200ms 合并推送一次到界面
+
+# GUI 线程包装：参数与 Pipeline 相同。抓取线程只往缓冲区追加（写文件日志也在抓取线程里入队），
+# 由界面线程的定时器批量取出，避免每条日志/每个 URL 都排一次跨线程信号
 class ScrapeWorker(QThread):
-    log = Signal(str)
-    progress = Signal(int, int)
-    finished_all = Signal(list)
+    log = Signal(list)                # 一批日志行
+    progress = Signal(int, int)       # 合并后的最新进度
+    finished_all = Signal(list, int)  # (导出文件路径, 导出条数)
 
-    def __init__(self, keywords: List[str], region: str, max_results: int, threads: int, proxy, wait_time: int, cookie_paths: List[str]):
+    def __init__(self, keywords: List[str], region: str, max_results: int, threads: int, proxy, wait_time: int, cookie_paths: List[str],
+                 logger: Optional[logging.Logger] = None, **options):
         super().__init__()
-        self.keywords = keywords
-        self.region = region.strip()
-        self.max_results = max_results
-        self.threads = max(1, threads)
-        self.scraper = Scraper(proxy, wait_time, logger=lambda s: self.log.emit(s))
-        self.cookie_paths = cookie_paths
-        self._stop = threading.Event()
+        self.logger = logger
+        self._lines = deque()
+        self._progress = self._sent = None
+        self._result = ([], 0)
+        self.pipeline = Pipeline(keywords, region, max_results, threads, proxy, wait_time, cookie_paths,
+                                 log=self._log, progress=self._set_progress, **options)
+        self._timer = QTimer(self); self._timer.setInterval(FLUSH_MS); self._timer.timeout.connect(self._flush)
+        self.started.connect(self._timer.start)
+        self.finished.connect(self._on_done)
+
+    def _log(self, msg: str):
+        self._lines.append(msg)
+        if self.logger is not None: self.logger.info(msg)
+
+    def _set_progress(self, done: int, total: int):
+        self._progress = (done, total)
+
+    def _flush(self):
+        lines = []
+        while self._lines: lines.append(self._lines.popleft())
+        if lines: self.log.emit(lines)
+        p = self._progress
+        if p is not None and p != self._sent:
+            self._sent = p; self.progress.emit(*p)
+
+    # QThread.finished 在界面线程处理：先推完剩余日志再报告结束
+    def _on_done(self):
+        self._timer.stop(); self._flush()
+        self.finished_all.emit(*self._result)
 
     def stop(self):
-        self._stop.set()
+        self.pipeline.stop()
 
     def run(self):
-        try:
-            for kw in self.keywords:
-                init_cache(kw, self.region)
-
-            cookies_round: List[List[Dict[str, Any]]] = []
-            for p in self.cookie_paths:
-                try:
-                    cookies_round.append(CookiesManager.parse_for_playwright(p))
-                except Exception as e:
-                    self.log.emit(f"[cookies错误] {p} -> {e}")
-
-            tasks: List[Dict[str, Any]] = []
-            for kw in self.keywords:
-                if self._stop.is_set(): self.finished_all.emit([]); return
-                disp = f"{kw} (地区: {self.region})" if self.region else kw
-                self.log.emit(f"[搜索] {disp}")
-                query = f"{kw} {self.region}" if self.region else kw
-                urls = self.scraper.ddgs_search_one(query, self.max_results)
-                new_urls = [u for u in urls if not kw_exists(kw, u, self.region)]
-                for u in new_urls:
-                    tasks.append({"url": u, "keyword": kw})
-                self.log.emit(f"[搜索完成] {kw} -> 新链接 {len(new_urls)} (已过滤历史缓存)")
-
-            seen = set(); uniq_tasks = []
-            for it in tasks:
-                if it["url"] not in seen: seen.add(it["url"]); uniq_tasks.append(it)
-
-            total = len(uniq_tasks)
-            self.log.emit(f"[队列] 总待抓取：{total} 个")
-            if total == 0:
-                self.finished_all.emit([]); return
-
-            rows_all: List[Dict[str, Any]] = []
-            url_q: "queue.Queue[Dict[str, Any]]" = queue.Queue()
-            for it in uniq_tasks: url_q.put(it)
-
-            lock = threading.Lock(); done = 0
-
-            def worker_fn(tid: int):
-                nonlocal done
-                while not url_q.empty() and not self._stop.is_set():
-                    try:
-                        item = url_q.get_nowait()
-                    except queue.Empty:
-                        break
-                    url = item["url"]; kw = item["keyword"]
-                    cookies = cookies_round[(done + tid) % len(cookies_round)] if cookies_round else []
-                    try:
-                        self.log.emit(f"[{tid}] 打开: {url}")
-                        html = self.scraper.fetch_html(url, cookies)
-                        if not html:
-                            self.log.emit(f"[{tid}] 空白/受限: {url}")
-                            with lock:
-                                done += 1; self.progress.emit(done, total)
-                            continue
-                        info = self.scraper.extract_info(html, url, kw, self.region)
-                        kw_upsert(kw, {k: info.get(k) for k in [
-                            "url","title","description","email","phone","website","address","business_summary"
-                        ]}, self.region)
-                        with lock:
-                            rows_all.append(info)
-                            done += 1
-                            self.progress.emit(done, total)
-                            self.log.emit(
-                                f"[{tid}] OK: {url}\n"
-                                f"    title={info.get('title')}\n"
-                                f"    email={info.get('email')} phone={info.get('phone')}\n"
-                                f"    website={info.get('website')} summary={info.get('business_summary')}"
-                            )
-                    except Exception as e:
-                        self.log.emit(f"[{tid}] 抓取异常: {url} -> {e}")
-
-            threads: List[threading.Thread] = []
-            for i in range(self.threads):
-                t = threading.Thread(target=worker_fn, args=(i+1,), daemon=True)
-                threads.append(t); t.start()
-            for t in threads: t.join()
-
-            self.finished_all.emit(rows_all)
-        except Exception as e:
-            self.log.emit(f"[致命错误] {e}")
-            self.finished_all.emit([])
+        self._result = self.pipeline.run()
@@ -1,9 +1,10 @@
-import sys
+import sys, multiprocessing
 from PySide6.QtWidgets import QApplication
 from fb_hunter.ui.main_window import MainWindow
 from fb_hunter.config import ensure_app_dirs
 
 def main():
+    multiprocessing.freeze_support()
     ensure_app_dirs()
     app = QApplication(sys.argv)
     w = MainWindow()